@@ -4,6 +4,16 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from typing import List
+from collections import Counter
+from app.config import settings
+from app.services.llm_cache import LLMCache
+from app.utils.helpers import split_structured
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTY_LEVELS = ["beginner", "intermediate", "advanced"]
 
 class ContentAnalysis(BaseModel):
     summary: str = Field(description="Brief summary of content")
@@ -14,8 +24,9 @@ class ContentAnalysis(BaseModel):
     target_audience: str = Field(description="Target audience description")
 
 class ContentAnalyzerAgent:
-    def __init__(self, llm: AzureChatOpenAI):
+    def __init__(self, llm: AzureChatOpenAI, cache: LLMCache = None):
         self.llm = llm
+        self.cache = cache or LLMCache()
         self.parser = PydanticOutputParser(pydantic_object=ContentAnalysis)
         
         self.prompt = ChatPromptTemplate.from_messages([
@@ -27,13 +38,67 @@ class ContentAnalyzerAgent:
             ("user", "{content}")
         ])
     
-    async def analyze(self, content: str) -> dict:
-        """Analyze content and extract structure"""
-        chain = self.prompt | self.llm | self.parser
+    async def analyze(self, content: str, use_cache: bool = True) -> dict:
+        """Analyze content and extract structure, map-reducing over chunks when it is long"""
+        chunks = split_structured(content, settings.ANALYSIS_CHUNK_CHARS)
+        if len(chunks) <= 1:
+            return await self._analyze_chunk(content, use_cache)
+        
+        logger.info(f"Analyzing content in {len(chunks)} chunks")
+        semaphore = asyncio.Semaphore(settings.ANALYSIS_MAX_CONCURRENCY)
+        
+        async def analyze_chunk(chunk: str) -> dict:
+            async with semaphore:
+                return await self._analyze_chunk(chunk, use_cache)
+        
+        partials = await asyncio.gather(*(analyze_chunk(chunk) for chunk in chunks))
+        return self._merge(partials, [len(chunk) for chunk in chunks])
+    
+    async def _analyze_chunk(self, content: str, use_cache: bool) -> dict:
+        """Analyze one piece of content in a single call"""
+        messages = self.prompt.format_messages(
+            content=content,
+            format_instructions=self.parser.get_format_instructions()
+        )
         
-        result = await chain.ainvoke({
-            "content": content,
-            "format_instructions": self.parser.get_format_instructions()
-        })
+        text = await self.cache.ainvoke(self.llm, messages, use_cache=use_cache)
+        result = self.parser.parse(text)
         
         return result.dict()
+    
+    @staticmethod
+    def _rank(lists: List[List[str]], limit: int) -> List[str]:
+        """Deduplicate items across chunks, most widely shared first, then in reading order"""
+        counts, first_seen, labels = Counter(), {}, {}
+        for items in lists:
+            for item in dict.fromkeys(item.strip() for item in items if item.strip()):
+                key = item.lower()
+                counts[key] += 1
+                first_seen.setdefault(key, len(first_seen))
+                labels.setdefault(key, item)
+        
+        ranked = sorted(counts, key=lambda key: (-counts[key], first_seen[key]))
+        return [labels[key] for key in ranked[:limit]]
+    
+    def _merge(self, partials: List[dict], weights: List[int]) -> dict:
+        """Reduce per-chunk analyses into one, without another model call"""
+        difficulty = Counter()
+        audience = Counter()
+        for partial, weight in zip(partials, weights):
+            level = partial["difficulty_level"].strip().lower()
+            difficulty[level if level in DIFFICULTY_LEVELS else "intermediate"] += weight
+            audience[partial["target_audience"].strip()] += weight
+        
+        merged = ContentAnalysis(
+            summary=" ".join(partial["summary"].strip() for partial in partials),
+            key_concepts=self._rank([partial["key_concepts"] for partial in partials], settings.ANALYSIS_MAX_ITEMS),
+            # Ties go to the harder level, so the script does not undershoot the material
+            difficulty_level=max(difficulty, key=lambda level: (difficulty[level], DIFFICULTY_LEVELS.index(level))),
+            estimated_duration=min(
+                sum(partial["estimated_duration"] for partial in partials),
+                settings.MAX_VIDEO_DURATION
+            ),
+            topics=self._rank([partial["topics"] for partial in partials], settings.ANALYSIS_MAX_ITEMS),
+            target_audience=audience.most_common(1)[0][0]
+        )
+        return merged.dict()
@@ -1,26 +1,35 @@
 """Diagram Generation Agent"""
 import asyncio
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from app.services.image_generator import ImageGeneratorService
 from app.services.diagram_service import DiagramService
+from app.utils.helpers import stable_hash
 
 class DiagramGeneratorAgent:
-    def __init__(self):
-        self.image_service = ImageGeneratorService()
-        self.diagram_service = DiagramService()
+    def __init__(self, image_service=None, diagram_service=None):
+        self.image_service = image_service or ImageGeneratorService()
+        self.diagram_service = diagram_service or DiagramService()
     
-    async def generate_all(self, visual_plan: dict) -> List[Dict]:
-        """Generate all visual assets based on the plan"""
+    @staticmethod
+    def element_fingerprint(element: dict, size: Tuple[int, int] = None) -> str:
+        """Fingerprint of the inputs that determine an element's asset"""
+        return stable_hash(
+            element.get("type"),
+            element.get("description"),
+            element.get("style"),
+            element.get("color_scheme"),
+            # Diagrams are rasterized for one frame size; generated images are not
+            list(size) if size and element.get("type") == "diagram" else None
+        )
+    
+    async def generate_all(self, visual_plan: dict, size: Tuple[int, int] = None) -> List[Dict]:
+        """Generate all visual assets based on the plan, diagrams at the frame size"""
         assets = []
         
-        tasks = []
-        for element in visual_plan.get("elements", []):
-            if element["type"] == "diagram":
-                tasks.append(self._generate_diagram(element))
-            elif element["type"] == "illustration":
-                tasks.append(self._generate_image(element))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(
+            *(self.generate_element(element, size) for element in visual_plan.get("elements", [])),
+            return_exceptions=True
+        )
         
         for result in results:
             if isinstance(result, dict):
@@ -28,17 +37,27 @@ class DiagramGeneratorAgent:
         
         return assets
     
-    async def _generate_diagram(self, element: dict) -> dict:
-        """Generate a diagram"""
+    async def generate_element(self, element: dict, size: Tuple[int, int] = None) -> Optional[dict]:
+        """Generate the asset for one visual element, if its type needs one"""
+        if element["type"] == "diagram":
+            return await self._generate_diagram(element, size)
+        if element["type"] == "illustration":
+            return await self._generate_image(element)
+        return None
+    
+    async def _generate_diagram(self, element: dict, size: Tuple[int, int] = None) -> dict:
+        """Generate a diagram, rasterized at size (the output frame size) when given"""
         diagram_path = await self.diagram_service.create_diagram(
             description=element["description"],
-            style=element.get("style", "modern")
+            style=element.get("style", "modern"),
+            **({"size": tuple(size)} if size else {})
         )
         
         return {
             "type": "diagram",
             "scene_number": element["scene_number"],
             "path": diagram_path,
+            "fingerprint": self.element_fingerprint(element, size),
             "metadata": element
         }
     
@@ -53,5 +72,6 @@ class DiagramGeneratorAgent:
             "type": "image",
             "scene_number": element["scene_number"],
             "path": image_path,
+            "fingerprint": self.element_fingerprint(element),
             "metadata": element
         }
@@ -1,195 +1,809 @@
 """Main Agent Orchestrator using LangGraph"""
-from typing import TypedDict, Annotated, Sequence
+from dataclasses import asdict
+from typing import TypedDict, Annotated, Callable, Sequence
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
+from langgraph.config import get_stream_writer
 from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+import asyncio
 import operator
+import os
+import time
+import uuid
 from app.config import settings
 from app.agents.content_analyzer import ContentAnalyzerAgent
 from app.agents.script_generator import ScriptGeneratorAgent
 from app.agents.visual_planner import VisualPlannerAgent
 from app.agents.diagram_generator import DiagramGeneratorAgent
+from app.services.llm_cache import LLMCache
+from app.services.asset_store import AssetStore
+from app.core.checkpoints import open_checkpointer, thread_id_for
+from app.core.tracing import span, start_trace, traced
+from app.core.metrics import JOBS_IN_FLIGHT, JOBS_TOTAL, JOB_SECONDS
 from app.core.celery_app import celery_app
 from celery import shared_task
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Progress reported when a node finishes: (percent, project status, message)
+STAGE_PROGRESS = {
+    "content_analyzed": (20, "generating_script", "Content analyzed, creating video script..."),
+    "script_generated": (30, "creating_visuals", "Script ready, producing scenes..."),
+    "completed": (95, "uploading", "Video rendered and uploaded"),
+}
+
+# Scenes advance progress between the script and the final stitch
+SCENE_PROGRESS_RANGE = (30, 90)
+
 # Define the state for our graph
 class VideoGenerationState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
+    project_id: int | None
     content: str
+    config: dict
     analysis: dict
     script: dict
+    scene_results: Annotated[list, operator.add]
     visual_plan: dict
     assets: list
+    scene_fingerprints: dict
     video_path: str
+    hls_url: str | None
     status: str
     error: str | None
 
+class SceneState(TypedDict):
+    """Input of one per-scene branch"""
+    scene: dict
+    config: dict
+    project_id: int | None
+
 class VideoGeneratorOrchestrator:
-    def __init__(self):
-        self.llm = AzureChatOpenAI(
+    def __init__(self, llm=None, speech_service=None, image_service=None, storage_service=None):
+        """Services default to the Azure-backed ones; pass stand-ins to run offline"""
+        self.llm = llm or AzureChatOpenAI(
             azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
             api_key=settings.AZURE_OPENAI_API_KEY,
             azure_deployment=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
             api_version=settings.AZURE_OPENAI_API_VERSION,
             temperature=0.7
         )
+        self.speech_service = speech_service
+        self.storage_service = storage_service
         
-        self.content_analyzer = ContentAnalyzerAgent(self.llm)
-        self.script_generator = ScriptGeneratorAgent(self.llm)
-        self.visual_planner = VisualPlannerAgent(self.llm)
-        self.diagram_generator = DiagramGeneratorAgent()
+        self.llm_cache = LLMCache()
+        self.content_analyzer = ContentAnalyzerAgent(self.llm, self.llm_cache)
+        self.script_generator = ScriptGeneratorAgent(self.llm, self.llm_cache)
+        self.visual_planner = VisualPlannerAgent(self.llm, self.llm_cache)
+        self.diagram_generator = DiagramGeneratorAgent(image_service=image_service)
+        self.asset_store = AssetStore(storage_service)
+        self.video_composer = None
+        self.live_playlists = {}
+        self.progressive_stitches = {}
         
         self.workflow = self.create_workflow()
     
-    def create_workflow(self) -> StateGraph:
-        """Create the LangGraph workflow"""
+    def create_workflow(self, checkpointer=None) -> StateGraph:
+        """Create the LangGraph workflow, persisting state after each node when a checkpointer is given"""
         workflow = StateGraph(VideoGenerationState)
         
         # Add nodes
         workflow.add_node("analyze_content", self.analyze_content_node)
         workflow.add_node("generate_script", self.generate_script_node)
-        workflow.add_node("plan_visuals", self.plan_visuals_node)
-        workflow.add_node("generate_assets", self.generate_assets_node)
-        workflow.add_node("compose_video", self.compose_video_node)
+        workflow.add_node("process_scene", self.process_scene_node)
+        workflow.add_node("stitch_video", self.stitch_video_node)
         
-        # Define edges
+        # Define edges: each scene fans out on its own branch, joined only to stitch
         workflow.set_entry_point("analyze_content")
         workflow.add_edge("analyze_content", "generate_script")
-        workflow.add_edge("generate_script", "plan_visuals")
-        workflow.add_edge("plan_visuals", "generate_assets")
-        workflow.add_edge("generate_assets", "compose_video")
-        workflow.add_edge("compose_video", END)
+        workflow.add_conditional_edges(
+            "generate_script",
+            self.fan_out_scenes,
+            ["process_scene", "stitch_video"]
+        )
+        workflow.add_edge("process_scene", "stitch_video")
+        workflow.add_edge("stitch_video", END)
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
+    
+    @staticmethod
+    def _use_cache(state: VideoGenerationState) -> bool:
+        """Projects can opt out of the LLM cache via their config"""
+        return (state.get("config") or {}).get("use_llm_cache", True)
     
-    async def analyze_content_node(self, state: VideoGenerationState) -> VideoGenerationState:
+    @traced("node.analyze_content")
+    async def analyze_content_node(self, state: VideoGenerationState) -> dict:
         """Analyze input content"""
         logger.info("Starting content analysis...")
         try:
-            analysis = await self.content_analyzer.analyze(state["content"])
-            state["analysis"] = analysis
-            state["status"] = "content_analyzed"
-            state["messages"].append(
-                AIMessage(content=f"Content analyzed: {analysis['summary']}")
+            analysis = await self.content_analyzer.analyze(
+                state["content"],
+                use_cache=self._use_cache(state)
             )
+            return {
+                "analysis": analysis,
+                "status": "content_analyzed",
+                "messages": [AIMessage(content=f"Content analyzed: {analysis['summary']}")]
+            }
         except Exception as e:
             logger.error(f"Content analysis error: {e}")
-            state["error"] = str(e)
-            state["status"] = "failed"
-        
-        return state
+            raise
     
-    async def generate_script_node(self, state: VideoGenerationState) -> VideoGenerationState:
-        """Generate video script"""
+    @traced("node.generate_script")
+    async def generate_script_node(self, state: VideoGenerationState) -> dict:
+        """Generate video script, starting each scene's branch as soon as it is streamed"""
         logger.info("Generating script...")
+        streamed = []
+        progress = {"total": None}
+        
+        async def on_scene(scene: dict):
+            streamed.append(asyncio.create_task(
+                self._process_scene(scene, state["config"], state["project_id"], progress)
+            ))
+        
         try:
             script = await self.script_generator.generate(
                 content=state["content"],
-                analysis=state["analysis"]
-            )
-            state["script"] = script
-            state["status"] = "script_generated"
-            state["messages"].append(
-                AIMessage(content=f"Script generated with {len(script['scenes'])} scenes")
+                analysis=state["analysis"],
+                use_cache=self._use_cache(state),
+                on_scene=on_scene if settings.SCRIPT_STREAMING else None
             )
+            progress["total"] = len(script["scenes"])
+            live = self._live_playlist(state["project_id"])
+            if live is not None:
+                live.set_order([scene["scene_number"] for scene in script["scenes"]])
+            progressive = self._progressive_stitch(state["project_id"])
+            if progressive is not None:
+                progressive.set_order([scene["scene_number"] for scene in script["scenes"]])
+            scene_results = await asyncio.gather(*streamed)
+            
+            return {
+                "script": script,
+                "scene_results": list(scene_results),
+                "status": "script_generated",
+                "messages": [AIMessage(content=f"Script generated with {len(script['scenes'])} scenes")]
+            }
         except Exception as e:
+            for task in streamed:
+                task.cancel()
             logger.error(f"Script generation error: {e}")
-            state["error"] = str(e)
-            state["status"] = "failed"
+            raise
+    
+    def fan_out_scenes(self, state: VideoGenerationState) -> list:
+        """Start one branch per scripted scene not already processed while streaming"""
+        processed = {result["scene_number"] for result in state.get("scene_results") or []}
+        scenes = [
+            scene for scene in state["script"].get("scenes", [])
+            if scene["scene_number"] not in processed
+        ]
+        if not scenes:
+            return ["stitch_video"]
         
-        return state
+        return [
+            Send("process_scene", SceneState(
+                scene=scene,
+                config=state["config"],
+                project_id=state["project_id"]
+            ))
+            for scene in scenes
+        ]
     
-    async def plan_visuals_node(self, state: VideoGenerationState) -> VideoGenerationState:
-        """Plan visual elements"""
-        logger.info("Planning visuals...")
-        try:
-            visual_plan = await self.visual_planner.plan(
-                script=state["script"],
-                analysis=state["analysis"]
+    def _composer(self):
+        """Shared composer, so every scene branch draws on one TTS concurrency limit"""
+        if self.video_composer is None:
+            from app.services.video_service import VideoComposer
+            self.video_composer = VideoComposer(self.speech_service, self.storage_service)
+        return self.video_composer
+    
+    def _live_playlist(self, project_id: int | None):
+        """The run's progressive playlist, created with its first scene"""
+        if not settings.LIVE_HLS_ENABLED:
+            return None
+        if project_id not in self.live_playlists:
+            from app.services.live_playlist import LivePlaylist
+            composer = self._composer()
+            run_id = uuid.uuid4().hex
+            self.live_playlists[project_id] = LivePlaylist(
+                composer.storage_service,
+                os.path.join(composer.output_dir, "live", run_id),
+                f"live/{project_id if project_id is not None else 'adhoc'}-{run_id}"
             )
-            state["visual_plan"] = visual_plan
-            state["status"] = "visuals_planned"
-            state["messages"].append(
-                AIMessage(content=f"Visual plan created with {len(visual_plan['elements'])} elements")
+        return self.live_playlists[project_id]
+    
+    def _progressive_stitch(self, project_id: int | None):
+        """The run's final video, stitched and uploaded as scenes finish in order"""
+        if not settings.PROGRESSIVE_UPLOAD:
+            return None
+        if project_id not in self.progressive_stitches:
+            from app.services.progressive_stitch import ProgressiveStitch
+            composer = self._composer()
+            run_id = uuid.uuid4().hex
+            self.progressive_stitches[project_id] = ProgressiveStitch(
+                composer.storage_service,
+                os.path.join(composer.output_dir, f"video_{run_id}.mp4"),
+                f"videos/{run_id}.mp4"
             )
+        return self.progressive_stitches[project_id]
+    
+    async def _publish_live(self, scene_number: int, segment_path: str | None, project_id: int | None):
+        """Feed a finished (or failed) scene to the live playlist; announce when playback can start"""
+        live = self._live_playlist(project_id)
+        if live is None:
+            return
+        try:
+            if segment_path:
+                playable = await live.add_scene(scene_number, segment_path)
+            else:
+                playable = await live.skip(scene_number)
         except Exception as e:
-            logger.error(f"Visual planning error: {e}")
-            state["error"] = str(e)
-            state["status"] = "failed"
-        
-        return state
+            # Progressive delivery is best effort; the final video does not depend on it
+            logger.error(f"Live playlist error for scene {scene_number}: {e}")
+            return
+        if playable:
+            get_stream_writer()({"playback_ready": live.url})
     
-    async def generate_assets_node(self, state: VideoGenerationState) -> VideoGenerationState:
-        """Generate all visual assets"""
-        logger.info("Generating assets...")
+    @staticmethod
+    def _frame_size(config: dict) -> tuple:
+        """Output frame size of the render, so diagrams are rasterized at exactly that resolution"""
+        from app.services.video_service import render_profile
+        return render_profile(config).size
+    
+    async def _finalize_live(self, project_id: int | None, results: list):
+        """Close the run's live playlist with ENDLIST; best effort, like publishing"""
+        live = self.live_playlists.pop(project_id, None)
+        if live is None:
+            return
         try:
-            assets = await self.diagram_generator.generate_all(
-                visual_plan=state["visual_plan"]
-            )
-            state["assets"] = assets
-            state["status"] = "assets_generated"
-            state["messages"].append(
-                AIMessage(content=f"Generated {len(assets)} assets")
-            )
+            await live.finalize({
+                result["scene_number"]: result["segment"]["output_path"]
+                for result in results if result["segment"]
+            })
         except Exception as e:
-            logger.error(f"Asset generation error: {e}")
-            state["error"] = str(e)
-            state["status"] = "failed"
+            logger.error(f"Live playlist finalize error: {e}")
+    
+    @traced("node.process_scene")
+    async def process_scene_node(self, state: SceneState) -> dict:
+        """Plan, illustrate, narrate and encode a single scene"""
+        result = await self._process_scene(state["scene"], state["config"], state["project_id"])
+        return {
+            "scene_results": [result],
+            "messages": [AIMessage(content=f"Scene {result['scene_number']} processed")]
+        }
+    
+    async def _process_scene(
+        self,
+        scene: dict,
+        config: dict,
+        project_id: int | None,
+        progress: dict = None
+    ) -> dict:
+        """Run one scene from visual plan to encoded segment; failures leave it out of the stitch"""
+        logger.info(f"Processing scene {scene['scene_number']}...")
+        
+        with span("scene", scene_number=scene["scene_number"]) as current:
+            with span("scene.plan"):
+                element = self.visual_planner.plan_scene(scene)
+            result = {"scene_number": scene["scene_number"], "element": element, "asset": None, "segment": None}
+        
+            try:
+                with span("scene.asset", visual_type=element["type"]):
+                    asset = await self.diagram_generator.generate_element(element, self._frame_size(config))
+                    if asset:
+                        await self._store_assets([asset], project_id)
+                        result["asset"] = asset
+            except Exception as e:
+                logger.error(f"Asset generation error for scene {scene['scene_number']}: {e}")
+        
+            try:
+                result["segment"] = await self._render_segment(scene, element, result["asset"], config)
+            except Exception as e:
+                # A failed scene is left out of the stitch, as with batch rendering
+                logger.error(f"Segment render error for scene {scene['scene_number']}: {e}")
+            current.set(has_asset=result["asset"] is not None, rendered=result["segment"] is not None)
+        
+        await self._publish_live(
+            scene["scene_number"],
+            result["segment"]["output_path"] if result["segment"] else None,
+            project_id
+        )
+        progressive = self._progressive_stitch(project_id)
+        if progressive is not None:
+            # Later scenes keep encoding while this one is stitched and uploaded
+            await progressive.add_scene(
+                scene["scene_number"],
+                result["segment"]["output_path"] if result["segment"] else None,
+                result["segment"]["duration"] if result["segment"] else None
+            )
+        
+        get_stream_writer()({
+            "scene_completed": scene["scene_number"],
+            "total": (progress or {}).get("total")
+        })
+        return result
+    
+    async def _render_segment(self, scene: dict, element: dict, asset: dict | None, config: dict) -> dict:
+        """Encode one scene; returns the segment as it is kept in checkpointed state"""
+        transitions = self.visual_planner.build_plan([element])["transitions"]
+        job = await self._composer().render_scene(
+            scene,
+            [asset] if asset else [],
+            {"transitions": transitions, **(config or {})}
+        )
+        # Checkpointed state, so the profile travels as a plain dict
+        return {
+            **{key: job[key] for key in ("scene_number", "fingerprint", "output_path", "rendered", "duration")},
+            "profile": asdict(job["profile"])
+        }
+    
+    async def _restore_segments(self, state: VideoGenerationState, results: list):
+        """Re-render scenes whose segments were evicted from the cache before a resumed stitch"""
+        missing = set(await asyncio.to_thread(
+            self._composer().missing_segments,
+            [result["segment"] for result in results if result["segment"]]
+        ))
+        if not missing:
+            return
         
-        return state
+        logger.info(f"Re-rendering evicted segments for scenes {sorted(missing)}")
+        scenes = {scene["scene_number"]: scene for scene in state["script"].get("scenes", [])}
+        rendered = await asyncio.gather(*(
+            self._render_segment(scenes[result["scene_number"]], result["element"], result["asset"], state["config"])
+            for result in results if result["scene_number"] in missing
+        ))
+        by_scene = {segment["scene_number"]: segment for segment in rendered}
+        for result in results:
+            if result["scene_number"] in by_scene:
+                result["segment"] = by_scene[result["scene_number"]]
     
-    async def compose_video_node(self, state: VideoGenerationState) -> VideoGenerationState:
-        """Compose final video"""
-        logger.info("Composing video...")
+    @traced("node.stitch_video")
+    async def stitch_video_node(self, state: VideoGenerationState) -> dict:
+        """Join the finished scene segments into the final video"""
+        logger.info("Stitching video...")
         try:
-            from app.services.video_service import VideoComposer
-            composer = VideoComposer()
-            video_path = await composer.compose(
-                script=state["script"],
-                assets=state["assets"],
-                visual_plan=state["visual_plan"]
-            )
-            state["video_path"] = video_path
-            state["status"] = "completed"
-            state["messages"].append(
-                AIMessage(content=f"Video completed: {video_path}")
-            )
+            results = sorted(state["scene_results"], key=lambda result: result["scene_number"])
+            await self._restore_segments(state, results)
+            
+            # Every scene is in, so the live playlist can end while the final video is packaged
+            finalizing = asyncio.create_task(self._finalize_live(state["project_id"], results))
+            try:
+                published = await self._composer().stitch(
+                    [result["segment"] for result in results if result["segment"]],
+                    state["project_id"],
+                    self.progressive_stitches.pop(state["project_id"], None)
+                )
+            finally:
+                await finalizing
+            video_path = published["video_url"]
+            
+            return {
+                "video_path": video_path,
+                "hls_url": published["hls_url"],
+                "visual_plan": self.visual_planner.build_plan([result["element"] for result in results]),
+                "assets": [result["asset"] for result in results if result["asset"]],
+                "scene_fingerprints": {
+                    result["scene_number"]: result["segment"]["fingerprint"]
+                    for result in results if result["segment"]
+                },
+                "status": "completed",
+                "messages": [AIMessage(content=f"Video completed: {video_path}")]
+            }
         except Exception as e:
             logger.error(f"Video composition error: {e}")
-            state["error"] = str(e)
-            state["status"] = "failed"
-        
-        return state
+            raise
+    
+    async def _store_assets(self, assets: list, project_id: int | None):
+        """Register generated files in the deduplicating asset store"""
+        records = await asyncio.gather(*(
+            self.asset_store.put(asset["path"], asset["type"], project_id, asset.get("metadata"))
+            for asset in assets
+        ))
+        for asset, record in zip(assets, records):
+            asset["file_url"] = record["file_url"]
+            asset["object_id"] = record["object_id"]
     
-    async def generate_video(self, content: str, config: dict = None) -> dict:
-        """Main entry point for video generation"""
+    async def generate_video(
+        self,
+        content: str,
+        config: dict = None,
+        project_id: int = None,
+        on_progress: Callable[..., None] = None,
+        resume: bool = False
+    ) -> dict:
+        """Main entry point for video generation.
+        
+        With a project_id, state is checkpointed after every node. A resumed
+        run continues from the last completed node, so a failure in one stage
+        does not repeat the LLM and image calls of the stages before it.
+        """
         initial_state = VideoGenerationState(
             messages=[HumanMessage(content=content)],
+            project_id=project_id,
             content=content,
+            config=config or {},
             analysis={},
             script={},
+            scene_results=[],
             visual_plan={},
             assets=[],
+            scene_fingerprints={},
             video_path="",
+            hls_url=None,
             status="started",
             error=None
         )
         
-        final_state = await self.workflow.ainvoke(initial_state)
+        async with open_checkpointer() as checkpointer:
+            if checkpointer is None or project_id is None:
+                checkpointer = None
+                workflow, run_config = self.workflow, None
+            else:
+                workflow = self.create_workflow(checkpointer)
+                run_config = {"configurable": {"thread_id": thread_id_for(project_id)}}
+            
+            graph_input, final_state = initial_state, initial_state
+            if checkpointer is not None:
+                snapshot = await workflow.aget_state(run_config)
+                if resume and snapshot.next:
+                    logger.info(f"Resuming project {project_id} at {', '.join(snapshot.next)}")
+                    graph_input, final_state = None, snapshot.values
+                else:
+                    await checkpointer.adelete_thread(run_config["configurable"]["thread_id"])
+            
+            scenes_done = len(final_state.get("scene_results") or [])
+            reported = {"progress": 0}
+            
+            def report(progress: int, status: str, message: str, **extra):
+                # Scene branches overlap the script stage, so never move backwards
+                reported["progress"] = max(reported["progress"], progress)
+                if on_progress:
+                    on_progress(reported["progress"], status, message, **extra)
+            
+            try:
+                async for mode, chunk in workflow.astream(
+                    graph_input,
+                    run_config,
+                    stream_mode=["updates", "values", "custom"]
+                ):
+                    if mode == "values":
+                        final_state = chunk
+                        continue
+                    
+                    if mode == "custom":
+                        if "playback_ready" in chunk:
+                            report(
+                                reported["progress"],
+                                "playback_ready",
+                                "The first scenes are ready to play",
+                                playlist_url=chunk["playback_ready"]
+                            )
+                            continue
+                        # A scene finished, possibly while the script is still streaming
+                        if "scene_completed" in chunk:
+                            scenes_done += 1
+                            total = chunk.get("total") or len((final_state.get("script") or {}).get("scenes", []))
+                            low, high = SCENE_PROGRESS_RANGE
+                            report(
+                                low + (high - low) * scenes_done // total if total else low,
+                                "composing_video",
+                                f"Rendered {scenes_done} of {total} scenes..." if total else f"Rendered {scenes_done} scenes..."
+                            )
+                        continue
+                    
+                    # Report each node as soon as it finishes
+                    for update in chunk.values():
+                        stage = STAGE_PROGRESS.get((update or {}).get("status"))
+                        if stage:
+                            report(*stage)
+            except Exception as e:
+                logger.error(f"Video generation error: {e}")
+                live = self.live_playlists.pop(project_id, None)
+                if live is not None:
+                    live.discard()
+                progressive = self.progressive_stitches.pop(project_id, None)
+                if progressive is not None:
+                    await progressive.abort()
+                return {
+                    "status": "failed",
+                    "error": str(e),
+                    "resumable": checkpointer is not None
+                }
+            
+            if checkpointer is not None:
+                await checkpointer.adelete_thread(run_config["configurable"]["thread_id"])
         
         return {
             "status": final_state["status"],
             "video_path": final_state.get("video_path"),
+            "hls_url": final_state.get("hls_url"),
             "error": final_state.get("error"),
+            "scene_fingerprints": final_state.get("scene_fingerprints"),
             "script": final_state.get("script"),
             "assets": final_state.get("assets")
         }
+    
+    async def rerender_video(
+        self,
+        script: dict,
+        assets: list,
+        previous_fingerprints: dict = None,
+        config: dict = None,
+        project_id: int = None
+    ) -> dict:
+        """Re-render an edited script, rebuilding only scenes whose inputs changed.
+        
+        Analysis and scripting are skipped. Assets are regenerated only for
+        scenes whose visual element fingerprint changed; narration comes from
+        the TTS cache and unchanged segments from the segment cache, so the
+        composer re-encodes only the edited scenes before re-stitching.
+        """
+        # Segment reuse only applies to the per-scene render path
+        config = {**(config or {}), "parallel_render": True}
+        
+        visual_plan = self.visual_planner.build_plan([
+            self.visual_planner.plan_scene(scene) for scene in script.get("scenes", [])
+        ])
+        config = {"transitions": visual_plan["transitions"], **config}
+        current = {
+            asset["scene_number"]: asset
+            for asset in assets
+            if asset.get("fingerprint")
+        }
+        
+        size = self._frame_size(config)
+        
+        # Reused assets may have been rendered on another worker
+        await asyncio.gather(*(self.asset_store.fetch(asset) for asset in assets))
+        
+        kept, changed = [], []
+        for element in visual_plan["elements"]:
+            asset = current.get(element["scene_number"])
+            if asset and asset["fingerprint"] == self.diagram_generator.element_fingerprint(element, size):
+                kept.append(asset)
+            else:
+                changed.append(element)
+        
+        new_assets = await self.diagram_generator.generate_all({"elements": changed}, size) if changed else []
+        await self._store_assets(new_assets, project_id)
+        assets = kept + new_assets
+        
+        composer = self._composer()
+        published = await composer.compose(
+            script=script,
+            assets=assets,
+            visual_plan=visual_plan,
+            config=config,
+            project_id=project_id
+        )
+        fingerprints = composer.scene_fingerprints(script, assets, config)
+        previous = {int(k): v for k, v in (previous_fingerprints or {}).items()}
+        
+        return {
+            "status": "completed",
+            "video_path": published["video_url"],
+            "hls_url": published["hls_url"],
+            "script": script,
+            "assets": assets,
+            "scene_fingerprints": fingerprints,
+            "rebuilt_scenes": sorted(
+                number for number, fingerprint in fingerprints.items()
+                if previous.get(number) != fingerprint
+            )
+        }
+
+def _save_video(db, project, result: dict, config: dict):
+    """Record a finished render as a Video row"""
+    from app.models.project import Video, StoredObject
+    
+    script = result.get("script") or {}
+    assets_by_scene = {asset["scene_number"]: asset for asset in result.get("assets") or []}
+    fingerprints = result.get("scene_fingerprints") or {}
+    stored = db.query(StoredObject).filter(StoredObject.file_url == result["video_path"]).first()
+    render_mode = config.get("render_mode") or "final"
+    
+    video = Video(
+        project_id=project.id,
+        title=project.title,
+        file_url=result["video_path"],
+        hls_url=result.get("hls_url"),
+        duration=sum(scene.get("duration", 0) for scene in script.get("scenes", [])),
+        file_size=stored.size / (1024 * 1024) if stored and stored.size else None,
+        quality="draft" if render_mode == "draft" else config.get("quality", settings.DEFAULT_VIDEO_QUALITY),
+        render_mode=render_mode,
+        script=script.get("introduction"),
+        scenes=[
+            {
+                **scene,
+                "fingerprint": fingerprints.get(scene["scene_number"]),
+                "asset": assets_by_scene.get(scene["scene_number"])
+            }
+            for scene in script.get("scenes", [])
+        ],
+        status="completed"
+    )
+    db.add(video)
+    db.commit()
+    return video
 
-@shared_task
-def orchestrate_video_generation(project_id: int, content: str):
-    """Celery task for video generation"""
-    orchestrator = VideoGeneratorOrchestrator()
-    return {"project_id": project_id, "status": "processing"}
+@shared_task(bind=True)
+def orchestrate_video_generation(self, project_id: int, resume: bool = False, render_mode: str = None):
+    """Celery task running the generation pipeline for a project, optionally from its last checkpoint"""
+    from app.database import SessionLocal
+    from app.models.project import Project
+    from app.services.progress import ProgressReporter
+    
+    reporter = ProgressReporter(project_id, task=self)
+    # A message redelivered after a worker died picks up where that worker stopped
+    resume = resume or bool((self.request.delivery_info or {}).get("redelivered"))
+    db = SessionLocal()
+    status, started = "failed", time.monotonic()
+    JOBS_IN_FLIGHT.inc()
+    
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+        
+        config = project.config or {}
+        if render_mode:
+            config = {**config, "render_mode": render_mode}
+        if resume:
+            reporter.report(5, "analyzing", "Resuming generation from the last completed stage...")
+        else:
+            reporter.report(5, "analyzing", "Analyzing content structure...")
+        
+        orchestrator = VideoGeneratorOrchestrator()
+        with start_trace(project_id, resume=resume, task_id=self.request.id) as root:
+            result = asyncio.run(orchestrator.generate_video(
+                content=project.content,
+                config=config,
+                project_id=project_id,
+                on_progress=reporter.report,
+                resume=resume
+            ))
+            root.set(status=result["status"])
+        
+        if result["status"] != "completed":
+            reporter.report(0, "failed", f"Generation failed: {result.get('error')}", resumable=result.get("resumable", False))
+            return {"project_id": project_id, "status": "failed", "error": result.get("error")}
+        
+        video = _save_video(db, project, result, config)
+        
+        status = "completed"
+        reporter.report(100, "completed", "Video generation completed!", video_id=video.id)
+        return {"project_id": project_id, "status": "completed", "video_id": video.id}
+    
+    except Exception as e:
+        logger.error(f"Video generation task error: {e}")
+        reporter.report(0, "failed", f"Generation failed: {str(e)}")
+        raise
+    
+    finally:
+        JOBS_IN_FLIGHT.dec()
+        JOBS_TOTAL.labels(status).inc()
+        JOB_SECONDS.labels(status).observe(time.monotonic() - started)
+        db.close()
+
+def _rerender_from_video(
+    task,
+    video_id: int,
+    render_mode: str,
+    edits: list = None,
+    trace_name: str = "rerender",
+    start_message: str = "Re-rendering video...",
+    done_message: str = "Video ready!"
+) -> dict:
+    """Re-render a stored video's script, with optional per-scene edits, and record the result.
+    
+    The script and assets come from the Video row; rerender_video rebuilds
+    only the scenes whose fingerprints changed.
+    """
+    from app.database import SessionLocal
+    from app.models.project import Project, Video
+    from app.services.progress import ProgressReporter
+    
+    db = SessionLocal()
+    reporter = None
+    status, started = "failed", time.monotonic()
+    JOBS_IN_FLIGHT.inc()
+    
+    try:
+        source = db.query(Video).filter(Video.id == video_id).first()
+        if not source:
+            raise ValueError(f"Video {video_id} not found")
+        project = db.query(Project).filter(Project.id == source.project_id).first()
+        
+        reporter = ProgressReporter(project.id, task=task)
+        reporter.report(30, "composing_video", start_message)
+        
+        config = {**(project.config or {}), "render_mode": render_mode}
+        edits_by_scene = {edit["scene_number"]: edit for edit in edits or []}
+        scenes = [
+            {
+                **{key: value for key, value in scene.items() if key not in ("fingerprint", "asset")},
+                **edits_by_scene.get(scene["scene_number"], {})
+            }
+            for scene in source.scenes or []
+        ]
+        script = {"title": source.title, "introduction": source.script or "", "scenes": scenes}
+        assets = [scene["asset"] for scene in source.scenes or [] if scene.get("asset")]
+        
+        orchestrator = VideoGeneratorOrchestrator()
+        with start_trace(project.id, name=trace_name, video_id=video_id, task_id=task.request.id):
+            result = asyncio.run(orchestrator.rerender_video(
+                script=script,
+                assets=assets,
+                previous_fingerprints={scene["scene_number"]: scene.get("fingerprint") for scene in source.scenes or []},
+                config=config,
+                project_id=project.id
+            ))
+        
+        video = _save_video(db, project, result, config)
+        
+        status = "completed"
+        reporter.report(100, "completed", done_message, video_id=video.id, rebuilt_scenes=result["rebuilt_scenes"])
+        return {
+            "project_id": project.id,
+            "status": "completed",
+            "video_id": video.id,
+            "source_video_id": video_id,
+            "rebuilt_scenes": result["rebuilt_scenes"]
+        }
+    
+    except Exception as e:
+        logger.error(f"{trace_name} task error: {e}")
+        if reporter:
+            reporter.report(0, "failed", f"Re-render failed: {str(e)}")
+        raise
+    
+    finally:
+        JOBS_IN_FLIGHT.dec()
+        JOBS_TOTAL.labels(status).inc()
+        JOB_SECONDS.labels(status).observe(time.monotonic() - started)
+        db.close()
+
+@shared_task(bind=True)
+def promote_draft_video(self, video_id: int):
+    """Celery task re-rendering a draft at final quality from its stored script and assets.
+    
+    Nothing upstream is regenerated: the script comes from the draft, its
+    assets are reused as-is and narration is served from the TTS cache, so
+    only the encode is repeated at the final profile.
+    """
+    return _rerender_from_video(
+        self,
+        video_id,
+        "final",
+        trace_name="draft_promotion",
+        start_message="Rendering the final cut from the draft...",
+        done_message="Final video ready!"
+    )
+
+@shared_task(bind=True)
+def rerender_edited_video(self, video_id: int, edits: list):
+    """Celery task applying editor changes to some scenes and re-rendering only those.
+    
+    Each edit carries a scene_number and the fields that changed (narration,
+    key_points, visual_description, duration). Unchanged scenes keep their
+    cached narration, assets and segments.
+    """
+    from app.database import SessionLocal
+    from app.models.project import Video
+    
+    db = SessionLocal()
+    try:
+        source = db.query(Video).filter(Video.id == video_id).first()
+        render_mode = (source.render_mode if source else None) or "final"
+    finally:
+        db.close()
+    
+    return _rerender_from_video(
+        self,
+        video_id,
+        render_mode,
+        edits=edits,
+        trace_name="scene_edit",
+        start_message=f"Re-rendering {len(edits)} edited scene(s)...",
+        done_message="Edited video ready!"
+    )
@@ -1,8 +1,14 @@
 """Script Generation Agent"""
 from langchain_openai import AzureChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, Field, ValidationError
+from typing import Awaitable, Callable, List, Optional
+from app.services.llm_cache import LLMCache
+from app.core.tracing import traced
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Scene(BaseModel):
     scene_number: int
@@ -19,8 +25,9 @@ class VideoScript(BaseModel):
     total_duration: int
 
 class ScriptGeneratorAgent:
-    def __init__(self, llm: AzureChatOpenAI):
+    def __init__(self, llm: AzureChatOpenAI, cache: LLMCache = None):
         self.llm = llm
+        self.cache = cache or LLMCache()
         
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert educational video scriptwriter.
@@ -37,26 +44,114 @@ class ScriptGeneratorAgent:
             Analysis: {analysis}
             
             Generate a detailed script with scenes.
+            
+            Output format: JSON Lines, one complete JSON object per line, nothing else.
+            First line: {{"type": "header", "title": "...", "introduction": "..."}}
+            Then one line per scene, in order:
+            {{"type": "scene", "scene_number": 1, "narration": "...", "duration": 30, "visual_description": "...", "key_points": ["..."]}}
+            Last line: {{"type": "footer", "conclusion": "...", "total_duration": 300}}
             """),
             ("user", "Generate the video script.")
         ])
     
-    async def generate(self, content: str, analysis: dict) -> dict:
-        """Generate video script"""
-        chain = self.prompt | self.llm
+    @traced("script.generate")
+    async def generate(
+        self,
+        content: str,
+        analysis: dict,
+        use_cache: bool = True,
+        on_scene: Optional[Callable[[dict], Awaitable[None]]] = None
+    ) -> dict:
+        """Generate video script, streaming it and handing each scene to on_scene as soon as it is complete"""
+        messages = self.prompt.format_messages(
+            content=content,
+            analysis=str(analysis)
+        )
+        
+        script = self._empty_script()
+        parts = []
+        buffer = ""
+        
+        async for chunk in self.cache.astream(self.llm, messages, use_cache=use_cache):
+            parts.append(chunk)
+            buffer += chunk
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                scene = self._apply_line(script, line)
+                if scene and on_scene:
+                    await on_scene(scene)
+        
+        scene = self._apply_line(script, buffer)
+        if scene and on_scene:
+            await on_scene(scene)
+        
+        if not script["scenes"]:
+            # The model ignored the line format; fall back to a single scene
+            return self._parse_script("".join(parts))
+        
+        return self._finalize(script)
+    
+    @staticmethod
+    def _empty_script() -> dict:
+        return {
+            "title": "Educational Video",
+            "introduction": "",
+            "scenes": [],
+            "conclusion": "Summary",
+            "total_duration": 0
+        }
+    
+    def _apply_line(self, script: dict, line: str) -> Optional[dict]:
+        """Merge one JSON line into the script, returning the scene it completed, if any"""
+        line = line.strip().strip(",")
+        if not line.startswith("{"):
+            return None
+        
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed script line: {line[:80]}")
+            return None
         
-        result = await chain.ainvoke({
-            "content": content,
-            "analysis": str(analysis)
-        })
+        record_type = record.pop("type", "scene" if "narration" in record else None)
         
-        # Parse the result into structured format
-        # In production, use structured output or JSON mode
-        return self._parse_script(result.content)
+        if record_type == "header":
+            script["title"] = record.get("title") or script["title"]
+            script["introduction"] = record.get("introduction", "")
+        elif record_type == "footer":
+            script["conclusion"] = record.get("conclusion") or script["conclusion"]
+            script["total_duration"] = record.get("total_duration", 0)
+        elif record_type == "scene":
+            record.setdefault("scene_number", len(script["scenes"]) + 1)
+            record.setdefault("duration", 5)
+            record.setdefault("visual_description", "")
+            record.setdefault("key_points", [])
+            try:
+                scene = Scene.model_validate(record).model_dump()
+            except ValidationError as e:
+                logger.warning(f"Skipping invalid scene: {e}")
+                return None
+            script["scenes"].append(scene)
+            return scene
+        
+        return None
+    
+    @staticmethod
+    def _finalize(script: dict) -> dict:
+        if not script["total_duration"]:
+            script["total_duration"] = sum(scene["duration"] for scene in script["scenes"])
+        return script
     
     def _parse_script(self, script_text: str) -> dict:
         """Parse script text into structured format"""
-        # Simplified parsing - in production use LLM JSON mode
+        script = self._empty_script()
+        for line in script_text.splitlines():
+            self._apply_line(script, line)
+        
+        if script["scenes"]:
+            return self._finalize(script)
+        
+        # Unstructured completion: keep it as one scene
         return {
             "title": "Educational Video",
             "introduction": script_text[:200],
@@ -2,10 +2,12 @@
 from langchain_openai import AzureChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from typing import List, Dict
+from app.services.llm_cache import LLMCache
 
 class VisualPlannerAgent:
-    def __init__(self, llm: AzureChatOpenAI):
+    def __init__(self, llm: AzureChatOpenAI, cache: LLMCache = None):
         self.llm = llm
+        self.cache = cache or LLMCache()
         
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert in educational visual design.
@@ -23,32 +25,37 @@ class VisualPlannerAgent:
             ("user", "Create a detailed visual plan.")
         ])
     
-    async def plan(self, script: dict, analysis: dict) -> dict:
+    async def plan(self, script: dict, analysis: dict, use_cache: bool = True) -> dict:
         """Plan visual elements for the video"""
-        chain = self.prompt | self.llm
+        messages = self.prompt.format_messages(
+            script=str(script),
+            analysis=str(analysis)
+        )
         
-        result = await chain.ainvoke({
-            "script": str(script),
-            "analysis": str(analysis)
-        })
+        text = await self.cache.ainvoke(self.llm, messages, use_cache=use_cache)
         
-        return self._parse_visual_plan(result.content, script)
+        return self._parse_visual_plan(text, script)
     
-    def _parse_visual_plan(self, plan_text: str, script: dict) -> dict:
-        """Parse visual plan into structured format"""
-        elements = []
-        
-        for scene in script.get("scenes", []):
-            elements.append({
-                "scene_number": scene["scene_number"],
-                "type": "diagram",
-                "description": scene.get("visual_description", ""),
-                "style": "modern",
-                "color_scheme": "blue_gradient"
-            })
-        
+    def plan_scene(self, scene: dict) -> dict:
+        """Visual element for a single scene, available as soon as the scene is scripted"""
         return {
-            "elements": elements,
+            "scene_number": scene["scene_number"],
+            "type": "diagram",
+            "description": scene.get("visual_description", ""),
+            "style": "modern",
+            "color_scheme": "blue_gradient"
+        }
+    
+    def build_plan(self, elements: List[Dict]) -> dict:
+        """Assemble per-scene elements into a full visual plan"""
+        return {
+            "elements": sorted(elements, key=lambda element: element["scene_number"]),
             "overall_style": "professional",
             "transitions": "smooth_fade"
         }
+    
+    def _parse_visual_plan(self, plan_text: str, script: dict) -> dict:
+        """Parse visual plan into structured format"""
+        return self.build_plan([
+            self.plan_scene(scene) for scene in script.get("scenes", [])
+        ])
@@ -8,6 +8,9 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.video import ContentUpload, ProjectCreate, ProjectResponse
 from app.models.project import Project, ProjectStatus
+from app.core.exceptions import FileTooLargeError
+from app.utils.validators import Validators
+from app.config import settings
 import logging
 
 router = APIRouter()
@@ -48,18 +51,12 @@ async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db
     try:
         from app.services.document_parser import DocumentParser
         
-        content = await file.read()
-        parser = DocumentParser()
-        
-        if file.filename.endswith('.pdf'):
-            text = parser._parse_pdf(content)
-        elif file.filename.endswith('.docx'):
-            text = parser._parse_docx(content)
-        elif file.filename.endswith('.txt'):
-            text = content.decode('utf-8')
-        else:
+        if not Validators.validate_file_extension(file.filename or "", settings.ALLOWED_EXTENSIONS):
             raise HTTPException(status_code=400, detail="Unsupported file type")
         
+        # The upload is copied to disk in chunks and parsed off the event loop
+        text = await DocumentParser().parse_file(file)
+        
         project = Project(
             user_id=1,
             title=file.filename,
@@ -77,9 +74,15 @@ async def upload_file(file: UploadFile = File(...), db: Session = Depends(get_db
             "filename": file.filename,
             "content_length": len(text)
         }
+    except HTTPException:
+        raise
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"File upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
 
 @router.get("/projects")
 async def get_projects(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
@@ -102,6 +105,10 @@ async def delete_project(project_id: int, db: Session = Depends(get_db)):
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    # Release shared objects before the project's asset rows are cascaded away
+    from app.services.asset_store import AssetStore
+    await AssetStore().release_project(project_id)
+    
     db.delete(project)
     db.commit()
     
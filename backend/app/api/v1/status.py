@@ -1,6 +1,11 @@
 """Task Status Routes"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.project import TraceSpan
 from app.core.celery_app import celery_app
+from app.services.llm_cache import LLMCache
+from app.services.azure_speech import get_tts_cache
 import logging
 
 router = APIRouter()
@@ -29,3 +34,61 @@ async def get_task_status(task_id: str):
     except Exception as e:
         logger.error(f"Task status error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Get LLM response cache statistics"""
+    try:
+        return {
+            "llm": LLMCache().stats(),
+            "tts": get_tts_cache().stats()
+        }
+    except Exception as e:
+        logger.error(f"Cache stats error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/trace/{project_id}")
+async def get_project_trace(project_id: int, trace_id: str = None, db: Session = Depends(get_db)):
+    """Get the span timeline of a project's latest (or given) generation run"""
+    if trace_id is None:
+        latest = db.query(TraceSpan).filter(
+            TraceSpan.project_id == project_id,
+            TraceSpan.parent_span_id.is_(None)
+        ).order_by(TraceSpan.start_ns.desc()).first()
+        if not latest:
+            raise HTTPException(status_code=404, detail="No trace recorded for this project")
+        trace_id = latest.trace_id
+    
+    spans = db.query(TraceSpan).filter(
+        TraceSpan.project_id == project_id,
+        TraceSpan.trace_id == trace_id
+    ).order_by(TraceSpan.start_ns).all()
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    
+    trace_start = spans[0].start_ns
+    totals = {}
+    for s in spans:
+        total = totals.setdefault(s.name, {"count": 0, "total_ms": 0.0})
+        total["count"] += 1
+        total["total_ms"] += s.duration_ms or 0
+    
+    return {
+        "project_id": project_id,
+        "trace_id": trace_id,
+        "duration_ms": (max(s.end_ns for s in spans) - trace_start) / 1e6,
+        "totals": dict(sorted(totals.items(), key=lambda item: -item[1]["total_ms"])),
+        "spans": [
+            {
+                "span_id": s.span_id,
+                "parent_span_id": s.parent_span_id,
+                "name": s.name,
+                "offset_ms": (s.start_ns - trace_start) / 1e6,
+                "duration_ms": s.duration_ms,
+                "status": s.status,
+                "error": s.error,
+                "attributes": s.attributes or {}
+            }
+            for s in spans
+        ]
+    }
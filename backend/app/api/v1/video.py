@@ -1,13 +1,16 @@
 # ============================================
 # backend/app/api/v1/video.py - ENHANCED WITH PROGRESS
 # ============================================
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.video import ProjectCreate, VideoResponse, VideoProgress
+from app.schemas.video import ProjectCreate, VideoResponse, VideoProgress, VideoEditRequest
 from app.models.project import Project, Video, ProjectStatus
-from app.services.websocket_manager import ConnectionManager, manager
-import asyncio
+from app.services.storage import get_storage_service
+from app.utils.http_range import FileRangeResponse, RangeNotSatisfiable, parse_range, etag_matches
+import mimetypes
+import os
 import logging
 
 router = APIRouter()
@@ -16,10 +19,12 @@ logger = logging.getLogger(__name__)
 @router.post("/generate/{project_id}")
 async def generate_video(
     project_id: int,
-    background_tasks: BackgroundTasks,
+    draft: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Start video generation"""
+    """Start video generation; draft=true renders a quick low-resolution preview"""
+    from app.agents.orchestrator import orchestrate_video_generation
+    
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -28,106 +33,96 @@ async def generate_video(
     project.progress = 0
     db.commit()
     
-    # Start background task
-    background_tasks.add_task(generate_video_task, project_id, str(project_id))
+    # Rendering runs on Celery workers, never on the API event loop
+    task = orchestrate_video_generation.delay(project_id, render_mode="draft" if draft else None)
     
     return {
-        "message": "Video generation started",
+        "message": "Draft generation started" if draft else "Video generation started",
+        "task_id": task.id,
         "project_id": project_id,
         "websocket_url": f"/ws/{project_id}"
     }
 
-async def generate_video_task(project_id: int, client_id: str):
-    """Background task for video generation with progress updates"""
-    from app.database import SessionLocal
+@router.post("/generate/{project_id}/resume")
+async def resume_video_generation(
+    project_id: int,
+    db: Session = Depends(get_db)
+):
+    """Retry a failed generation from its last completed pipeline stage"""
+    from app.agents.orchestrator import orchestrate_video_generation
     
-    db = SessionLocal()
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    try:
-        project = db.query(Project).filter(Project.id == project_id).first()
-        
-        # Step 1: Content Analysis (0-20%)
-        await manager.send_progress(client_id, 5, "analyzing", "Analyzing content structure...")
-        await asyncio.sleep(2)
-        project.status = ProjectStatus.ANALYZING
-        project.progress = 10
-        db.commit()
-        
-        await manager.send_progress(client_id, 15, "analyzing", "Identifying key concepts...")
-        await asyncio.sleep(2)
-        
-        # Step 2: Script Generation (20-40%)
-        await manager.send_progress(client_id, 25, "generating_script", "Creating video script...")
-        project.status = ProjectStatus.GENERATING_SCRIPT
-        project.progress = 30
-        db.commit()
-        await asyncio.sleep(3)
-        
-        await manager.send_progress(client_id, 35, "generating_script", "Structuring scenes...")
-        await asyncio.sleep(2)
-        
-        # Step 3: Visual Creation (40-60%)
-        await manager.send_progress(client_id, 45, "creating_visuals", "Generating diagrams...")
-        project.status = ProjectStatus.CREATING_VISUALS
-        project.progress = 50
-        db.commit()
-        await asyncio.sleep(3)
-        
-        await manager.send_progress(client_id, 55, "creating_visuals", "Creating illustrations...")
-        await asyncio.sleep(2)
-        
-        # Step 4: Audio Generation (60-75%)
-        await manager.send_progress(client_id, 65, "generating_audio", "Synthesizing narration...")
-        project.status = ProjectStatus.GENERATING_AUDIO
-        project.progress = 70
-        db.commit()
-        await asyncio.sleep(3)
-        
-        # Step 5: Video Composition (75-95%)
-        await manager.send_progress(client_id, 80, "composing_video", "Composing video...")
-        project.status = ProjectStatus.COMPOSING_VIDEO
-        project.progress = 85
-        db.commit()
-        await asyncio.sleep(4)
-        
-        await manager.send_progress(client_id, 90, "composing_video", "Adding transitions...")
-        await asyncio.sleep(2)
-        
-        # Step 6: Upload (95-100%)
-        await manager.send_progress(client_id, 95, "uploading", "Uploading to cloud...")
-        project.status = ProjectStatus.UPLOADING
-        project.progress = 98
-        db.commit()
-        await asyncio.sleep(2)
-        
-        # Create video record
-        video = Video(
-            project_id=project_id,
-            title=project.title,
-            file_url=f"https://storage.example.com/videos/{project_id}.mp4",
-            thumbnail_url=f"https://storage.example.com/thumbnails/{project_id}.jpg",
-            duration=300,
-            file_size=50.5,
-            quality="1080p",
-            status="completed"
-        )
-        db.add(video)
-        
-        project.status = ProjectStatus.COMPLETED
-        project.progress = 100
-        db.commit()
-        
-        await manager.send_progress(client_id, 100, "completed", "Video generation completed!")
-        
-    except Exception as e:
-        logger.error(f"Video generation error: {e}")
-        project.status = ProjectStatus.FAILED
-        project.progress = 0
-        db.commit()
-        await manager.send_progress(client_id, 0, "failed", f"Generation failed: {str(e)}")
+    if project.status != ProjectStatus.FAILED:
+        raise HTTPException(status_code=409, detail="Only failed generations can be resumed")
     
-    finally:
-        db.close()
+    project.status = ProjectStatus.ANALYZING
+    db.commit()
+    
+    task = orchestrate_video_generation.delay(project_id, resume=True)
+    
+    return {
+        "message": "Video generation resumed",
+        "task_id": task.id,
+        "project_id": project_id,
+        "websocket_url": f"/ws/{project_id}"
+    }
+
+@router.post("/videos/{video_id}/promote")
+async def promote_draft(
+    video_id: int,
+    db: Session = Depends(get_db)
+):
+    """Render a draft at final quality, reusing its script, assets and narration"""
+    from app.agents.orchestrator import promote_draft_video
+    
+    video = db.query(Video).filter(Video.id == video_id).first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    if video.render_mode != "draft":
+        raise HTTPException(status_code=409, detail="Only draft videos can be promoted")
+    
+    task = promote_draft_video.delay(video_id)
+    
+    return {
+        "message": "Final render started",
+        "task_id": task.id,
+        "project_id": video.project_id,
+        "websocket_url": f"/ws/{video.project_id}"
+    }
+
+@router.post("/videos/{video_id}/edit")
+async def edit_video_scenes(
+    video_id: int,
+    request: VideoEditRequest,
+    db: Session = Depends(get_db)
+):
+    """Apply edits to some scenes and re-render only those, reusing everything else"""
+    from app.agents.orchestrator import rerender_edited_video
+    
+    video = db.query(Video).filter(Video.id == video_id).first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    known = {scene["scene_number"] for scene in video.scenes or []}
+    unknown = sorted({edit.scene_number for edit in request.scenes} - known)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown scene numbers: {unknown}")
+    
+    task = rerender_edited_video.delay(
+        video_id,
+        [edit.model_dump(exclude_none=True) for edit in request.scenes]
+    )
+    
+    return {
+        "message": "Scene re-render started",
+        "task_id": task.id,
+        "project_id": video.project_id,
+        "websocket_url": f"/ws/{video.project_id}"
+    }
 
 @router.get("/projects/{project_id}/videos")
 async def get_project_videos(project_id: int, db: Session = Depends(get_db)):
@@ -135,21 +130,121 @@ async def get_project_videos(project_id: int, db: Session = Depends(get_db)):
     videos = db.query(Video).filter(Video.project_id == project_id).all()
     return videos
 
+def increment_video_counter(video_id: int, column: str):
+    """Atomically bump a video counter outside the request path"""
+    from app.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        counter = getattr(Video, column)
+        db.query(Video).filter(Video.id == video_id).update(
+            {counter: counter + 1},
+            synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        logger.error(f"Counter update error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
 @router.get("/videos/{video_id}/download")
-async def download_video(video_id: int, db: Session = Depends(get_db)):
+async def download_video(
+    video_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """Get video download URL"""
     video = db.query(Video).filter(Video.id == video_id).first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    video.downloads += 1
-    db.commit()
+    background_tasks.add_task(increment_video_counter, video_id, "downloads")
     
     return {
         "download_url": video.file_url,
+        "hls_url": video.hls_url,
         "filename": f"{video.title}.mp4",
         "size": video.file_size
     }
+
+@router.api_route("/videos/{video_id}/stream", methods=["GET", "HEAD"])
+async def stream_video(
+    video_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Stream video bytes with Range/ETag support for in-browser seeking"""
+    video = db.query(Video).filter(Video.id == video_id).first()
+    if not video or not video.file_url:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    storage = get_storage_service()
+    blob_name = storage.blob_name_from_url(video.file_url)
+    
+    if hasattr(storage, "local_path"):
+        path = storage.local_path(blob_name)
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail="Video file not found")
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        content_type = mimetypes.guess_type(path)[0] or "video/mp4"
+    else:
+        try:
+            properties = await storage.get_properties(blob_name)
+        except Exception as e:
+            logger.error(f"Blob properties error: {e}")
+            raise HTTPException(status_code=404, detail="Video file not found")
+        size = properties["size"]
+        etag = properties["etag"]
+        content_type = properties["content_type"] or "video/mp4"
+    
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": "private, max-age=3600"
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+    
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    # Count a view once per playback, not once per seek
+    if start == 0 and request.method == "GET":
+        background_tasks.add_task(increment_video_counter, video_id, "views")
+    
+    if hasattr(storage, "local_path"):
+        response = FileRangeResponse(path, start, end, status_code, headers, content_type)
+    elif request.method == "HEAD" or size == 0:
+        response = Response(status_code=status_code, headers=headers, media_type=content_type)
+    else:
+        response = StreamingResponse(
+            storage.stream_range(blob_name, start, end - start + 1),
+            status_code=status_code,
+            headers=headers,
+            media_type=content_type
+        )
+    
+    return response
 #================================================================================
 
 
@@ -19,6 +19,8 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./edu_video.db")
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    PROGRESS_CHANNEL_PREFIX: str = os.getenv("PROGRESS_CHANNEL_PREFIX", "progress")
+    WS_SEND_TIMEOUT: float = float(os.getenv("WS_SEND_TIMEOUT", "5"))
     
     # Azure OpenAI
     AZURE_OPENAI_ENDPOINT: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
@@ -29,10 +31,21 @@ class Settings(BaseSettings):
     # Azure Speech
     AZURE_SPEECH_KEY: str = os.getenv("AZURE_SPEECH_KEY", "")
     AZURE_SPEECH_REGION: str = os.getenv("AZURE_SPEECH_REGION", "eastus")
+    TTS_MAX_CONCURRENCY: int = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+    TTS_CACHE_ENABLED: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "cache/tts")
+    TTS_CACHE_MAX_BYTES: int = int(os.getenv("TTS_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))  # 1GB
     
     # Azure Storage
     AZURE_STORAGE_CONNECTION_STRING: str = os.getenv("AZURE_STORAGE_CONNECTION_STRING", "")
     AZURE_STORAGE_CONTAINER_NAME: str = os.getenv("AZURE_STORAGE_CONTAINER_NAME", "videos")
+    AZURE_UPLOAD_BLOCK_SIZE: int = int(os.getenv("AZURE_UPLOAD_BLOCK_SIZE", str(8 * 1024 * 1024)))  # 8MB
+    AZURE_UPLOAD_CONCURRENCY: int = int(os.getenv("AZURE_UPLOAD_CONCURRENCY", "8"))
+    
+    # Storage Backend ("azure", or "local" for a filesystem-backed stand-in)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "azure")
+    LOCAL_STORAGE_DIR: str = os.getenv("LOCAL_STORAGE_DIR", "storage")
+    LOCAL_STORAGE_BASE_URL: str = os.getenv("LOCAL_STORAGE_BASE_URL", "http://localhost:8000/storage")
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
@@ -42,6 +55,7 @@ class Settings(BaseSettings):
     # Celery
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    CELERY_WORKER_CONCURRENCY: int = int(os.getenv("CELERY_WORKER_CONCURRENCY", "2"))
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -53,12 +67,62 @@ class Settings(BaseSettings):
     # File Upload
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
     ALLOWED_EXTENSIONS: List[str] = [".pdf", ".docx", ".txt", ".md"]
+    PARSER_WORKERS: int = int(os.getenv("PARSER_WORKERS", "0"))  # 0 = one per CPU core
+    PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "20"))
     
     # Video Settings
     DEFAULT_VIDEO_QUALITY: str = "1080p"
     MAX_VIDEO_DURATION: int = 1800  # 30 minutes
+    VIDEO_PARALLEL_RENDER: bool = os.getenv("VIDEO_PARALLEL_RENDER", "true").lower() == "true"
+    RENDER_WORKERS: int = int(os.getenv("RENDER_WORKERS", "0"))  # 0 = one per CPU core
+    SEGMENT_CACHE_DIR: str = os.getenv("SEGMENT_CACHE_DIR", "cache/segments")
+    SEGMENT_CACHE_MAX_BYTES: int = int(os.getenv("SEGMENT_CACHE_MAX_BYTES", str(5 * 1024 * 1024 * 1024)))  # 5GB
+    RENDER_BACKEND: str = os.getenv("RENDER_BACKEND", "moviepy")  # moviepy or ffmpeg
+    TRANSITION_SECONDS: float = float(os.getenv("TRANSITION_SECONDS", "0.5"))
+    FFMPEG_GOP_SECONDS: int = int(os.getenv("FFMPEG_GOP_SECONDS", "10"))
+    HLS_ENABLED: bool = os.getenv("HLS_ENABLED", "true").lower() == "true"
+    HLS_RENDITIONS: str = os.getenv("HLS_RENDITIONS", "1440p,1080p,720p,480p")  # comma-separated rung names
+    HLS_SEGMENT_SECONDS: float = float(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+    HLS_PRESET: str = os.getenv("HLS_PRESET", "veryfast")
+    HLS_UPLOAD_CONCURRENCY: int = int(os.getenv("HLS_UPLOAD_CONCURRENCY", "8"))
+    LIVE_HLS_ENABLED: bool = os.getenv("LIVE_HLS_ENABLED", "true").lower() == "true"
+    LIVE_HLS_CHUNK_SECONDS: float = float(os.getenv("LIVE_HLS_CHUNK_SECONDS", "6"))
+    LIVE_HLS_TARGET_DURATION: int = int(os.getenv("LIVE_HLS_TARGET_DURATION", "12"))
+    PROGRESSIVE_UPLOAD: bool = os.getenv("PROGRESSIVE_UPLOAD", "true").lower() == "true"
+    DIAGRAM_WORKERS: int = int(os.getenv("DIAGRAM_WORKERS", "0"))  # 0 = one per CPU core
+    DIAGRAM_CACHE_DIR: str = os.getenv("DIAGRAM_CACHE_DIR", "cache/diagrams")
+    DIAGRAM_CACHE_MAX_BYTES: int = int(os.getenv("DIAGRAM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # 512MB
+    DIAGRAM_FONT: str = os.getenv("DIAGRAM_FONT", "DejaVuSans.ttf")
+    DIAGRAM_FONT_BOLD: str = os.getenv("DIAGRAM_FONT_BOLD", "DejaVuSans-Bold.ttf")
+    TEXT_OVERLAY_FONT: str = os.getenv("TEXT_OVERLAY_FONT", "DejaVuSans.ttf")
+    TEXT_OVERLAY_MAX_LINES: int = int(os.getenv("TEXT_OVERLAY_MAX_LINES", "6"))
     SUPPORTED_LANGUAGES: List[str] = ["en-IN", "en-US", "hi-IN", "ta-IN", "te-IN", "mr-IN"]
     
+    # LLM Response Cache
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.db")
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256MB
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 7 days
+    SCRIPT_STREAMING: bool = os.getenv("SCRIPT_STREAMING", "true").lower() == "true"
+    
+    # Chunked Content Analysis
+    ANALYSIS_CHUNK_CHARS: int = int(os.getenv("ANALYSIS_CHUNK_CHARS", "12000"))
+    ANALYSIS_MAX_CONCURRENCY: int = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", "4"))
+    ANALYSIS_MAX_ITEMS: int = int(os.getenv("ANALYSIS_MAX_ITEMS", "20"))
+    
+    # Tracing
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")  # e.g. http://localhost:4318
+    OTEL_SERVICE_NAME: str = os.getenv("OTEL_SERVICE_NAME", "edu-video-generator")
+    
+    # Metrics (a directory shared by every API and worker process enables multiprocess aggregation)
+    PROMETHEUS_MULTIPROC_DIR: str = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+    
+    # Pipeline Checkpoints ("sqlite", "postgres", or "none" to disable resume)
+    CHECKPOINT_BACKEND: str = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+    CHECKPOINT_SQLITE_PATH: str = os.getenv("CHECKPOINT_SQLITE_PATH", "cache/checkpoints.db")
+    CHECKPOINT_POSTGRES_URL: str = os.getenv("CHECKPOINT_POSTGRES_URL", "")
+    
     class Config:
         env_file = ".env"
 
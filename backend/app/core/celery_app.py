@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_shutdown
 from app.config import settings
 
 celery_app = Celery(
@@ -20,4 +21,16 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
+    # Tasks fan rendering out to their own process pools, which daemonic
+    # prefork children are not allowed to create
+    worker_pool="threads",
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
 )
+
+@worker_shutdown.connect
+def _release_metrics(**kwargs):
+    """Drop this worker's live gauges from the shared metrics directory"""
+    from app.core.metrics import mark_process_dead
+    mark_process_dead()
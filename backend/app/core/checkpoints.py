@@ -0,0 +1,43 @@
+"""LangGraph Checkpoint Storage"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from app.config import settings
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+def thread_id_for(project_id: int) -> str:
+    """Checkpoint thread holding a project's pipeline state"""
+    return f"project-{project_id}"
+
+def _postgres_url() -> str:
+    """Checkpoint database URL, defaulting to the app database when it is Postgres"""
+    url = settings.CHECKPOINT_POSTGRES_URL or settings.DATABASE_URL
+    # psycopg takes a plain libpq URL, not a SQLAlchemy driver URL
+    scheme, _, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}://{rest}"
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncIterator[Optional[object]]:
+    """Open the configured checkpoint saver, or yield None when disabled"""
+    backend = settings.CHECKPOINT_BACKEND.lower()
+    
+    if backend == "sqlite":
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        
+        os.makedirs(os.path.dirname(settings.CHECKPOINT_SQLITE_PATH) or ".", exist_ok=True)
+        async with AsyncSqliteSaver.from_conn_string(settings.CHECKPOINT_SQLITE_PATH) as saver:
+            yield saver
+    
+    elif backend == "postgres":
+        from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        
+        async with AsyncPostgresSaver.from_conn_string(_postgres_url()) as saver:
+            await saver.setup()
+            yield saver
+    
+    else:
+        if backend != "none":
+            logger.warning(f"Unknown checkpoint backend '{backend}', checkpoints disabled")
+        yield None
@@ -11,3 +11,7 @@ class ContentParsingError(Exception):
 class AzureServiceError(Exception):
     """Raised when Azure service fails"""
     pass
+
+class FileTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+    pass
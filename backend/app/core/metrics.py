@@ -0,0 +1,129 @@
+"""Prometheus Metrics"""
+from app.config import settings
+import os
+import logging
+
+# Multiprocess mode must be configured before prometheus_client is imported
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+from app.core.tracing import Span, on_span_end
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800)
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_seconds",
+    "Wall time of pipeline stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+JOB_SECONDS = Histogram(
+    "pipeline_job_seconds",
+    "Wall time of whole generation jobs",
+    ["status"],
+    buckets=LATENCY_BUCKETS
+)
+JOBS_TOTAL = Counter("pipeline_jobs_total", "Generation jobs finished", ["status"])
+JOBS_IN_FLIGHT = Gauge(
+    "pipeline_jobs_in_flight",
+    "Generation jobs currently running",
+    multiprocess_mode="livesum"
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups", ["cache", "result"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens consumed", ["kind"])
+RENDER_FRAMES = Counter("render_frames_total", "Video frames encoded")
+UPLOADED_BYTES = Counter("storage_uploaded_bytes_total", "Bytes uploaded to storage", ["backend"])
+
+# Span name -> stage label
+SPAN_STAGES = {
+    "node.analyze_content": "analyze",
+    "script.generate": "script",
+    "scene.plan": "plan",
+    "scene.asset": "assets",
+    "tts.synthesize": "tts",
+    "render.segment": "render",
+    "render.timeline": "render",
+    "storage.upload": "upload",
+    "ffmpeg.concat": "stitch",
+    "hls.package": "package",
+    "live.publish": "live",
+}
+
+# Span name -> cache label, for spans carrying a cache_hit attribute
+SPAN_CACHES = {
+    "llm.invoke": "llm",
+    "llm.stream": "llm",
+    "tts.synthesize": "tts",
+    "render.segment_cache": "segment",
+    "diagram.render": "diagram",
+}
+
+def observe_span(finished: Span):
+    """Derive metrics from a finished span"""
+    attributes = finished.attributes
+    
+    stage = SPAN_STAGES.get(finished.name)
+    if stage:
+        STAGE_SECONDS.labels(stage).observe(finished.duration_ms / 1000)
+    
+    cache = SPAN_CACHES.get(finished.name)
+    if cache and "cache_hit" in attributes:
+        CACHE_REQUESTS.labels(cache, "hit" if attributes["cache_hit"] else "miss").inc()
+    
+    for kind in ("input", "output"):
+        tokens = attributes.get(f"{kind}_tokens")
+        if tokens:
+            LLM_TOKENS.labels(kind).inc(tokens)
+    
+    if finished.name in ("render.segment", "render.timeline") and finished.status == "ok":
+        if "duration" in attributes and "fps" in attributes:
+            RENDER_FRAMES.inc(attributes["duration"] * attributes["fps"])
+    
+    if finished.name == "storage.upload" and finished.status == "ok" and attributes.get("bytes"):
+        UPLOADED_BYTES.labels(attributes.get("backend", "unknown")).inc(attributes["bytes"])
+
+on_span_end(observe_span)
+
+class QueueDepthCollector:
+    """Celery broker queue lengths, read at scrape time"""
+    
+    def __init__(self, queues):
+        self.queues = list(queues)
+    
+    def collect(self):
+        gauge = GaugeMetricFamily("celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"])
+        try:
+            import redis
+            client = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=2)
+            for queue in self.queues:
+                gauge.add_metric([queue], client.llen(queue))
+        except Exception as e:
+            logger.warning(f"Queue depth unavailable: {e}")
+        yield gauge
+
+def render_metrics() -> bytes:
+    """Exposition of every process's metrics, aggregated through the multiprocess directory"""
+    from app.core.celery_app import celery_app
+    
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    
+    queues = CollectorRegistry()
+    queues.register(QueueDepthCollector([celery_app.conf.task_default_queue or "celery"]))
+    return generate_latest(registry) + generate_latest(queues)
+
+def mark_process_dead(pid: int = None):
+    """Drop a departed process's live gauges from the multiprocess aggregate"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,71 @@
+"""ASGI Middleware"""
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Iterable
+
+class _BodyTooLarge(Exception):
+    pass
+
+class UploadSizeLimitMiddleware:
+    """Reject request bodies over max_bytes on the given paths while they stream in.
+    
+    A declared Content-Length over the limit is refused before any of the
+    body is read; otherwise the body is counted chunk by chunk, so an
+    oversized upload is cut off instead of being spooled to completion.
+    """
+    
+    def __init__(self, app: ASGIApp, max_bytes: int, path_suffixes: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffixes = tuple(path_suffixes)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].endswith(self.path_suffixes):
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+        
+        received = 0
+        exceeded = False
+        response_started = False
+        
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+        
+        async def guarded_send(message: Message):
+            nonlocal response_started
+            # The framework turns the aborted body into its own error; send 413 instead
+            if exceeded and not response_started:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+        
+        if exceeded and not response_started:
+            await self._reject(scope, receive, send)
+    
+    async def _reject(self, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse(
+            {"detail": f"File exceeds the {self.max_bytes // (1024 * 1024)}MB upload limit"},
+            status_code=413,
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
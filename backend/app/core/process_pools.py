@@ -0,0 +1,43 @@
+"""Shared Process Pools"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict
+import multiprocessing
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[str, ProcessPoolExecutor] = {}
+_lock = threading.Lock()
+
+def get_process_pool(
+    name: str,
+    max_workers: int = None,
+    initializer: Callable = None
+) -> ProcessPoolExecutor:
+    """Return the named pool, creating it on first use.
+    
+    Pools use the spawn start method so workers never inherit the event
+    loop, thread pools or open client sockets of the parent process.
+    """
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            workers = max_workers or os.cpu_count() or 1
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initializer
+            )
+            _pools[name] = pool
+            logger.info(f"Process pool '{name}' started with {workers} workers")
+        return pool
+
+def shutdown_process_pools(wait: bool = False):
+    """Stop every pool (called on application shutdown)"""
+    with _lock:
+        for name, pool in list(_pools.items()):
+            pool.shutdown(wait=wait, cancel_futures=True)
+            logger.info(f"Process pool '{name}' stopped")
+        _pools.clear()
@@ -0,0 +1,237 @@
+"""Per-Job Tracing"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+from app.config import settings
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Span:
+    """One timed operation within a trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+    
+    def set(self, **attributes):
+        """Attach attributes discovered while the span runs"""
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+    
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+@dataclass
+class Trace:
+    """Spans collected for one pipeline run"""
+    trace_id: str
+    project_id: Optional[int]
+    spans: List[Span] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    
+    def add(self, span: Span):
+        # Spans finish on the event loop and on worker threads alike
+        with self.lock:
+            self.spans.append(span)
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_listeners: List[Callable[[Span], None]] = []
+
+def _new_id(num_bytes: int) -> str:
+    return os.urandom(num_bytes).hex()
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+def current_span() -> Span:
+    """The innermost open span, or a detached one outside any span"""
+    return _current_span.get() or Span("", "", "", None, 0)
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span.
+    
+    Outside a trace the span is still timed and handed to span listeners
+    (metrics), but not recorded.
+    """
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=trace.trace_id if trace else "",
+        span_id=_new_id(8),
+        parent_span_id=parent.span_id if parent else None,
+        start_ns=time.time_ns()
+    )
+    current.set(**attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = str(e) or type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        _finish(trace, current)
+
+def on_span_end(listener: Callable[[Span], None]):
+    """Register a callback run for every finished span, traced or not"""
+    _listeners.append(listener)
+
+def remove_span_listener(listener: Callable[[Span], None]):
+    """Unregister a callback added with on_span_end"""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def _finish(trace: Optional[Trace], finished: Span):
+    if trace is not None:
+        trace.add(finished)
+    for listener in _listeners:
+        try:
+            listener(finished)
+        except Exception as e:
+            logger.warning(f"Span listener error: {e}")
+
+def add_span(name: str, start_ns: int, **attributes):
+    """Record an already finished operation as a child of the current span"""
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    finished = Span(
+        name=name,
+        trace_id=trace.trace_id if trace else "",
+        span_id=_new_id(8),
+        parent_span_id=parent.span_id if parent else None,
+        start_ns=start_ns,
+        end_ns=time.time_ns()
+    )
+    finished.set(**attributes)
+    _finish(trace, finished)
+
+def traced(name: str):
+    """Decorator wrapping an async function in a span"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def start_trace(project_id: int = None, name: str = "video_generation", **attributes):
+    """Collect every span opened inside the block into one trace, then persist and export it"""
+    if not settings.TRACING_ENABLED:
+        with span(name) as root:
+            yield root
+        return
+    
+    trace = Trace(trace_id=_new_id(16), project_id=project_id)
+    token = _current_trace.set(trace)
+    try:
+        with span(name, project_id=project_id, **attributes) as root:
+            yield root
+    finally:
+        _current_trace.reset(token)
+        _save_trace(trace)
+        if settings.OTEL_EXPORTER_OTLP_ENDPOINT:
+            export_otlp(trace)
+
+def _save_trace(trace: Trace):
+    """Persist a trace's spans so its timeline can be served per project"""
+    if not trace.spans:
+        return
+    
+    from app.database import SessionLocal
+    from app.models.project import TraceSpan
+    
+    db = SessionLocal()
+    try:
+        db.add_all([
+            TraceSpan(
+                project_id=trace.project_id,
+                trace_id=s.trace_id,
+                span_id=s.span_id,
+                parent_span_id=s.parent_span_id,
+                name=s.name,
+                start_ns=s.start_ns,
+                end_ns=s.end_ns,
+                duration_ms=s.duration_ms,
+                status=s.status,
+                error=s.error,
+                attributes=s.attributes
+            )
+            for s in trace.spans
+        ])
+        db.commit()
+    except Exception as e:
+        logger.error(f"Trace save error: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(trace: Trace) -> dict:
+    """Render a trace as an OTLP/JSON ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": [
+                    {"key": "service.name", "value": {"stringValue": settings.OTEL_SERVICE_NAME}}
+                ]
+            },
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        **({"parentSpanId": s.parent_span_id} if s.parent_span_id else {}),
+                        "name": s.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in s.attributes.items()
+                        ],
+                        "status": {"code": 2, "message": s.error} if s.status == "error" else {"code": 1}
+                    }
+                    for s in trace.spans
+                ]
+            }]
+        }]
+    }
+
+def export_otlp(trace: Trace):
+    """Send a trace to an OTLP/HTTP collector"""
+    import httpx
+    
+    endpoint = settings.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip("/") + "/v1/traces"
+    try:
+        response = httpx.post(endpoint, json=to_otlp(trace), timeout=10)
+        response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"OTLP export error: {e}")
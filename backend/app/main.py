@@ -1,15 +1,20 @@
 # ============================================
 # backend/app/main.py - PRODUCTION READY
 # ============================================
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import logging
 from app.config import settings
 from app.database import engine, Base
 from app.api.v1 import routes
 from app.services.websocket_manager import ConnectionManager, manager
+from app.core.process_pools import shutdown_process_pools
+from app.services.storage import get_storage_service
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.core.metrics import render_metrics, mark_process_dead
 
 # Configure logging
 logging.basicConfig(
@@ -59,10 +64,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Database warning: {e}")
     
+    # Build the storage client now, off the loop, rather than inside the first request
+    await asyncio.to_thread(get_storage_service)
+    
+    # Progress may be published by any process; relay it to this one's sockets
+    await manager.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    await manager.stop()
+    shutdown_process_pools()
+    mark_process_dead()
 
 # Initialize FastAPI
 app = FastAPI(
@@ -81,9 +95,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cut off oversized uploads while they stream, before they are spooled to disk
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.MAX_FILE_SIZE + 64 * 1024,  # multipart framing overhead
+    path_suffixes=["/upload-file"]
+)
+
 # Include routers
 app.include_router(routes.router, prefix=f"/api/{settings.API_VERSION}")
 
+# Serve blobs from the filesystem-backed storage stand-in
+if settings.STORAGE_BACKEND == "local":
+    import os
+    from fastapi.staticfiles import StaticFiles
+    os.makedirs(settings.LOCAL_STORAGE_DIR, exist_ok=True)
+    app.mount("/storage", StaticFiles(directory=settings.LOCAL_STORAGE_DIR), name="storage")
+
 # WebSocket endpoint
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
@@ -91,9 +119,9 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     try:
         while True:
             data = await websocket.receive_text()
-            await manager.send_progress(client_id, 0, "connected", "WebSocket connected")
+            await manager.send_local(websocket, client_id, 0, "connected", "WebSocket connected")
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
+        manager.disconnect(client_id, websocket)
 
 # Health check
 @app.get("/")
@@ -117,6 +145,12 @@ async def health():
         }
     }
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus exposition, aggregated across API and worker processes"""
+    from prometheus_client import CONTENT_TYPE_LATEST
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
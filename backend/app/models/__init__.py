@@ -1,4 +1,4 @@
 """Database Models"""
 #from app.models.project import Project, Video, Asset, User, ProjectStatus
-from app.models.project import Project, Video, Asset, User, ProjectStatus, Analytics
-__all__ = ["Project", "Video", "Asset", "User", "ProjectStatus"]
+from app.models.project import Project, Video, Asset, StoredObject, TraceSpan, User, ProjectStatus, Analytics
+__all__ = ["Project", "Video", "Asset", "StoredObject", "TraceSpan", "User", "ProjectStatus"]
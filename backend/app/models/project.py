@@ -1,7 +1,7 @@
 # ============================================
 # backend/app/models/project.py - ENHANCED
 # ============================================
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, JSON, Enum, Float
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -50,6 +50,7 @@ class Project(Base):
     user = relationship("User", back_populates="projects")
     videos = relationship("Video", back_populates="project", cascade="all, delete-orphan")
     assets = relationship("Asset", back_populates="project", cascade="all, delete-orphan")
+    trace_spans = relationship("TraceSpan", cascade="all, delete-orphan", passive_deletes=True)
 
 class Video(Base):
     __tablename__ = "videos"
@@ -59,9 +60,11 @@ class Video(Base):
     title = Column(String(255), nullable=False)
     duration = Column(Integer)  # seconds
     file_url = Column(String(500))
+    hls_url = Column(String(500))  # master playlist of the ABR ladder
     thumbnail_url = Column(String(500))
     file_size = Column(Float)  # in MB
     quality = Column(String(20), default="1080p")
+    render_mode = Column(String(20), default="final")  # final or draft
     script = Column(Text)
     scenes = Column(JSON, default=[])
     status = Column(String(50), default="pending")
@@ -71,18 +74,51 @@ class Video(Base):
     
     project = relationship("Project", back_populates="videos")
 
+class StoredObject(Base):
+    __tablename__ = "stored_objects"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    blob_name = Column(String(500), nullable=False)
+    file_url = Column(String(500), nullable=False)
+    size = Column(Integer)  # bytes
+    content_type = Column(String(100))
+    ref_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    assets = relationship("Asset", back_populates="stored_object")
+
 class Asset(Base):
     __tablename__ = "assets"
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
-    asset_type = Column(String(50))  # image, audio, diagram, subtitle
+    object_id = Column(Integer, ForeignKey("stored_objects.id"), index=True)
+    asset_type = Column(String(50))  # image, audio, diagram, subtitle, video
     file_url = Column(String(500))
     file_size = Column(Float)  # in MB
     file_metadata = Column(JSON, default={})
     created_at = Column(DateTime, default=datetime.utcnow)
     
     project = relationship("Project", back_populates="assets")
+    stored_object = relationship("StoredObject", back_populates="assets")
+
+class TraceSpan(Base):
+    __tablename__ = "trace_spans"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True)
+    trace_id = Column(String(32), index=True, nullable=False)
+    span_id = Column(String(16), nullable=False)
+    parent_span_id = Column(String(16))
+    name = Column(String(100), nullable=False)
+    start_ns = Column(BigInteger, nullable=False)  # unix epoch nanoseconds
+    end_ns = Column(BigInteger, nullable=False)
+    duration_ms = Column(Float)
+    status = Column(String(20), default="ok")
+    error = Column(Text)
+    attributes = Column(JSON, default={})
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 class Analytics(Base):
     __tablename__ = "analytics"
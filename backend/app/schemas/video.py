@@ -16,6 +16,7 @@ class VoiceConfig(BaseModel):
     gender: str = Field("female", description="male or female")
     language: str = Field("en-IN", description="en-IN, hi-IN, ta-IN, etc.")
     accent: str = Field("indian", description="indian, american, british")
+    voice_name: Optional[str] = Field(None, description="Azure neural voice, e.g. en-IN-NeerjaNeural")
     speed: float = Field(1.0, description="0.5 to 2.0")
     pitch: float = Field(1.0, description="0.5 to 2.0")
 
@@ -40,6 +41,9 @@ class VideoConfig(BaseModel):
     pacing: str = Field("medium", description="slow, medium, fast")
     include_diagrams: bool = Field(True)
     include_examples: bool = Field(True)
+    use_llm_cache: bool = Field(True, description="Reuse cached LLM responses for identical prompts")
+    render_backend: Optional[str] = Field(None, description="moviepy or ffmpeg; defaults to RENDER_BACKEND")
+    render_mode: str = Field("final", description="final, or draft for a quick low-resolution preview")
 
 class ContentUpload(BaseModel):
     """Content upload schema"""
@@ -75,15 +79,29 @@ class VideoResponse(BaseModel):
     project_id: int
     title: str
     file_url: Optional[str]
+    hls_url: Optional[str] = None
     thumbnail_url: Optional[str]
     duration: Optional[int]
     status: str
     quality: str
+    render_mode: Optional[str] = "final"
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class SceneEdit(BaseModel):
+    """Editor changes to one scene; omitted fields keep their current value"""
+    scene_number: int
+    narration: Optional[str] = Field(None, min_length=1)
+    key_points: Optional[List[str]] = None
+    visual_description: Optional[str] = None
+    duration: Optional[int] = Field(None, gt=0)
+
+class VideoEditRequest(BaseModel):
+    """Scenes to change and re-render"""
+    scenes: List[SceneEdit] = Field(..., min_length=1)
+
 class VideoProgress(BaseModel):
     """Real-time progress update"""
     progress: int = Field(..., ge=0, le=100)
@@ -0,0 +1,196 @@
+"""Content-Addressed Asset Store"""
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal
+from app.models.project import Asset, StoredObject
+from app.services.storage import get_storage_service
+from app.utils.helpers import file_hash
+from app.core.tracing import traced, current_span
+import asyncio
+import mimetypes
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AssetStore:
+    """Deduplicating store for generated images, diagrams and videos.
+    
+    Files are addressed by the SHA-256 of their contents. The first copy is
+    uploaded under objects/<hash>; later copies only bump the object's
+    reference count and add an Asset row pointing at it.
+    """
+    
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage_service()
+    
+    @staticmethod
+    def blob_name_for(sha256: str, file_path: str) -> str:
+        extension = os.path.splitext(file_path)[1].lower()
+        return f"objects/{sha256[:2]}/{sha256}{extension}"
+    
+    @traced("asset_store.put")
+    async def put(
+        self,
+        file_path: str,
+        asset_type: str,
+        project_id: int = None,
+        metadata: dict = None
+    ) -> dict:
+        """Store a file once and reference it from the project's assets"""
+        sha256 = await asyncio.to_thread(file_hash, file_path)
+        
+        async def upload() -> tuple:
+            blob_name = self.blob_name_for(sha256, file_path)
+            return blob_name, await self.storage.upload_file(file_path, blob_name)
+        
+        return await self._record(
+            sha256, os.path.getsize(file_path), mimetypes.guess_type(file_path)[0],
+            upload, asset_type, project_id, metadata
+        )
+    
+    @traced("asset_store.put_uploaded")
+    async def put_uploaded(
+        self,
+        sha256: str,
+        size: int,
+        blob_name: str,
+        file_url: str,
+        asset_type: str,
+        project_id: int = None,
+        metadata: dict = None
+    ) -> dict:
+        """Reference a blob that was uploaded while it was still being produced.
+        
+        Its hash was unknown when the upload started, so it lives under its
+        own name rather than objects/<hash>. If identical content is already
+        stored, that object is referenced and the new blob deleted.
+        """
+        async def upload() -> tuple:
+            return blob_name, file_url
+        
+        record = await self._record(
+            sha256, size, mimetypes.guess_type(blob_name)[0],
+            upload, asset_type, project_id, metadata
+        )
+        if record["file_url"] != file_url:
+            await self.storage.delete_blob(blob_name)
+        return record
+    
+    async def _record(
+        self,
+        sha256: str,
+        size: int,
+        content_type: str,
+        upload,
+        asset_type: str,
+        project_id: int = None,
+        metadata: dict = None
+    ) -> dict:
+        """Find or create the object for sha256 (calling upload() only when new) and reference it"""
+        db = SessionLocal()
+        try:
+            stored = db.query(StoredObject).filter(StoredObject.sha256 == sha256).first()
+            deduplicated = stored is not None
+            
+            if stored is None:
+                blob_name, file_url = await upload()
+                stored = StoredObject(
+                    sha256=sha256,
+                    blob_name=blob_name,
+                    file_url=file_url,
+                    size=size,
+                    content_type=content_type,
+                    ref_count=0
+                )
+                db.add(stored)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another worker stored the same content concurrently
+                    db.rollback()
+                    stored = db.query(StoredObject).filter(StoredObject.sha256 == sha256).one()
+            else:
+                logger.info(f"Asset deduplicated: {sha256[:12]} ({asset_type})")
+            
+            db.query(StoredObject).filter(StoredObject.id == stored.id).update(
+                {StoredObject.ref_count: StoredObject.ref_count + 1},
+                synchronize_session=False
+            )
+            
+            asset_id = None
+            if project_id is not None:
+                asset = Asset(
+                    project_id=project_id,
+                    object_id=stored.id,
+                    asset_type=asset_type,
+                    file_url=stored.file_url,
+                    file_size=size / (1024 * 1024),
+                    file_metadata=metadata or {}
+                )
+                db.add(asset)
+                db.flush()
+                asset_id = asset.id
+            
+            db.commit()
+            current_span().set(asset_type=asset_type, bytes=size, deduplicated=deduplicated)
+            
+            return {
+                "object_id": stored.id,
+                "asset_id": asset_id,
+                "sha256": sha256,
+                "file_url": stored.file_url,
+                "deduplicated": deduplicated
+            }
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Asset store error: {e}")
+            raise
+        finally:
+            db.close()
+    
+    async def fetch(self, asset: dict) -> dict:
+        """Make sure an asset's file is on local disk, downloading it from storage if needed"""
+        path = asset.get("path")
+        if path and not os.path.exists(path) and asset.get("file_url"):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            await self.storage.download_file(self.storage.blob_name_from_url(asset["file_url"]), path)
+        return asset
+    
+    async def release_project(self, project_id: int) -> int:
+        """Drop a project's references; delete objects nobody references anymore"""
+        db = SessionLocal()
+        try:
+            object_ids = [
+                object_id for (object_id,) in db.query(Asset.object_id).filter(
+                    Asset.project_id == project_id,
+                    Asset.object_id.isnot(None)
+                )
+            ]
+            
+            for object_id in object_ids:
+                db.query(StoredObject).filter(StoredObject.id == object_id).update(
+                    {StoredObject.ref_count: StoredObject.ref_count - 1},
+                    synchronize_session=False
+                )
+            db.query(Asset).filter(Asset.project_id == project_id).update(
+                {Asset.object_id: None},
+                synchronize_session=False
+            )
+            db.commit()
+            
+            orphans = db.query(StoredObject).filter(
+                StoredObject.id.in_(set(object_ids)),
+                StoredObject.ref_count <= 0
+            ).all()
+            for stored in orphans:
+                if await self.storage.delete_blob(stored.blob_name):
+                    db.delete(stored)
+            db.commit()
+            
+            return len(orphans)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Asset release error: {e}")
+            raise
+        finally:
+            db.close()
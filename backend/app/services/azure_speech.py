@@ -1,53 +1,137 @@
 """Azure Text-to-Speech Service"""
 import azure.cognitiveservices.speech as speechsdk
 from app.config import settings
+from app.utils.file_cache import FileCache
+from app.utils.helpers import stable_hash
+from app.core.tracing import span
+from xml.sax.saxutils import escape
+import asyncio
 import os
+import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+_tts_cache = None
+
+def get_tts_cache() -> FileCache:
+    """Process-wide synthesized audio cache"""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = FileCache(settings.TTS_CACHE_DIR, settings.TTS_CACHE_MAX_BYTES, ".wav")
+    return _tts_cache
+
 class AzureSpeechService:
+    OUTPUT_FORMAT = "riff-24khz-16bit-mono-pcm"
+    
     def __init__(self):
-        self.speech_config = speechsdk.SpeechConfig(
+        self.default_voice = "en-US-JennyNeural"
+        self.cache = get_tts_cache() if settings.TTS_CACHE_ENABLED else None
+    
+    def _create_synthesizer(self, output_path: str, voice_name: str = None):
+        """Create a synthesizer with its own config so concurrent calls don't share state"""
+        speech_config = speechsdk.SpeechConfig(
             subscription=settings.AZURE_SPEECH_KEY,
             region=settings.AZURE_SPEECH_REGION
         )
+        speech_config.speech_synthesis_voice_name = voice_name or self.default_voice
+        speech_config.set_speech_synthesis_output_format(
+            speechsdk.SpeechSynthesisOutputFormat.Riff24Khz16BitMonoPcm
+        )
+        
+        audio_config = speechsdk.audio.AudioOutputConfig(filename=output_path)
+        
+        return speechsdk.SpeechSynthesizer(
+            speech_config=speech_config,
+            audio_config=audio_config
+        )
+    
+    def _speak_text(self, text: str, output_path: str, voice_name: str):
+        """Blocking synthesis, run in a worker thread"""
+        synthesizer = self._create_synthesizer(output_path, voice_name)
+        return synthesizer.speak_text_async(text).get()
+    
+    def _speak_ssml(self, ssml: str, output_path: str):
+        """Blocking SSML synthesis, run in a worker thread"""
+        synthesizer = self._create_synthesizer(output_path)
+        return synthesizer.speak_ssml_async(ssml).get()
+    
+    @staticmethod
+    def _build_ssml(text: str, voice_name: str, speed: float, pitch: float) -> str:
+        """Wrap plain text in SSML carrying voice and prosody"""
+        language = "-".join(voice_name.split("-")[:2])
+        pitch_change = f"{(pitch - 1.0) * 100:+.0f}%"
+        return (
+            f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{language}">'
+            f'<voice name="{voice_name}">'
+            f'<prosody rate="{speed:g}" pitch="{pitch_change}">{escape(text)}</prosody>'
+            f'</voice></speak>'
+        )
+    
+    async def _synthesize_cached(self, key: str, output_path: str, synthesize) -> str:
+        """Serve from the audio cache, or synthesize into it and publish atomically"""
+        # One lookup per request, which also materializes the hit at output_path
+        cached = self.cache.fetch(key, output_path) if self.cache is not None else None
+        with span("tts.synthesize", cache_hit=bool(cached)) as current:
+            path = await self._synthesize_into_cache(key, output_path, synthesize, cached)
+            current.set(bytes=os.path.getsize(path))
+            return path
+    
+    async def _synthesize_into_cache(self, key: str, output_path: str, synthesize, cached=None) -> str:
+        if self.cache is None:
+            result = await asyncio.to_thread(synthesize, output_path)
+            self._check_result(result)
+            return output_path
+        
+        if cached:
+            logger.info(f"TTS cache hit: {key[:12]}")
+            return cached
         
-        # Configure voice
-        self.speech_config.speech_synthesis_voice_name = "en-US-JennyNeural"
+        tmp_path = self.cache.reserve()
+        try:
+            result = await asyncio.to_thread(synthesize, tmp_path)
+            self._check_result(result)
+            # Our copy is linked before publishing, so a concurrent eviction cannot take it
+            return self.cache.commit(key, tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    @staticmethod
+    def _check_result(result):
+        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+            return
+        if result.reason == speechsdk.ResultReason.Canceled:
+            cancellation = result.cancellation_details
+            logger.error(f"Speech synthesis canceled: {cancellation.reason}")
+            if cancellation.reason == speechsdk.CancellationReason.Error:
+                logger.error(f"Error details: {cancellation.error_details}")
+            raise Exception(f"Speech synthesis failed: {cancellation.error_details}")
+        raise Exception("Speech synthesis failed")
     
     async def text_to_speech(
-        self, 
-        text: str, 
+        self,
+        text: str,
         output_path: str,
-        voice_name: str = "en-US-JennyNeural"
+        voice_name: str = "en-US-JennyNeural",
+        speed: float = 1.0,
+        pitch: float = 1.0
     ) -> str:
         """Convert text to speech and save to file"""
         try:
-            # Set voice
-            self.speech_config.speech_synthesis_voice_name = voice_name
-            
-            # Configure audio output
-            audio_config = speechsdk.audio.AudioOutputConfig(filename=output_path)
+            normalized = " ".join(text.split())
+            key = stable_hash("text", normalized, voice_name, speed, pitch, self.OUTPUT_FORMAT)
             
-            # Create synthesizer
-            synthesizer = speechsdk.SpeechSynthesizer(
-                speech_config=self.speech_config,
-                audio_config=audio_config
-            )
-            
-            # Generate speech
-            result = synthesizer.speak_text_async(text).get()
+            if speed == 1.0 and pitch == 1.0:
+                synthesize = lambda path: self._speak_text(normalized, path, voice_name)
+            else:
+                ssml = self._build_ssml(normalized, voice_name, speed, pitch)
+                synthesize = lambda path: self._speak_ssml(ssml, path)
             
-            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                logger.info(f"Speech synthesized successfully: {output_path}")
-                return output_path
-            elif result.reason == speechsdk.ResultReason.Canceled:
-                cancellation = result.cancellation_details
-                logger.error(f"Speech synthesis canceled: {cancellation.reason}")
-                if cancellation.reason == speechsdk.CancellationReason.Error:
-                    logger.error(f"Error details: {cancellation.error_details}")
-                raise Exception(f"Speech synthesis failed: {cancellation.error_details}")
+            # Generate speech off the event loop
+            await self._synthesize_cached(key, output_path, synthesize)
+            logger.info(f"Speech synthesized successfully: {output_path}")
+            return output_path
             
         except Exception as e:
             logger.error(f"Azure Speech error: {e}")
@@ -56,19 +140,16 @@ class AzureSpeechService:
     async def synthesize_ssml(self, ssml: str, output_path: str) -> str:
         """Synthesize speech using SSML"""
         try:
-            audio_config = speechsdk.audio.AudioOutputConfig(filename=output_path)
-            synthesizer = speechsdk.SpeechSynthesizer(
-                speech_config=self.speech_config,
-                audio_config=audio_config
-            )
+            # Normalized only for the key; whitespace can be significant inside SSML text
+            normalized = re.sub(r">\s+<", "><", " ".join(ssml.split()))
+            key = stable_hash("ssml", normalized, self.OUTPUT_FORMAT)
             
-            result = synthesizer.speak_ssml_async(ssml).get()
+            return await self._synthesize_cached(
+                key,
+                output_path,
+                lambda path: self._speak_ssml(ssml, path)
+            )
             
-            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                return output_path
-            else:
-                raise Exception("SSML synthesis failed")
-                
         except Exception as e:
             logger.error(f"SSML synthesis error: {e}")
             raise
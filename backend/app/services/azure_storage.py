@@ -1,13 +1,111 @@
 """Azure Blob Storage Service"""
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
+from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient, BlobBlock, ContentSettings
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 from app.config import settings
+from app.core.tracing import span
+import asyncio
+import base64
+import mimetypes
 import os
 import logging
+from typing import AsyncIterator, List
+from urllib.parse import urlparse, unquote
 from datetime import datetime, timedelta
 from azure.storage.blob import generate_blob_sas, BlobSasPermissions
 
 logger = logging.getLogger(__name__)
 
+class StagedBlockUpload:
+    """Upload a blob as staged blocks, several in flight at once.
+    
+    Blocks are staged as soon as data is added and committed in order at
+    the end, so callers can keep feeding data (e.g. while it is still being
+    produced) without holding the whole file in memory.
+    """
+    
+    def __init__(self, blob_client, block_size: int = None, concurrency: int = None):
+        self.blob_client = blob_client
+        self.block_size = block_size or settings.AZURE_UPLOAD_BLOCK_SIZE
+        self._semaphore = asyncio.Semaphore(concurrency or settings.AZURE_UPLOAD_CONCURRENCY)
+        self._block_ids: List[str] = []
+        self._tasks: List[asyncio.Task] = []
+        self.bytes_uploaded = 0
+    
+    async def add_bytes(self, data: bytes):
+        """Stage one block; waits while the concurrency limit is reached"""
+        block_id = base64.b64encode(f"{len(self._block_ids):08d}".encode()).decode()
+        self._block_ids.append(block_id)
+        
+        await self._semaphore.acquire()
+        self._tasks.append(asyncio.create_task(self._stage(block_id, data)))
+    
+    async def _stage(self, block_id: str, data: bytes):
+        try:
+            await self.blob_client.stage_block(block_id, data, length=len(data))
+            self.bytes_uploaded += len(data)
+        finally:
+            self._semaphore.release()
+    
+    async def add_file(self, file_path: str):
+        """Stage a file's contents block by block"""
+        with open(file_path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, self.block_size)
+                if not chunk:
+                    break
+                await self.add_bytes(chunk)
+    
+    async def drain(self):
+        """Wait for in-flight blocks without committing, ignoring their failures"""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    async def commit(self, content_type: str = None):
+        """Wait for staged blocks and commit them in order"""
+        await asyncio.gather(*self._tasks)
+        await self.blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in self._block_ids],
+            content_settings=ContentSettings(content_type=content_type) if content_type else None
+        )
+
+class StreamingBlobUpload:
+    """A blob written incrementally: bytes are staged as blocks as they arrive.
+    
+    Nothing is visible under the blob name until commit(); an aborted
+    upload leaves only uncommitted blocks, which Azure discards on its own.
+    """
+    
+    def __init__(self, client: AsyncBlobServiceClient, container_name: str, blob_name: str):
+        self.client = client
+        self.blob_name = blob_name
+        self.blob_client = client.get_blob_client(container=container_name, blob=blob_name)
+        self.upload = StagedBlockUpload(self.blob_client)
+        self._buffer = bytearray()
+    
+    async def write(self, data: bytes):
+        self._buffer += data
+        while len(self._buffer) >= self.upload.block_size:
+            block = bytes(self._buffer[:self.upload.block_size])
+            del self._buffer[:self.upload.block_size]
+            await self.upload.add_bytes(block)
+    
+    async def commit(self) -> str:
+        """Stage the remainder, commit the block list and return the blob URL"""
+        try:
+            with span("storage.upload", backend="azure", blob_name=self.blob_name, streamed=True) as current:
+                if self._buffer:
+                    await self.upload.add_bytes(bytes(self._buffer))
+                    self._buffer.clear()
+                await self.upload.commit(mimetypes.guess_type(self.blob_name)[0])
+                current.set(bytes=self.upload.bytes_uploaded)
+            logger.info(f"File uploaded: {self.blob_client.url} ({self.upload.bytes_uploaded} bytes, streamed)")
+            return self.blob_client.url
+        finally:
+            await self.client.close()
+    
+    async def abort(self):
+        await self.upload.drain()
+        await self.client.close()
+
 class AzureStorageService:
     def __init__(self):
         self.blob_service_client = BlobServiceClient.from_connection_string(
@@ -28,43 +126,100 @@ class AzureStorageService:
         except Exception as e:
             logger.error(f"Container creation error: {e}")
     
+    def _async_client(self) -> AsyncBlobServiceClient:
+        return AsyncBlobServiceClient.from_connection_string(
+            settings.AZURE_STORAGE_CONNECTION_STRING
+        )
+    
     async def upload_file(
         self, 
         file_path: str, 
         blob_name: str = None
     ) -> str:
-        """Upload file to Azure Blob Storage"""
+        """Upload file to Azure Blob Storage as parallel staged blocks"""
         try:
             if blob_name is None:
                 blob_name = os.path.basename(file_path)
             
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
+            content_type = mimetypes.guess_type(blob_name)[0]
             
-            with open(file_path, "rb") as data:
-                blob_client.upload_blob(data, overwrite=True)
+            with span("storage.upload", backend="azure", blob_name=blob_name) as current:
+                async with self._async_client() as client:
+                    blob_client = client.get_blob_client(
+                        container=self.container_name,
+                        blob=blob_name
+                    )
+                
+                    upload = StagedBlockUpload(blob_client)
+                    await upload.add_file(file_path)
+                    await upload.commit(content_type)
+                    blob_url = blob_client.url
+                current.set(bytes=upload.bytes_uploaded)
             
-            blob_url = blob_client.url
-            logger.info(f"File uploaded: {blob_url}")
+            logger.info(f"File uploaded: {blob_url} ({upload.bytes_uploaded} bytes)")
             return blob_url
             
         except Exception as e:
             logger.error(f"File upload error: {e}")
             raise
     
-    async def download_file(self, blob_name: str, download_path: str) -> str:
-        """Download file from Azure Blob Storage"""
-        try:
-            blob_client = self.blob_service_client.get_blob_client(
+    async def open_upload(self, blob_name: str) -> StreamingBlobUpload:
+        """Start a blob whose contents are still being produced"""
+        client = self._async_client()
+        return StreamingBlobUpload(client, self.container_name, blob_name)
+    
+    def blob_name_from_url(self, url: str) -> str:
+        """Extract the blob name from a blob URL in this container"""
+        path = unquote(urlparse(url).path).lstrip("/")
+        prefix = f"{self.container_name}/"
+        # Azurite URLs carry the account name before the container
+        if not path.startswith(prefix) and f"/{prefix}" in path:
+            path = path[path.index(f"/{prefix}") + 1:]
+        return path[len(prefix):] if path.startswith(prefix) else path
+    
+    async def get_properties(self, blob_name: str) -> dict:
+        """Size, ETag and content type of a blob"""
+        async with self._async_client() as client:
+            blob_client = client.get_blob_client(
+                container=self.container_name,
+                blob=blob_name
+            )
+            properties = await blob_client.get_blob_properties()
+        
+        return {
+            "size": properties.size,
+            "etag": properties.etag if properties.etag.startswith('"') else f'"{properties.etag}"',
+            "content_type": properties.content_settings.content_type
+        }
+    
+    async def stream_range(self, blob_name: str, offset: int, length: int) -> AsyncIterator[bytes]:
+        """Yield a byte range of a blob chunk by chunk"""
+        async with self._async_client() as client:
+            blob_client = client.get_blob_client(
                 container=self.container_name,
                 blob=blob_name
             )
+            downloader = await blob_client.download_blob(offset=offset, length=length)
+            async for chunk in downloader.chunks():
+                yield chunk
+    
+    async def download_file(self, blob_name: str, download_path: str) -> str:
+        """Download file from Azure Blob Storage, chunk by chunk"""
+        try:
+            with span("storage.download", backend="azure", blob_name=blob_name) as current:
+                async with self._async_client() as client:
+                    blob_client = client.get_blob_client(
+                        container=self.container_name,
+                        blob=blob_name
+                    )
+                    downloader = await blob_client.download_blob()
             
-            with open(download_path, "wb") as file:
-                blob_data = blob_client.download_blob()
-                file.write(blob_data.readall())
+                    size = 0
+                    with open(download_path, "wb") as file:
+                        async for chunk in downloader.chunks():
+                            file.write(chunk)
+                            size += len(chunk)
+                current.set(bytes=size)
             
             logger.info(f"File downloaded: {download_path}")
             return download_path
@@ -86,7 +241,7 @@ class AzureStorageService:
                 account_name=blob_client.account_name,
                 container_name=self.container_name,
                 blob_name=blob_name,
-                account_key=settings.AZURE_STORAGE_CONNECTION_STRING.split(';')[2].split('=')[1],
+                account_key=self.blob_service_client.credential.account_key,
                 permission=BlobSasPermissions(read=True),
                 expiry=datetime.utcnow() + timedelta(hours=expiry_hours)
             )
@@ -100,11 +255,12 @@ class AzureStorageService:
     async def delete_blob(self, blob_name: str) -> bool:
         """Delete blob from storage"""
         try:
-            blob_client = self.blob_service_client.get_blob_client(
-                container=self.container_name,
-                blob=blob_name
-            )
-            blob_client.delete_blob()
+            async with self._async_client() as client:
+                blob_client = client.get_blob_client(
+                    container=self.container_name,
+                    blob=blob_name
+                )
+                await blob_client.delete_blob()
             logger.info(f"Blob deleted: {blob_name}")
             return True
             
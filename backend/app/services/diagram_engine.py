@@ -0,0 +1,241 @@
+"""Vector Diagram Engine"""
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.utils.helpers import stable_hash
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when rasterization changes so stale cached diagrams are not reused
+ENGINE_VERSION = 1
+
+Color = Tuple[int, int, int, int]
+
+@dataclass(frozen=True)
+class Palette:
+    background: Color
+    panel: Color
+    box_fill: Color
+    box_outline: Color
+    text: Color
+    accent: Color
+
+STYLES = {
+    "modern": Palette(
+        background=(0, 0, 0, 0),
+        panel=(245, 247, 252, 235),
+        box_fill=(219, 234, 254, 255),
+        box_outline=(37, 99, 235, 255),
+        text=(17, 24, 39, 255),
+        accent=(37, 99, 235, 255)
+    ),
+    "professional": Palette(
+        background=(0, 0, 0, 0),
+        panel=(255, 255, 255, 240),
+        box_fill=(241, 245, 249, 255),
+        box_outline=(51, 65, 85, 255),
+        text=(15, 23, 42, 255),
+        accent=(71, 85, 105, 255)
+    ),
+    "dark": Palette(
+        background=(0, 0, 0, 0),
+        panel=(30, 41, 59, 235),
+        box_fill=(51, 65, 85, 255),
+        box_outline=(125, 211, 252, 255),
+        text=(241, 245, 249, 255),
+        accent=(125, 211, 252, 255)
+    ),
+}
+
+# Shapes use coordinates normalized to the frame (0..1) and font sizes
+# normalized to frame height, so one scene rasterizes at any resolution.
+
+@dataclass(frozen=True)
+class Box:
+    x: float
+    y: float
+    w: float
+    h: float
+    fill: Color
+    outline: Color
+    radius: float = 0.02
+    outline_width: float = 0.003
+
+@dataclass(frozen=True)
+class Arrow:
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    color: Color
+    width: float = 0.004
+    head: float = 0.018
+
+@dataclass(frozen=True)
+class Text:
+    x: float
+    y: float
+    w: float
+    h: float
+    text: str
+    color: Color
+    size: float = 0.04
+    bold: bool = False
+
+@dataclass(frozen=True)
+class DiagramScene:
+    """Resolution-independent description of a diagram"""
+    background: Color
+    shapes: Tuple = field(default_factory=tuple)
+    
+    def cache_key(self, width: int, height: int) -> str:
+        """Content hash of the scene at a given raster size"""
+        shapes = [(type(shape).__name__, asdict(shape)) for shape in self.shapes]
+        return stable_hash(ENGINE_VERSION, self.background, shapes, width, height)
+
+def palette_for(style: str) -> Palette:
+    return STYLES.get(style, STYLES["modern"])
+
+def text_layout(description: str, style: str = "modern") -> DiagramScene:
+    """The description set in a centered panel"""
+    palette = palette_for(style)
+    return DiagramScene(
+        background=palette.background,
+        shapes=(
+            Box(0.1, 0.1, 0.8, 0.62, palette.panel, palette.accent, radius=0.03),
+            Text(0.14, 0.14, 0.72, 0.54, description, palette.text, size=0.045)
+        )
+    )
+
+def flowchart(steps: List[str], style: str = "modern") -> DiagramScene:
+    """Steps as boxes joined by arrows, top to bottom"""
+    palette = palette_for(style)
+    count = max(1, len(steps))
+    slot = 0.7 / count
+    box_h = slot * 0.65
+    shapes = [Box(0.2, 0.06, 0.6, 0.72, palette.panel, palette.panel, radius=0.03, outline_width=0)]
+    
+    for i, step in enumerate(steps):
+        top = 0.07 + i * slot + (slot - box_h) / 2
+        shapes.append(Box(0.3, top, 0.4, box_h, palette.box_fill, palette.box_outline))
+        shapes.append(Text(0.31, top, 0.38, box_h, step, palette.text, size=min(0.04, box_h * 0.4)))
+        if i < len(steps) - 1:
+            shapes.append(Arrow(0.5, top + box_h, 0.5, top + slot, palette.accent))
+    
+    return DiagramScene(background=palette.background, shapes=tuple(shapes))
+
+def labelled_boxes(labels: List[str], style: str = "modern", title: Optional[str] = None) -> DiagramScene:
+    """Labels in a grid of boxes, with an optional title above"""
+    palette = palette_for(style)
+    columns = min(3, max(1, len(labels)))
+    rows = max(1, -(-len(labels) // columns))
+    top = 0.2 if title else 0.1
+    cell_w = 0.8 / columns
+    cell_h = (0.72 - top + 0.06) / rows
+    
+    shapes = [Box(0.06, 0.06, 0.88, 0.72, palette.panel, palette.panel, radius=0.03, outline_width=0)]
+    if title:
+        shapes.append(Text(0.1, 0.08, 0.8, 0.1, title, palette.accent, size=0.055, bold=True))
+    
+    for i, label in enumerate(labels):
+        x = 0.1 + (i % columns) * cell_w
+        y = top + (i // columns) * cell_h
+        w, h = cell_w * 0.9, cell_h * 0.8
+        shapes.append(Box(x, y, w, h, palette.box_fill, palette.box_outline))
+        shapes.append(Text(x + 0.01, y, w - 0.02, h, label, palette.text, size=min(0.04, h * 0.35)))
+    
+    return DiagramScene(background=palette.background, shapes=tuple(shapes))
+
+def _font(size_px: int, bold: bool):
+    from app.services.text_renderer import load_font
+    
+    return load_font(settings.DIAGRAM_FONT_BOLD if bold else settings.DIAGRAM_FONT, size_px)
+
+def _wrap(draw, text: str, font, max_width: int) -> List[str]:
+    """Greedy word wrap measured with the actual font"""
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        current = ""
+        for word in paragraph.split():
+            candidate = f"{current} {word}" if current else word
+            if current and draw.textlength(candidate, font=font) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return lines
+
+def _draw_text(draw, shape: Text, width: int, height: int):
+    """Wrap text into its box, shrinking the font until it fits, centered both ways"""
+    box_w, box_h = int(shape.w * width), int(shape.h * height)
+    size_px = max(8, int(shape.size * height))
+    
+    while True:
+        font = _font(size_px, shape.bold)
+        line_h = int(size_px * 1.25)
+        lines = _wrap(draw, shape.text, font, box_w)
+        if len(lines) * line_h <= box_h or size_px <= 12:
+            break
+        size_px = int(size_px * 0.9)
+    
+    max_lines = max(1, box_h // line_h)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = lines[-1].rstrip(". ") + "..."
+    
+    top = shape.y * height + (box_h - len(lines) * line_h) / 2
+    center = shape.x * width + box_w / 2
+    for i, line in enumerate(lines):
+        draw.text((center, top + i * line_h + line_h / 2), line, font=font, fill=shape.color, anchor="mm")
+
+def _draw_arrow(draw, shape: Arrow, width: int, height: int):
+    import math
+    
+    x1, y1 = shape.x1 * width, shape.y1 * height
+    x2, y2 = shape.x2 * width, shape.y2 * height
+    head = shape.head * height
+    angle = math.atan2(y2 - y1, x2 - x1)
+    # Stop the shaft at the base of the head so the tip stays sharp
+    base_x, base_y = x2 - head * math.cos(angle), y2 - head * math.sin(angle)
+    
+    draw.line([(x1, y1), (base_x, base_y)], fill=shape.color, width=max(1, int(shape.width * height)))
+    draw.polygon([
+        (x2, y2),
+        (base_x + head * 0.5 * math.sin(angle), base_y - head * 0.5 * math.cos(angle)),
+        (base_x - head * 0.5 * math.sin(angle), base_y + head * 0.5 * math.cos(angle))
+    ], fill=shape.color)
+
+def rasterize(scene: DiagramScene, width: int, height: int):
+    """Draw a scene to an RGBA image of exactly width x height"""
+    from PIL import Image, ImageDraw
+    
+    image = Image.new("RGBA", (width, height), scene.background)
+    draw = ImageDraw.Draw(image)
+    
+    for shape in scene.shapes:
+        if isinstance(shape, Box):
+            draw.rounded_rectangle(
+                [shape.x * width, shape.y * height, (shape.x + shape.w) * width, (shape.y + shape.h) * height],
+                radius=int(shape.radius * height),
+                fill=shape.fill,
+                outline=shape.outline if shape.outline_width else None,
+                width=int(shape.outline_width * height)
+            )
+        elif isinstance(shape, Arrow):
+            _draw_arrow(draw, shape, width, height)
+        elif isinstance(shape, Text):
+            _draw_text(draw, shape, width, height)
+    
+    return image
+
+def render_to_file(scene: DiagramScene, width: int, height: int, output_path: str) -> str:
+    """Rasterize a scene straight to a PNG (runs in a worker process)"""
+    rasterize(scene, width, height).save(output_path, format="PNG", compress_level=1)
+    return output_path
+
+def warm_worker():
+    """Load Pillow and the diagram fonts once per worker process"""
+    for bold in (False, True):
+        _font(max(8, int(0.04 * 1080)), bold)
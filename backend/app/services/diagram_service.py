@@ -1,91 +1,105 @@
 """Diagram Service for creating educational diagrams"""
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from PIL import Image, ImageDraw, ImageFont
+from typing import List, Tuple
+from app.config import settings
+from app.core.process_pools import get_process_pool
+from app.services import diagram_engine
+from app.services.diagram_engine import DiagramScene
+from app.utils.file_cache import FileCache
+from app.core.tracing import span
+import asyncio
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Used when the caller has no render profile; renders pass their own frame size
+DEFAULT_SIZE = (1920, 1080)
+
+_raster_cache = None
+
+def get_raster_cache() -> FileCache:
+    """Process-wide cache of rasterized diagrams, keyed by scene, style and size"""
+    global _raster_cache
+    if _raster_cache is None:
+        _raster_cache = FileCache(settings.DIAGRAM_CACHE_DIR, settings.DIAGRAM_CACHE_MAX_BYTES, ".png")
+    return _raster_cache
+
 class DiagramService:
-    def __init__(self):
+    """Builds diagrams as vector scenes and rasterizes each one once.
+    
+    Rasters are produced at the exact target resolution in a pool of warm
+    worker processes and cached by content hash, so a repeated diagram
+    costs a cache lookup and a hard link.
+    """
+    
+    def __init__(self, cache: FileCache = None):
         self.output_dir = "temp/diagrams"
+        self.cache = cache or get_raster_cache()
         os.makedirs(self.output_dir, exist_ok=True)
     
+    @staticmethod
+    def _pool():
+        return get_process_pool("diagrams", settings.DIAGRAM_WORKERS, initializer=diagram_engine.warm_worker)
+    
+    async def render(self, scene: DiagramScene, size: Tuple[int, int] = DEFAULT_SIZE, prefix: str = "diagram") -> str:
+        """Rasterize a scene at size, serving repeats from the cache"""
+        width, height = size
+        key = scene.cache_key(width, height)
+        
+        filepath = os.path.join(self.output_dir, f"{prefix}_{key}.png")
+        with span("diagram.render", kind=prefix, resolution=f"{width}x{height}") as current:
+            hit = await asyncio.to_thread(self.cache.fetch, key, filepath) is not None
+            current.set(cache_hit=hit)
+            
+            if not hit:
+                tmp_path = await asyncio.to_thread(self.cache.reserve)
+                try:
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(
+                        self._pool(), diagram_engine.render_to_file, scene, width, height, tmp_path
+                    )
+                    await asyncio.to_thread(self.cache.commit, key, tmp_path, filepath)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+            
+            return filepath
+    
     async def create_diagram(
-        self, 
-        description: str, 
-        style: str = "modern"
+        self,
+        description: str,
+        style: str = "modern",
+        size: Tuple[int, int] = DEFAULT_SIZE
     ) -> str:
         """Create a diagram based on description"""
         try:
-            # Simple diagram creation
-            # In production, use more sophisticated diagram generation
-            filename = f"diagram_{os.urandom(8).hex()}.png"
-            filepath = os.path.join(self.output_dir, filename)
-            
-            # Create simple diagram using matplotlib
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            # Add text
-            ax.text(
-                0.5, 0.5, 
-                description[:100],
-                ha='center', 
-                va='center',
-                fontsize=14,
-                wrap=True
-            )
-            
-            # Style the diagram
-            ax.set_xlim(0, 1)
-            ax.set_ylim(0, 1)
-            ax.axis('off')
-            
-            plt.tight_layout()
-            plt.savefig(filepath, dpi=150, bbox_inches='tight')
-            plt.close()
-            
+            filepath = await self.render(diagram_engine.text_layout(description, style), size, "diagram")
             logger.info(f"Diagram created: {filepath}")
             return filepath
-            
+        
         except Exception as e:
             logger.error(f"Diagram creation error: {e}")
             raise
     
-    async def create_flowchart(self, steps: list) -> str:
+    async def create_flowchart(self, steps: list, style: str = "modern", size: Tuple[int, int] = DEFAULT_SIZE) -> str:
         """Create a flowchart"""
-        filename = f"flowchart_{os.urandom(8).hex()}.png"
-        filepath = os.path.join(self.output_dir, filename)
-        
-        fig, ax = plt.subplots(figsize=(8, len(steps) * 2))
-        
-        y_pos = 0.9
-        for i, step in enumerate(steps):
-            # Draw box
-            rect = patches.FancyBboxPatch(
-                (0.2, y_pos), 0.6, 0.1,
-                boxstyle="round,pad=0.01",
-                edgecolor='blue',
-                facecolor='lightblue'
-            )
-            ax.add_patch(rect)
-            
-            # Add text
-            ax.text(0.5, y_pos + 0.05, step, ha='center', va='center')
-            
-            # Draw arrow
-            if i < len(steps) - 1:
-                ax.arrow(0.5, y_pos, 0, -0.15, head_width=0.05, head_length=0.02)
-            
-            y_pos -= 0.2
-        
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
-        
-        plt.tight_layout()
-        plt.savefig(filepath, dpi=150, bbox_inches='tight')
-        plt.close()
-        
-        return filepath
+        try:
+            return await self.render(diagram_engine.flowchart(steps, style), size, "flowchart")
+        except Exception as e:
+            logger.error(f"Flowchart creation error: {e}")
+            raise
+    
+    async def create_labelled_boxes(
+        self,
+        labels: List[str],
+        title: str = None,
+        style: str = "modern",
+        size: Tuple[int, int] = DEFAULT_SIZE
+    ) -> str:
+        """Create a grid of labelled boxes"""
+        try:
+            return await self.render(diagram_engine.labelled_boxes(labels, style, title), size, "boxes")
+        except Exception as e:
+            logger.error(f"Labelled boxes creation error: {e}")
+            raise
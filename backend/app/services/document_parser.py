@@ -2,40 +2,91 @@
 from fastapi import UploadFile
 import PyPDF2
 from docx import Document
+from app.config import settings
+from app.core.process_pools import get_process_pool
+from app.utils.file_handler import FileHandler
+import asyncio
 import io
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _count_pdf_pages(path: str) -> int:
+    """Number of pages in a PDF (runs in a worker process)"""
+    return len(PyPDF2.PdfReader(path).pages)
+
+def _extract_pdf_pages(path: str, start: int, stop: int) -> str:
+    """Extract the text of pages [start, stop) of a PDF (runs in a worker process)"""
+    reader = PyPDF2.PdfReader(path)
+    return "".join(reader.pages[i].extract_text() or "" for i in range(start, stop))
+
+def _extract_docx(source) -> str:
+    """Extract paragraph text from a DOCX path or file object (runs in a worker process)"""
+    doc = Document(source)
+    return "".join(paragraph.text + "\n" for paragraph in doc.paragraphs)
+
 class DocumentParser:
+    def __init__(self):
+        self.upload_dir = "temp/uploads"
+        os.makedirs(self.upload_dir, exist_ok=True)
+    
     async def parse_file(self, file: UploadFile) -> str:
         """Parse uploaded document"""
+        path = await FileHandler.save_upload(file, self.upload_dir, settings.MAX_FILE_SIZE)
         try:
-            content = await file.read()
+            return await self.parse_path(path, file.filename)
+        finally:
+            FileHandler.delete_file(path)
+    
+    async def parse_path(self, path: str, filename: str) -> str:
+        """Parse a document on disk without blocking the event loop"""
+        try:
+            extension = os.path.splitext(filename.lower())[1]
             
-            if file.filename.endswith('.pdf'):
-                return self._parse_pdf(content)
-            elif file.filename.endswith('.docx'):
-                return self._parse_docx(content)
-            elif file.filename.endswith('.txt'):
-                return content.decode('utf-8')
+            if extension == '.pdf':
+                return await self._parse_pdf_path(path)
+            elif extension == '.docx':
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool(), _extract_docx, path)
+            elif extension in ('.txt', '.md'):
+                return await asyncio.to_thread(self._read_text, path)
             else:
                 raise ValueError("Unsupported file type")
         except Exception as e:
             logger.error(f"Document parsing error: {e}")
             raise
     
+    @staticmethod
+    def _pool():
+        return get_process_pool("documents", settings.PARSER_WORKERS)
+    
+    @staticmethod
+    def _read_text(path: str) -> str:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    
+    async def _parse_pdf_path(self, path: str) -> str:
+        """Extract page ranges of a PDF in parallel worker processes"""
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        
+        page_count = await loop.run_in_executor(pool, _count_pdf_pages, path)
+        step = max(1, settings.PDF_PAGES_PER_TASK)
+        
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, _extract_pdf_pages, path, start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ))
+        
+        logger.info(f"Parsed {page_count} PDF pages in {len(parts)} parts")
+        return "".join(parts)
+    
     def _parse_pdf(self, content: bytes) -> str:
         """Parse PDF content"""
         try:
-            pdf_file = io.BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            
-            return text
+            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+            return "".join(page.extract_text() or "" for page in pdf_reader.pages)
         except Exception as e:
             logger.error(f"PDF parsing error: {e}")
             raise
@@ -43,14 +94,7 @@ class DocumentParser:
     def _parse_docx(self, content: bytes) -> str:
         """Parse DOCX content"""
         try:
-            docx_file = io.BytesIO(content)
-            doc = Document(docx_file)
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text
+            return _extract_docx(io.BytesIO(content))
         except Exception as e:
             logger.error(f"DOCX parsing error: {e}")
             raise
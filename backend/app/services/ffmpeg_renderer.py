@@ -0,0 +1,122 @@
+"""FFmpeg Filtergraph Renderer for Still-Image Scenes"""
+from typing import List, Optional
+from app.config import settings
+from app.services.text_renderer import render_caption
+from app.utils.ffmpeg import run_ffmpeg
+import asyncio
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Same backdrop as the MoviePy path's default background, (30, 30, 50)
+BACKGROUND_COLOR = "0x1e1e32"
+
+def write_caption(job: dict) -> Optional[str]:
+    """Render a scene's caption to an RGBA PNG beside its segment, once"""
+    if not job["text"]:
+        return None
+    
+    from PIL import Image
+    
+    profile = job["profile"]
+    path = os.path.splitext(job["output_path"])[0] + "_caption.png"
+    Image.fromarray(render_caption(job["text"], profile.width, profile.height), "RGBA").save(
+        path, compress_level=1
+    )
+    return path
+
+def _fade_seconds(job: dict) -> float:
+    if "fade" not in (job.get("transition") or ""):
+        return 0.0
+    return min(settings.TRANSITION_SECONDS, job["duration"] / 2)
+
+def build_command(jobs: List[dict], captions: List[Optional[str]], output_path: str, filter_path: str) -> List[str]:
+    """Compile scenes into one ffmpeg invocation: inputs, a filtergraph script and encoder settings.
+    
+    Each scene is a generated background with its still fitted on top and
+    its caption along the bottom edge, held for exactly the scene's
+    duration; narration is padded or trimmed to the same length. Scenes
+    are joined with the concat filter, so no frame ever passes through
+    Python.
+    """
+    profile = jobs[0]["profile"]
+    size = f"{profile.width}x{profile.height}"
+    inputs, filters, joined = [], [], []
+    
+    def add_input(*args) -> int:
+        inputs.extend(args)
+        return inputs.count("-i") - 1
+    
+    for i, (job, caption) in enumerate(zip(jobs, captions)):
+        duration = job["duration"]
+        frame = f"bg{i}"
+        filters.append(f"color=c={BACKGROUND_COLOR}:s={size}:r={profile.fps}:d={duration}[{frame}]")
+        
+        if job["image_path"] and os.path.exists(job["image_path"]):
+            index = add_input("-loop", "1", "-framerate", str(profile.fps), "-t", str(duration), "-i", job["image_path"])
+            filters.append(
+                f"[{index}:v]scale={profile.width}:{profile.height}:force_original_aspect_ratio=decrease,"
+                f"format=rgba[img{i}]"
+            )
+            filters.append(f"[{frame}][img{i}]overlay=(W-w)/2:(H-h)/2:shortest=1[still{i}]")
+            frame = f"still{i}"
+        
+        if caption:
+            index = add_input("-loop", "1", "-framerate", str(profile.fps), "-t", str(duration), "-i", caption)
+            filters.append(f"[{frame}][{index}:v]overlay=(W-w)/2:H-h:shortest=1[text{i}]")
+            frame = f"text{i}"
+        
+        video = [f"fps={profile.fps}", "format=yuv420p"]
+        fade = _fade_seconds(job)
+        if fade:
+            video += [f"fade=t=in:st=0:d={fade}", f"fade=t=out:st={duration - fade}:d={fade}"]
+        video += [f"trim=duration={duration}", "setpts=PTS-STARTPTS"]
+        filters.append(f"[{frame}]{','.join(video)}[v{i}]")
+        
+        if job["audio_path"] and os.path.exists(job["audio_path"]):
+            index = add_input("-i", job["audio_path"])
+            source = f"[{index}:a]aresample={profile.audio_fps},"
+        else:
+            # Keep an audio stream in every scene so segments concatenate without re-encoding
+            source = f"anullsrc=r={profile.audio_fps}:cl=stereo,"
+        filters.append(
+            f"{source}aformat=sample_rates={profile.audio_fps}:channel_layouts=stereo,"
+            f"apad,atrim=duration={duration},asetpts=PTS-STARTPTS[a{i}]"
+        )
+        joined.append(f"[v{i}][a{i}]")
+    
+    filters.append(f"{''.join(joined)}concat=n={len(jobs)}:v=1:a=1[v][a]")
+    with open(filter_path, "w") as f:
+        f.write(";\n".join(filters))
+    
+    return [
+        *inputs,
+        "-filter_complex_script", filter_path,
+        "-map", "[v]",
+        "-map", "[a]",
+        "-c:v", profile.codec,
+        "-preset", profile.preset,
+        "-crf", str(profile.crf),
+        "-tune", "stillimage",
+        "-g", str(profile.gop),
+        "-pix_fmt", "yuv420p",
+        "-r", str(profile.fps),
+        "-c:a", profile.audio_codec,
+        "-b:a", profile.audio_bitrate,
+        "-ar", str(profile.audio_fps),
+        "-movflags", "+faststart",
+        output_path
+    ]
+
+async def render(jobs: List[dict], output_path: str) -> str:
+    """Render one or more scene jobs to a single file with one ffmpeg process"""
+    captions = await asyncio.gather(*(asyncio.to_thread(write_caption, job) for job in jobs))
+    filter_path = f"{output_path}.filter"
+    try:
+        await run_ffmpeg(build_command(jobs, captions, output_path, filter_path))
+    finally:
+        for path in [filter_path, *captions]:
+            if path and os.path.exists(path):
+                os.remove(path)
+    return output_path
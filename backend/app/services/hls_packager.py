@@ -0,0 +1,140 @@
+"""Adaptive Bitrate HLS Packaging"""
+from dataclasses import dataclass
+from typing import List
+from app.config import settings
+from app.utils.ffmpeg import run_ffmpeg
+from app.core.tracing import span
+import asyncio
+import mimetypes
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    height: int
+    video_bitrate: str
+    audio_bitrate: str
+
+LADDER = [
+    Rendition("1440p", 1440, "8000k", "192k"),
+    Rendition("1080p", 1080, "5000k", "128k"),
+    Rendition("720p", 720, "2800k", "128k"),
+    Rendition("480p", 480, "1400k", "96k"),
+    Rendition("360p", 360, "800k", "64k"),
+]
+
+MASTER_PLAYLIST = "master.m3u8"
+
+def ladder_for(source_height: int) -> List[Rendition]:
+    """Configured rungs no taller than the source, so nothing is upscaled"""
+    wanted = {name.strip() for name in settings.HLS_RENDITIONS.split(",") if name.strip()}
+    return [rung for rung in LADDER if rung.name in wanted and rung.height <= source_height]
+
+def keyframe_times(durations: List[float], max_segment: float) -> List[float]:
+    """Keyframes at every scene boundary, and every max_segment seconds within a scene"""
+    times, start = [], 0.0
+    for duration in durations:
+        # Every scene starts a segment, however short it is
+        times.append(round(start, 3))
+        offset = max_segment
+        # Skip an interior slot that would leave a sliver of a segment before the next scene
+        while offset < duration - 1.0:
+            times.append(round(start + offset, 3))
+            offset += max_segment
+        start += duration
+    return times
+
+def _kbps(bitrate: str) -> int:
+    return int(bitrate.rstrip("k"))
+
+def build_command(source_path: str, durations: List[float], ladder: List[Rendition], output_dir: str, fps: int) -> List[str]:
+    """One decode of the source, split and scaled once per rendition, muxed as HLS.
+    
+    Keyframes are forced only at scene boundaries and at the in-scene
+    segment interval, and a near-zero hls_time makes the muxer cut at each
+    of them, so every segment starts on a scene boundary or within a scene.
+    """
+    keyframes = ",".join(str(t) for t in keyframe_times(durations, settings.HLS_SEGMENT_SECONDS))
+    labels = [f"v{i}" for i in range(len(ladder))]
+    filters = [f"[0:v]split={len(ladder)}{''.join(f'[s{i}]' for i in range(len(ladder)))}"]
+    for i, rung in enumerate(ladder):
+        filters.append(f"[s{i}]scale=-2:{rung.height}[{labels[i]}]")
+    
+    args = ["-i", source_path, "-filter_complex", ";".join(filters)]
+    for i, rung in enumerate(ladder):
+        rate = _kbps(rung.video_bitrate)
+        args += [
+            "-map", f"[{labels[i]}]",
+            "-map", "0:a",
+            f"-c:v:{i}", "libx264",
+            f"-crf:v:{i}", "23",
+            f"-maxrate:v:{i}", f"{int(rate * 1.07)}k",
+            f"-bufsize:v:{i}", f"{int(rate * 1.5)}k",
+            # Every rendition cuts at the same instants; keyframes only where forced
+            f"-force_key_frames:v:{i}", keyframes,
+            f"-g:v:{i}", str(fps * 3600),
+            f"-sc_threshold:v:{i}", "0",
+            f"-c:a:{i}", "aac",
+            f"-b:a:{i}", rung.audio_bitrate,
+        ]
+    
+    return args + [
+        "-preset", settings.HLS_PRESET,
+        "-tune", "stillimage",
+        "-pix_fmt", "yuv420p",
+        "-r", str(fps),
+        "-f", "hls",
+        "-hls_time", "0.1",
+        "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_filename", os.path.join(output_dir, "%v", "segment_%05d.ts"),
+        "-master_pl_name", MASTER_PLAYLIST,
+        "-var_stream_map", " ".join(f"v:{i},a:{i},name:{rung.name}" for i, rung in enumerate(ladder)),
+        os.path.join(output_dir, "%v", "index.m3u8")
+    ]
+
+async def package(source_path: str, durations: List[float], source_height: int, output_dir: str, fps: int) -> str:
+    """Encode the ABR ladder from a finished video; returns the master playlist path"""
+    ladder = ladder_for(source_height)
+    if not ladder:
+        raise ValueError(f"No HLS renditions fit a {source_height}p source")
+    
+    for rung in ladder:
+        os.makedirs(os.path.join(output_dir, rung.name), exist_ok=True)
+    
+    with span("hls.package", renditions=len(ladder), duration=sum(durations), fps=fps) as current:
+        await run_ffmpeg(build_command(source_path, durations, ladder, output_dir, fps))
+        current.set(segments=sum(
+            len([name for name in os.listdir(os.path.join(output_dir, rung.name)) if name.endswith(".ts")])
+            for rung in ladder
+        ))
+    return os.path.join(output_dir, MASTER_PLAYLIST)
+
+async def publish(storage, output_dir: str, prefix: str) -> str:
+    """Upload a packaged HLS directory under prefix; returns the master playlist URL"""
+    files = [
+        os.path.relpath(os.path.join(root, name), output_dir)
+        for root, _, names in os.walk(output_dir)
+        for name in names
+    ]
+    semaphore = asyncio.Semaphore(settings.HLS_UPLOAD_CONCURRENCY)
+    
+    async def upload(relative_path: str) -> str:
+        async with semaphore:
+            return await storage.upload_file(
+                os.path.join(output_dir, relative_path),
+                f"{prefix}/{relative_path.replace(os.sep, '/')}"
+            )
+    
+    # Playlists last, so a reader never finds a playlist before its segments
+    media = [path for path in files if not path.endswith(".m3u8")]
+    playlists = [path for path in files if path.endswith(".m3u8") and path != MASTER_PLAYLIST]
+    await asyncio.gather(*(upload(path) for path in media))
+    await asyncio.gather(*(upload(path) for path in playlists))
+    return await upload(MASTER_PLAYLIST)
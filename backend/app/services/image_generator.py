@@ -1,7 +1,10 @@
 """Image Generator Service using DALL-E"""
 from openai import AzureOpenAI
 from app.config import settings
+from app.core.tracing import span
+import asyncio
 import os
+import hashlib
 import httpx
 import logging
 
@@ -28,19 +31,22 @@ class ImageGeneratorService:
             # Enhance prompt based on style
             enhanced_prompt = self._enhance_prompt(prompt, style)
             
-            # Generate image
-            result = self.client.images.generate(
-                model="dall-e-3",
-                prompt=enhanced_prompt,
-                size=size,
-                quality="standard",
-                n=1
-            )
+            with span("image.generate", style=style, size=size) as current:
+                # Generate image off the event loop; the client is synchronous
+                result = await asyncio.to_thread(
+                    self.client.images.generate,
+                    model="dall-e-3",
+                    prompt=enhanced_prompt,
+                    size=size,
+                    quality="standard",
+                    n=1
+                )
             
-            image_url = result.data[0].url
+                image_url = result.data[0].url
             
-            # Download image
-            image_path = await self._download_image(image_url)
+                # Download image
+                image_path = await self._download_image(image_url)
+                current.set(bytes=os.path.getsize(image_path))
             
             logger.info(f"Image generated: {image_path}")
             return image_path
@@ -68,12 +74,16 @@ class ImageGeneratorService:
                 response = await client.get(url)
                 response.raise_for_status()
                 
-                # Save image
-                filename = f"img_{os.urandom(8).hex()}.png"
+                # Save image under its content hash so identical images share a file
+                digest = hashlib.sha256(response.content).hexdigest()
+                filename = f"img_{digest}.png"
                 filepath = os.path.join(self.output_dir, filename)
                 
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
+                if not os.path.exists(filepath):
+                    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        f.write(response.content)
+                    os.replace(tmp_path, filepath)
                 
                 return filepath
                 
@@ -0,0 +1,179 @@
+"""Progressive HLS Delivery of Scene Segments"""
+from typing import Dict, List, Optional
+from app.config import settings
+from app.utils.ffmpeg import run_ffmpeg
+from app.core.tracing import span
+import asyncio
+import math
+import mimetypes
+import os
+import shutil
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+PLAYLIST_NAME = "index.m3u8"
+
+def _parse_chunks(playlist_path: str) -> List[tuple]:
+    """(duration, file name) of each media segment in an ffmpeg-written playlist"""
+    chunks, duration = [], None
+    with open(playlist_path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",")[0])
+            elif line and not line.startswith("#") and duration is not None:
+                chunks.append((duration, line))
+                duration = None
+    return chunks
+
+class LivePlaylist:
+    """A growing HLS event playlist fed by scene segments as they are encoded.
+    
+    Each finished segment is remuxed (no re-encode) into MPEG-TS chunks and
+    uploaded. The playlist only ever grows by the contiguous prefix of
+    finished scenes, so playback never runs ahead into a gap, and scenes
+    are separated by discontinuities because each starts its own timeline.
+    
+    EXT-X-TARGETDURATION may not change once a client has loaded the
+    playlist, so it is fixed here. Segments are encoded with a keyframe at
+    least every LIVE_HLS_CHUNK_SECONDS, which keeps stream-copied chunks
+    within it; a segment that still yields a longer chunk is re-encoded
+    with keyframes forced at the chunk interval.
+    """
+    
+    def __init__(self, storage, work_dir: str, prefix: str = None):
+        self.storage = storage
+        self.work_dir = work_dir
+        self.prefix = prefix or f"live/{uuid.uuid4().hex}"
+        self.order: Optional[List[int]] = None
+        self.ready: Dict[int, Optional[List[tuple]]] = {}
+        self.published: List[int] = []
+        self.url: Optional[str] = None
+        self.finished = False
+        self.target_duration = max(settings.LIVE_HLS_TARGET_DURATION, math.ceil(settings.LIVE_HLS_CHUNK_SECONDS))
+        self._lock = asyncio.Lock()
+        os.makedirs(self.work_dir, exist_ok=True)
+    
+    def set_order(self, scene_numbers: List[int]):
+        """Fix the scene order once the script is known (scenes are otherwise numbered 1, 2, ...)"""
+        self.order = list(scene_numbers)
+    
+    def _next_scene(self) -> int:
+        if self.order is not None:
+            remaining = [number for number in self.order if number not in self.published]
+            return remaining[0] if remaining else None
+        return (self.published[-1] + 1) if self.published else 1
+    
+    async def add_scene(self, scene_number: int, segment_path: str) -> bool:
+        """Publish a scene's segment; True when this made the playlist playable for the first time"""
+        with span("live.publish", scene_number=scene_number):
+            chunks = await self._chunk(scene_number, segment_path)
+            async with self._lock:
+                self.ready[scene_number] = chunks
+                return await self._advance()
+    
+    async def skip(self, scene_number: int) -> bool:
+        """Let the playlist advance past a scene that failed to render"""
+        async with self._lock:
+            self.ready[scene_number] = None
+            return await self._advance()
+    
+    async def finalize(self, segments: Dict[int, str]) -> Optional[str]:
+        """Publish any scenes still missing, in order, and close the playlist with ENDLIST"""
+        try:
+            for scene_number, path in sorted(segments.items()):
+                if scene_number not in self.ready and os.path.exists(path):
+                    self.ready[scene_number] = await self._chunk(scene_number, path)
+        
+            async with self._lock:
+                self.set_order(sorted(self.ready))
+                self.finished = True
+                await self._advance(force=True)
+        finally:
+            self.discard()
+        return self.url
+        
+    def discard(self):
+        """Remove the local working files; uploaded chunks stay where they are"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+    
+    async def _chunk(self, scene_number: int, segment_path: str) -> List[tuple]:
+        """Remux a segment into uploaded TS chunks; returns their (duration, name) list"""
+        stem = f"scene_{scene_number:04d}"
+        scene_playlist = os.path.join(self.work_dir, f"{stem}.m3u8")
+        chunks = await self._split(segment_path, stem, scene_playlist, ["-c", "copy"])
+        if any(round(duration) > self.target_duration for duration, _ in chunks):
+            # e.g. a segment encoded with a longer GOP; never raise the announced target
+            logger.info(f"Re-encoding scene {scene_number} to fit {self.target_duration}s live chunks")
+            chunks = await self._split(segment_path, stem, scene_playlist, [
+                "-c:v", "libx264",
+                "-preset", "veryfast",
+                "-force_key_frames", f"expr:gte(t,n_forced*{settings.LIVE_HLS_CHUNK_SECONDS})",
+                "-c:a", "copy"
+            ])
+        
+        await asyncio.gather(*(
+            self.storage.upload_file(os.path.join(self.work_dir, name), f"{self.prefix}/{name}")
+            for _, name in chunks
+        ))
+        return chunks
+    
+    async def _split(self, segment_path: str, stem: str, scene_playlist: str, codec_args: List[str]) -> List[tuple]:
+        """Cut a segment into local TS chunks; returns their (duration, name) list"""
+        await run_ffmpeg([
+            "-i", segment_path,
+            *codec_args,
+            "-f", "hls",
+            "-hls_time", str(settings.LIVE_HLS_CHUNK_SECONDS),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(self.work_dir, f"{stem}_%03d.ts"),
+            scene_playlist
+        ])
+        return _parse_chunks(scene_playlist)
+    
+    async def _advance(self, force: bool = False) -> bool:
+        """Append every scene that now continues the published prefix; caller holds the lock"""
+        was_playable = any(self.ready.get(number) for number in self.published)
+        appended = False
+        while True:
+            number = self._next_scene()
+            if number is None or number not in self.ready:
+                break
+            self.published.append(number)
+            appended = True
+        
+        if appended or force:
+            await self._write()
+        
+        playable = any(self.ready.get(number) for number in self.published)
+        return playable and not was_playable
+    
+    async def _write(self):
+        chunks = [self.ready[number] for number in self.published if self.ready.get(number)]
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for i, scene in enumerate(chunks):
+            if i:
+                # Each scene segment restarts its timestamps
+                lines.append("#EXT-X-DISCONTINUITY")
+            for duration, name in scene:
+                lines += [f"#EXTINF:{duration:.3f},", name]
+        if self.finished:
+            lines.append("#EXT-X-ENDLIST")
+        
+        path = os.path.join(self.work_dir, PLAYLIST_NAME)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        self.url = await self.storage.upload_file(path, f"{self.prefix}/{PLAYLIST_NAME}")
@@ -0,0 +1,251 @@
+"""Persistent LLM Response Cache"""
+from langchain_core.messages import BaseMessage
+from app.config import settings
+from app.utils.helpers import stable_hash
+from app.core.tracing import span, add_span
+from typing import AsyncIterator, List, Optional
+import asyncio
+import os
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LLMCache:
+    """Disk-backed, content-addressed cache for chat completions.
+    
+    Entries are keyed on the rendered prompt, deployment name and temperature,
+    expire after a TTL and are evicted least-recently-used once the store
+    grows past its size budget. Hit/miss counters are kept in the same
+    database so every worker process reports the same numbers.
+    """
+    
+    def __init__(
+        self,
+        path: str = None,
+        max_bytes: int = None,
+        ttl_seconds: int = None
+    ):
+        self.path = path or settings.LLM_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else settings.LLM_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_CACHE_TTL_SECONDS
+        self.enabled = settings.LLM_CACHE_ENABLED
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+    
+    def _init_db(self):
+        """Create cache tables"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+    
+    @staticmethod
+    def make_key(messages: List[BaseMessage], deployment: str, temperature: float) -> str:
+        """Hash the rendered prompt together with the model parameters"""
+        rendered = [(message.type, message.content) for message in messages]
+        return stable_hash(rendered, deployment, temperature)
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return cached value or None on miss/expiry"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            
+            if row is None:
+                self._increment(conn, "misses")
+                return None
+            
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._increment(conn, "hits")
+            return row[0]
+    
+    def set(self, key: str, value: str):
+        """Store value and evict least-recently-used entries over budget"""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict(conn)
+    
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        evicted = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        
+        self._increment(conn, "evictions", evicted)
+        logger.info(f"LLM cache evicted {evicted} entries")
+    
+    @staticmethod
+    def _increment(conn: sqlite3.Connection, name: str, amount: int = 1):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+    
+    def stats(self) -> dict:
+        """Hit/miss counters and current store size"""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes
+        }
+    
+    async def ainvoke(self, llm, messages: List[BaseMessage], use_cache: bool = True) -> str:
+        """Invoke the chat model, serving repeated prompts from the cache"""
+        with span("llm.invoke", prompt_chars=sum(len(str(m.content)) for m in messages)) as current:
+            return await self._ainvoke(llm, messages, use_cache, current)
+    
+    @staticmethod
+    async def _call(llm, messages: List[BaseMessage], current) -> str:
+        result = await llm.ainvoke(messages)
+        usage = getattr(result, "usage_metadata", None) or {}
+        current.set(
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens"),
+            completion_chars=len(result.content)
+        )
+        return result.content
+    
+    async def _ainvoke(self, llm, messages: List[BaseMessage], use_cache: bool, current) -> str:
+        if not (self.enabled and use_cache):
+            current.set(cache_hit=False)
+            return await self._call(llm, messages, current)
+        
+        key = self.make_key(
+            messages,
+            getattr(llm, "deployment_name", None) or settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+            getattr(llm, "temperature", None)
+        )
+        
+        try:
+            cached = await asyncio.to_thread(self.get, key)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read error: {e}")
+            cached = None
+        
+        current.set(cache_hit=cached is not None)
+        if cached is not None:
+            logger.info(f"LLM cache hit: {key[:12]}")
+            return cached
+        
+        content = await self._call(llm, messages, current)
+        
+        try:
+            await asyncio.to_thread(self.set, key, content)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write error: {e}")
+        
+        return content
+    
+    async def astream(self, llm, messages: List[BaseMessage], use_cache: bool = True) -> AsyncIterator[str]:
+        """Stream the chat model's completion, replaying a cached one in a single chunk.
+        
+        The completion is cached only once the stream has finished, so an
+        interrupted stream never leaves a truncated entry behind.
+        """
+        # Recorded after the fact: a span held open across yields would leak into the consumer
+        start_ns = time.time_ns()
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        
+        key = None
+        if self.enabled and use_cache:
+            key = self.make_key(
+                messages,
+                getattr(llm, "deployment_name", None) or settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+                getattr(llm, "temperature", None)
+            )
+            
+            try:
+                cached = await asyncio.to_thread(self.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read error: {e}")
+                cached = None
+            
+            if cached is not None:
+                logger.info(f"LLM cache hit: {key[:12]}")
+                add_span("llm.stream", start_ns, prompt_chars=prompt_chars, cache_hit=True, completion_chars=len(cached))
+                yield cached
+                return
+        
+        parts = []
+        first_chunk_ms = None
+        async for chunk in llm.astream(messages):
+            if chunk.content:
+                if first_chunk_ms is None:
+                    first_chunk_ms = (time.time_ns() - start_ns) / 1e6
+                parts.append(chunk.content)
+                yield chunk.content
+        
+        add_span(
+            "llm.stream",
+            start_ns,
+            prompt_chars=prompt_chars,
+            cache_hit=False,
+            completion_chars=sum(len(part) for part in parts),
+            first_chunk_ms=first_chunk_ms
+        )
+        
+        if key is not None:
+            try:
+                await asyncio.to_thread(self.set, key, "".join(parts))
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write error: {e}")
@@ -0,0 +1,118 @@
+"""Filesystem-backed Storage Service"""
+from app.config import settings
+from app.core.tracing import span
+import asyncio
+import os
+import shutil
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LocalStreamingUpload:
+    """A blob written incrementally to a temp file, published by rename on commit"""
+    
+    def __init__(self, storage, blob_name: str):
+        self.blob_name = blob_name
+        self.dest_path = storage.local_path(blob_name)
+        self.url = f"{storage.base_url}/{blob_name}"
+        os.makedirs(os.path.dirname(self.dest_path), exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.dest_path), suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self.size = 0
+    
+    async def write(self, data: bytes):
+        await asyncio.to_thread(self._file.write, data)
+        self.size += len(data)
+    
+    async def commit(self) -> str:
+        with span("storage.upload", backend="local", blob_name=self.blob_name, bytes=self.size, streamed=True):
+            self._file.close()
+            os.replace(self.tmp_path, self.dest_path)
+        logger.info(f"File stored: {self.url} (streamed)")
+        return self.url
+    
+    async def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class LocalStorageService:
+    """Drop-in stand-in for AzureStorageService that stores blobs on disk.
+    
+    Used for local development, offline benchmarks and tests; blob names map
+    to paths under LOCAL_STORAGE_DIR and URLs to LOCAL_STORAGE_BASE_URL.
+    """
+    
+    def __init__(self, root_dir: str = None, base_url: str = None):
+        self.root_dir = root_dir or settings.LOCAL_STORAGE_DIR
+        self.base_url = (base_url or settings.LOCAL_STORAGE_BASE_URL).rstrip("/")
+        os.makedirs(self.root_dir, exist_ok=True)
+    
+    def local_path(self, blob_name: str) -> str:
+        """Path on disk for a blob name"""
+        path = os.path.abspath(os.path.join(self.root_dir, blob_name))
+        if not path.startswith(os.path.abspath(self.root_dir) + os.sep):
+            raise ValueError(f"Invalid blob name: {blob_name}")
+        return path
+    
+    def blob_name_from_url(self, url: str) -> str:
+        """Extract the blob name from a URL returned by upload_file"""
+        prefix = f"{self.base_url}/"
+        return url[len(prefix):] if url.startswith(prefix) else url
+    
+    def _copy(self, src_path: str, dest_path: str):
+        """Copy via temp file + rename so readers never see a partial blob"""
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    async def upload_file(self, file_path: str, blob_name: str = None) -> str:
+        """Store file under blob_name"""
+        try:
+            if blob_name is None:
+                blob_name = os.path.basename(file_path)
+            
+            with span("storage.upload", backend="local", blob_name=blob_name, bytes=os.path.getsize(file_path)):
+                await asyncio.to_thread(self._copy, file_path, self.local_path(blob_name))
+            
+            blob_url = f"{self.base_url}/{blob_name}"
+            logger.info(f"File stored: {blob_url}")
+            return blob_url
+            
+        except Exception as e:
+            logger.error(f"File upload error: {e}")
+            raise
+    
+    async def open_upload(self, blob_name: str) -> LocalStreamingUpload:
+        """Start a blob whose contents are still being produced"""
+        return LocalStreamingUpload(self, blob_name)
+    
+    async def download_file(self, blob_name: str, download_path: str) -> str:
+        """Copy blob to download_path"""
+        try:
+            await asyncio.to_thread(self._copy, self.local_path(blob_name), download_path)
+            return download_path
+        except Exception as e:
+            logger.error(f"File download error: {e}")
+            raise
+    
+    async def get_blob_url(self, blob_name: str, expiry_hours: int = 24) -> str:
+        """URL for blob (local blobs need no SAS token)"""
+        return f"{self.base_url}/{blob_name}"
+    
+    async def delete_blob(self, blob_name: str) -> bool:
+        """Delete blob from disk"""
+        try:
+            os.remove(self.local_path(blob_name))
+            logger.info(f"Blob deleted: {blob_name}")
+            return True
+        except Exception as e:
+            logger.error(f"Blob deletion error: {e}")
+            return False
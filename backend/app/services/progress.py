@@ -0,0 +1,77 @@
+"""Pipeline Progress Reporting"""
+from app.database import SessionLocal
+from app.models.project import Project, ProjectStatus
+from app.services.websocket_manager import publish_progress
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One thread keeps the database and task-state writes in order and off the pipeline's event loop
+_record_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="progress-record")
+
+class ProgressReporter:
+    """Records a project's generation progress from the process running it.
+    
+    Progress is persisted on the Project row, published to Redis for the
+    project's WebSocket viewers in whichever API process they are
+    connected to and, when running inside a Celery task, recorded as the
+    task's PROGRESS state so that /status/task/{task_id} reflects each
+    finished pipeline stage.
+    
+    Reports arrive from inside the pipeline's event loop, so the blocking
+    writes go to a background thread; a report made outside the loop waits
+    for them, so a final status always lands after every earlier update.
+    """
+    
+    def __init__(self, project_id: int, task=None):
+        self.project_id = project_id
+        self.task = task
+    
+    def report(self, progress: int, status: str, message: str, **extra):
+        payload = {
+            "project_id": self.project_id,
+            "progress": progress,
+            "status": status,
+            "message": message,
+            "timestamp": str(datetime.datetime.now()),
+            **extra
+        }
+        
+        # The task id is read here: Celery's request context is per thread
+        task_id = self.task.request.id if self.task is not None else None
+        recorded = _record_executor.submit(self._record, progress, status, payload, task_id)
+        publish_progress(self.project_id, payload)
+        
+        logger.info(f"Project {self.project_id}: {progress}% {status} - {message}")
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            recorded.result()
+    
+    def _record(self, progress: int, status: str, payload: dict, task_id: str = None):
+        self._persist(progress, status)
+        if task_id:
+            try:
+                self.task.update_state(task_id=task_id, state="PROGRESS", meta=payload)
+            except Exception as e:
+                logger.error(f"Task state update error: {e}")
+    
+    def _persist(self, progress: int, status: str):
+        db = SessionLocal()
+        try:
+            values = {Project.progress: progress}
+            if status in ProjectStatus._value2member_map_:
+                values[Project.status] = ProjectStatus(status)
+            db.query(Project).filter(Project.id == self.project_id).update(
+                values,
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            logger.error(f"Progress update error: {e}")
+            db.rollback()
+        finally:
+            db.close()
@@ -0,0 +1,180 @@
+"""Progressive Stitching and Upload of the Final Video"""
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.utils.ffmpeg import FFMPEG_BINARY
+from app.core.tracing import span
+import asyncio
+import hashlib
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ProgressiveStitch:
+    """Builds and uploads the final MP4 while later scenes are still encoding.
+    
+    A single ffmpeg process muxes an MPEG-TS stream on its stdin into a
+    fragmented MP4 on its stdout. As soon as scenes finish in order, each
+    segment is remuxed (stream copy) to TS with its timestamps shifted to
+    its place in the video and piped in. The MP4 bytes that come out are
+    hashed, written to local disk (for HLS packaging) and staged as
+    upload blocks at the same time, so once the last scene is encoded
+    only its own bytes remain to upload.
+    
+    Fragmented MP4 carries an empty moov up front, so the file still
+    plays progressively without the +faststart rewrite.
+    """
+    
+    def __init__(self, storage, output_path: str, blob_name: str):
+        self.storage = storage
+        self.output_path = output_path
+        self.blob_name = blob_name
+        self.order: Optional[List[int]] = None
+        self.ready: Dict[int, Optional[Tuple[str, float]]] = {}
+        self.fed: List[int] = []
+        self.offset = 0.0
+        self.failed: Optional[Exception] = None
+        self._lock = asyncio.Lock()
+        self._process = None
+        self._pump_task = None
+        self._upload = None
+        self._hash = hashlib.sha256()
+        self._size = 0
+    
+    def set_order(self, scene_numbers: List[int]):
+        """Fix the scene order once the script is known (scenes are otherwise numbered 1, 2, ...)"""
+        self.order = list(scene_numbers)
+    
+    def _next_scene(self) -> Optional[int]:
+        if self.order is not None:
+            remaining = [number for number in self.order if number not in self.fed]
+            return remaining[0] if remaining else None
+        return (self.fed[-1] + 1) if self.fed else 1
+    
+    async def add_scene(self, scene_number: int, segment_path: Optional[str], duration: float = None):
+        """Record a finished (or, with no path, failed) scene and feed every scene now in order"""
+        async with self._lock:
+            self.ready[scene_number] = (segment_path, duration) if segment_path else None
+            await self._advance()
+    
+    async def finish(self, segments: Dict[int, Tuple[str, float]]) -> dict:
+        """Feed the scenes still missing, close the stream and commit the upload.
+        
+        segments maps every rendered scene to its (path, duration); returns
+        the local path, URL, SHA-256 and size of the finished video.
+        """
+        async with self._lock:
+            for scene_number, segment in segments.items():
+                self.ready.setdefault(scene_number, segment)
+            self.set_order(sorted(self.ready))
+            await self._advance()
+            if self.failed:
+                raise self.failed
+            if self._process is None:
+                raise RuntimeError("No segments were stitched")
+            
+            with span("stitch.progressive", segments=len(self.fed)) as current:
+                self._process.stdin.close()
+                await self._process.wait()
+                await self._pump_task
+                if self._process.returncode != 0:
+                    raise RuntimeError(f"Stitcher exited with {self._process.returncode}")
+                file_url = await self._upload.commit()
+                current.set(bytes=self._size)
+        
+        return {
+            "path": self.output_path,
+            "file_url": file_url,
+            "blob_name": self.blob_name,
+            "sha256": self._hash.hexdigest(),
+            "size": self._size
+        }
+    
+    async def abort(self):
+        """Stop the stitcher and discard the partial upload and file"""
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        if self._pump_task is not None:
+            await asyncio.gather(self._pump_task, return_exceptions=True)
+        if self._upload is not None:
+            await self._upload.abort()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+    
+    async def _advance(self):
+        """Feed every scene that continues the stitched prefix; caller holds the lock"""
+        while not self.failed:
+            number = self._next_scene()
+            if number is None or number not in self.ready:
+                return
+            segment = self.ready[number]
+            try:
+                if segment is not None:
+                    await self._feed(*segment)
+            except Exception as e:
+                # The stitch node falls back to a regular concat
+                logger.error(f"Progressive stitch error at scene {number}: {e}")
+                self.failed = e
+                return
+            self.fed.append(number)
+    
+    async def _start(self):
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        self._upload = await self.storage.open_upload(self.blob_name)
+        self._process = await asyncio.create_subprocess_exec(
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+            "-f", "mpegts", "-i", "pipe:0",
+            "-map", "0",
+            "-c", "copy",
+            "-bsf:a", "aac_adtstoasc",
+            "-f", "mp4",
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE
+        )
+        self._pump_task = asyncio.create_task(self._pump())
+    
+    async def _pump(self):
+        """Copy the stitcher's output to the hash, the local file and the upload"""
+        block_size = settings.AZURE_UPLOAD_BLOCK_SIZE
+        with open(self.output_path, "wb") as f:
+            while True:
+                chunk = await self._process.stdout.read(block_size)
+                if not chunk:
+                    break
+                self._hash.update(chunk)
+                self._size += len(chunk)
+                await asyncio.to_thread(f.write, chunk)
+                await self._upload.write(chunk)
+    
+    async def _feed(self, segment_path: str, duration: float):
+        """Remux one segment to TS at its offset in the video and pipe it to the stitcher"""
+        if self._process is None:
+            await self._start()
+        
+        remux = await asyncio.create_subprocess_exec(
+            FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+            "-i", segment_path,
+            "-map", "0",
+            "-c", "copy",
+            "-bsf:v", "h264_mp4toannexb",
+            "-output_ts_offset", f"{self.offset:.6f}",
+            # Keep timestamps exactly where the offset puts them
+            "-muxdelay", "0",
+            "-muxpreload", "0",
+            "-f", "mpegts",
+            "pipe:1",
+            stdout=asyncio.subprocess.PIPE
+        )
+        while True:
+            chunk = await remux.stdout.read(256 * 1024)
+            if not chunk:
+                break
+            self._process.stdin.write(chunk)
+            await self._process.stdin.drain()
+        
+        if await remux.wait() != 0:
+            raise RuntimeError(f"Remux of {segment_path} exited with {remux.returncode}")
+        self.offset += duration
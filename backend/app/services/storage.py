@@ -0,0 +1,21 @@
+"""Storage Backend Selection"""
+from app.config import settings
+
+_storage_service = None
+
+def get_storage_service():
+    """Return the process's storage service (Azure Blob or local filesystem).
+    
+    Built once: the Azure client checks its container over the network
+    when constructed, which must not happen on every request.
+    """
+    global _storage_service
+    if _storage_service is None:
+        if settings.STORAGE_BACKEND == "local":
+            from app.services.local_storage import LocalStorageService
+            _storage_service = LocalStorageService()
+        else:
+            from app.services.azure_storage import AzureStorageService
+            _storage_service = AzureStorageService()
+    return _storage_service
+    
\ No newline at end of file
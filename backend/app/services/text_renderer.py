@@ -0,0 +1,120 @@
+"""In-Process Text Overlay Renderer"""
+from functools import lru_cache
+from typing import List, Tuple
+from PIL import Image, ImageDraw, ImageFont, features
+from app.config import settings
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=64)
+def load_font(name: str, size: int):
+    """TrueType font by file name or path, falling back to Pillow's built-in font"""
+    # Raqm shapes Devanagari, Tamil and Telugu; basic layout only kerns Latin-style scripts
+    layout = ImageFont.Layout.RAQM if features.check("raqm") else ImageFont.Layout.BASIC
+    try:
+        return ImageFont.truetype(name, size, layout_engine=layout)
+    except OSError:
+        logger.warning(f"Font {name} not found, using Pillow's default")
+        return ImageFont.load_default(size)
+
+@lru_cache(maxsize=1024)
+def _line(font_name: str, size: int, line: str) -> Tuple[np.ndarray, int, int]:
+    """Coverage mask of a whole shaped, kerned line with its offset from the pen position"""
+    font = load_font(font_name, size)
+    left, top, right, bottom = font.getbbox(line)
+    if right <= left or bottom <= top:
+        return np.zeros((0, 0), dtype=np.uint8), 0, 0
+    
+    image = Image.new("L", (right - left, bottom - top))
+    ImageDraw.Draw(image).text((-left, -top), line, font=font, fill=255)
+    return np.asarray(image), left, top
+
+@lru_cache(maxsize=8192)
+def _text_width(font_name: str, size: int, text: str) -> float:
+    return load_font(font_name, size).getlength(text)
+
+def wrap_text(text: str, font_name: str, size: int, max_width: int) -> List[str]:
+    """Greedy word wrap measured with cached word widths"""
+    space = _text_width(font_name, size, " ")
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        current, width = [], 0.0
+        for word in paragraph.split():
+            word_width = _text_width(font_name, size, word)
+            if current and width + space + word_width > max_width:
+                lines.append(" ".join(current))
+                current, width = [word], word_width
+            else:
+                width += (space if current else 0) + word_width
+                current.append(word)
+        lines.append(" ".join(current))
+    return lines
+
+def _draw_line(mask: np.ndarray, line: str, font_name: str, size: int, x: float, line_top: int):
+    """Stamp a cached line raster into a coverage mask"""
+    height, width = mask.shape
+    glyphs, left, top = _line(font_name, size, line)
+    if not glyphs.size:
+        return
+    gx, gy = int(round(x)) + left, line_top + top
+    x0, y0 = max(gx, 0), max(gy, 0)
+    x1, y1 = min(gx + glyphs.shape[1], width), min(gy + glyphs.shape[0], height)
+    if x1 > x0 and y1 > y0:
+        region = mask[y0:y1, x0:x1]
+        np.maximum(region, glyphs[y0 - gy:y1 - gy, x0 - gx:x1 - gx], out=region)
+
+def render_text(
+    text: str,
+    font_name: str,
+    size: int,
+    max_width: int,
+    max_lines: int = None,
+    color: Tuple[int, int, int] = (255, 255, 255),
+    shadow: Tuple[int, int, int] = (0, 0, 0),
+    shadow_offset: int = 2,
+    line_spacing: float = 1.25
+) -> np.ndarray:
+    """Word-wrapped, centered caption as an RGBA array (height x max_width x 4).
+    
+    Each line is shaped and rasterized as a whole, so kerning and complex
+    scripts render correctly, and cached per font, size and text, since
+    the same captions recur across re-renders. A drop shadow keeps the
+    text legible over light and dark backgrounds alike.
+    """
+    lines = wrap_text(text, font_name, size, max_width)
+    if max_lines and len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = lines[-1].rstrip(". ") + "..."
+    
+    ascent, descent = load_font(font_name, size).getmetrics()
+    line_height = int(size * line_spacing)
+    height = line_height * (len(lines) - 1) + ascent + descent + shadow_offset
+    
+    coverage = np.zeros((height, max_width), dtype=np.uint8)
+    for i, line in enumerate(lines):
+        x = (max_width - shadow_offset - _text_width(font_name, size, line)) / 2
+        _draw_line(coverage, line, font_name, size, x, i * line_height)
+    
+    text_alpha = coverage.astype(np.float32) / 255
+    shadow_alpha = np.zeros_like(text_alpha)
+    if shadow_offset:
+        shadow_alpha[shadow_offset:, shadow_offset:] = text_alpha[:-shadow_offset, :-shadow_offset]
+    
+    # Text over its shadow, both over transparency
+    alpha = text_alpha + shadow_alpha * (1 - text_alpha)
+    weight = np.divide(text_alpha, alpha, out=np.zeros_like(alpha), where=alpha > 0)[..., None]
+    rgb = np.asarray(color, dtype=np.float32) * weight + np.asarray(shadow, dtype=np.float32) * (1 - weight)
+    
+    return np.dstack([rgb, alpha * 255]).round().astype(np.uint8)
+
+def render_caption(text: str, frame_width: int, frame_height: int) -> np.ndarray:
+    """Scene caption sized relative to a 1080p frame: 40px type in a 1600px column"""
+    return render_text(
+        text,
+        settings.TEXT_OVERLAY_FONT,
+        size=max(12, frame_height * 40 // 1080),
+        max_width=frame_width * 1600 // 1920,
+        max_lines=settings.TEXT_OVERLAY_MAX_LINES
+    )
@@ -1,145 +1,569 @@
 """Video Rendering Service using MoviePy"""
 from moviepy.editor import (
-    VideoFileClip, ImageClip, TextClip, AudioFileClip,
+    VideoFileClip, ImageClip, AudioFileClip, AudioClip,
     CompositeVideoClip, concatenate_videoclips
 )
 from app.services.azure_speech import AzureSpeechService
-from app.services.azure_storage import AzureStorageService
+from app.services.storage import get_storage_service
+from app.services.asset_store import AssetStore
+from app.services.text_renderer import render_caption
+from app.services import ffmpeg_renderer, hls_packager
+from app.core.process_pools import get_process_pool
+from app.utils.ffmpeg import concat_segments
+from app.utils.file_cache import FileCache
+from app.utils.helpers import stable_hash, file_hash
+from app.core.tracing import span
+from app.config import settings
+from dataclasses import dataclass, asdict
+import asyncio
+import uuid
 import os
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Bump when scene rendering changes so stale cached segments are not reused
+SEGMENT_VERSION = 4
+
+_segment_cache = None
+
+def get_segment_cache() -> FileCache:
+    """Process-wide cache of rendered scene segments, keyed by fingerprint"""
+    global _segment_cache
+    if _segment_cache is None:
+        _segment_cache = FileCache(settings.SEGMENT_CACHE_DIR, settings.SEGMENT_CACHE_MAX_BYTES, ".mp4")
+    return _segment_cache
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """Encoding parameters shared by every segment of a render"""
+    width: int = 1920
+    height: int = 1080
+    fps: int = 24
+    codec: str = "libx264"
+    preset: str = "medium"
+    crf: int = 23
+    audio_codec: str = "aac"
+    audio_bitrate: str = "128k"
+    audio_fps: int = 44100
+    
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+    
+    @property
+    def gop(self) -> int:
+        """Frames between keyframes, capped so live HLS chunks can be cut at their target length"""
+        seconds = settings.FFMPEG_GOP_SECONDS
+        if settings.LIVE_HLS_ENABLED:
+            seconds = min(seconds, settings.LIVE_HLS_CHUNK_SECONDS)
+        return max(1, int(self.fps * seconds))
+    
+    def write_params(self) -> dict:
+        """Keyword arguments for MoviePy's write_videofile"""
+        return {
+            "fps": self.fps,
+            "codec": self.codec,
+            "preset": self.preset,
+            "audio_codec": self.audio_codec,
+            "audio_bitrate": self.audio_bitrate,
+            "audio_fps": self.audio_fps,
+            # Mono narration is upmixed so every segment has identical audio parameters
+            "ffmpeg_params": ["-crf", str(self.crf), "-pix_fmt", "yuv420p", "-ac", "2", "-g", str(self.gop)]
+        }
+
+# Quick preview: a fraction of the pixels and frames, encoded as fast as x264 allows
+DRAFT_PROFILE = RenderProfile(
+    width=640,
+    height=360,
+    fps=12,
+    preset="ultrafast",
+    crf=30,
+    audio_bitrate="64k"
+)
+
+QUALITY_SIZES = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+}
+
+def render_profile(config: dict) -> RenderProfile:
+    """Encoding profile for a job's render_mode ('final' or 'draft') and quality"""
+    config = config or {}
+    mode = config.get("render_mode") or "final"
+    if mode not in ("final", "draft"):
+        raise ValueError(f"Unknown render mode: {mode}")
+    if mode == "draft":
+        return DRAFT_PROFILE
+    
+    quality = config.get("quality") or settings.DEFAULT_VIDEO_QUALITY
+    if quality not in QUALITY_SIZES:
+        raise ValueError(f"Unsupported quality: {quality}")
+    width, height = QUALITY_SIZES[quality]
+    return RenderProfile(width=width, height=height)
+
+def _as_profile(profile) -> RenderProfile:
+    """A RenderProfile, from either the dataclass or its asdict() form"""
+    return profile if isinstance(profile, RenderProfile) else RenderProfile(**profile)
+
+def _default_background(duration: float, profile: RenderProfile) -> ImageClip:
+    """Create default background clip"""
+    # Create a simple colored background
+    from PIL import Image
+    import numpy as np
+    
+    img = Image.new('RGB', (profile.width, profile.height), color=(30, 30, 50))
+    img_array = np.array(img)
+    
+    return ImageClip(img_array).set_duration(duration)
+
+def _text_overlay(text: str, duration: float, profile: RenderProfile) -> Optional[ImageClip]:
+    """Create text overlay"""
+    if not text:
+        return None
+    
+    overlay = render_caption(text, profile.width, profile.height)
+    return ImageClip(overlay).set_position(('center', 'bottom')).set_duration(duration)
+
+def build_scene_clip(
+    image_path: Optional[str],
+    audio_path: str,
+    text: str,
+    duration: float,
+    profile: RenderProfile
+) -> CompositeVideoClip:
+    """Build one scene at the profile's frame size so segments stay uniform"""
+    layers = [_default_background(duration, profile)]
+    
+    if image_path:
+        image_clip = ImageClip(image_path)
+        scale = min(profile.width / image_clip.w, profile.height / image_clip.h)
+        if scale != 1:
+            # Diagrams rendered for this profile already match; other sizes and images are resampled
+            image_clip = image_clip.resize(scale)
+        layers.append(image_clip.set_position("center").set_duration(duration))
+    
+    text_clip = _text_overlay(text, duration, profile)
+    if text_clip is not None:
+        layers.append(text_clip)
+    
+    video = CompositeVideoClip(layers, size=(profile.width, profile.height))
+    
+    if audio_path and os.path.exists(audio_path):
+        audio = AudioFileClip(audio_path)
+        if audio.duration > duration:
+            audio = audio.subclip(0, duration)
+        video = video.set_audio(audio)
+    else:
+        # Keep a stereo audio stream in every segment so they concatenate without re-encoding
+        video = video.set_audio(AudioClip(lambda t: [0 * t, 0 * t], duration=duration, fps=profile.audio_fps))
+    
+    return video
+
+def _temp_audio_path(output_path: str) -> str:
+    return f"{os.path.splitext(output_path)[0]}_audio.m4a"
+
+def render_segment(job: dict) -> str:
+    """Encode one scene to its own file (runs in a worker process)"""
+    profile = job["profile"]
+    clip = build_scene_clip(
+        job["image_path"],
+        job["audio_path"],
+        job["text"],
+        job["duration"],
+        profile
+    )
+    try:
+        clip.write_videofile(
+            job["output_path"],
+            threads=1,
+            logger=None,
+            # Beside the segment: MoviePy's default is the shared CWD, named only by the segment's basename
+            temp_audiofile=_temp_audio_path(job["output_path"]),
+            **profile.write_params()
+        )
+    finally:
+        clip.close()
+    return job["output_path"]
+
 class VideoComposer:
-    def __init__(self):
-        self.speech_service = AzureSpeechService()
-        self.storage_service = AzureStorageService()
+    def __init__(self, speech_service=None, storage_service=None):
+        self.speech_service = speech_service or AzureSpeechService()
+        self.storage_service = storage_service or get_storage_service()
+        self.asset_store = AssetStore(self.storage_service)
         self.output_dir = "temp/videos"
+        self.tts_semaphore = asyncio.Semaphore(settings.TTS_MAX_CONCURRENCY)
         os.makedirs(self.output_dir, exist_ok=True)
     
+    def new_job_dir(self) -> str:
+        """Working directory for one render, so concurrent jobs never collide"""
+        job_dir = os.path.join(self.output_dir, uuid.uuid4().hex)
+        os.makedirs(job_dir, exist_ok=True)
+        return job_dir
+    
     async def compose(
         self, 
         script: dict, 
         assets: List[Dict],
-        visual_plan: dict
-    ) -> str:
-        """Compose final video from script and assets"""
+        visual_plan: dict,
+        config: dict = None,
+        project_id: int = None
+    ) -> dict:
+        """Compose final video from script and assets; returns its video_url and hls_url"""
         try:
-            clips = []
+            job_dir = self.new_job_dir()
+            config = {"transitions": (visual_plan or {}).get("transitions"), **(config or {})}
+            scenes = script.get("scenes", [])
+            parallel = config.get("parallel_render", settings.VIDEO_PARALLEL_RENDER)
             
-            for scene in script.get("scenes", []):
-                scene_clip = await self._create_scene_clip(scene, assets)
-                if scene_clip:
-                    clips.append(scene_clip)
+            if not scenes:
+                raise Exception("No clips generated")
             
-            # Concatenate all clips
-            if clips:
-                final_video = concatenate_videoclips(clips, method="compose")
-                
-                # Export video
-                output_filename = f"video_{os.urandom(8).hex()}.mp4"
-                output_path = os.path.join(self.output_dir, output_filename)
-                
-                final_video.write_videofile(
-                    output_path,
-                    fps=24,
-                    codec='libx264',
-                    audio_codec='aac'
-                )
-                
-                # Upload to Azure Storage
-                blob_url = await self.storage_service.upload_file(
-                    output_path,
-                    output_filename
+            if parallel:
+                # Every scene runs its own narration -> encode pipeline
+                results = await asyncio.gather(
+                    *(self.render_scene(scene, assets, config, job_dir) for scene in scenes),
+                    return_exceptions=True
                 )
-                
-                logger.info(f"Video composed and uploaded: {blob_url}")
-                return blob_url
-            
-            raise Exception("No clips generated")
+                jobs = []
+                for scene, result in zip(scenes, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Scene {scene['scene_number']} render failed: {result}")
+                        continue
+                    jobs.append(result)
+                return await self.stitch(jobs, project_id)
             
+            profile = render_profile(config)
+            voice = self._voice_settings(config)
+            jobs = [self._scene_job(scene, assets, job_dir, profile, voice, config) for scene in scenes]
+            output_path = os.path.join(self.output_dir, f"video_{os.urandom(8).hex()}.mp4")
+            jobs = await self._generate_all_audio(jobs)
+            if self._backend(config) == "ffmpeg":
+                await self._render_timeline_ffmpeg(jobs, output_path, profile)
+            else:
+                await self._render_single(jobs, output_path, profile)
+            return await self._publish_all(output_path, jobs, project_id)
+        
         except Exception as e:
             logger.error(f"Video composition error: {e}")
             raise
     
-    async def _create_scene_clip(
-        self, 
-        scene: dict, 
-        assets: List[Dict]
-    ) -> VideoFileClip:
-        """Create a video clip for a single scene"""
-        try:
-            duration = scene.get("duration", 5)
-            narration = scene.get("narration", "")
-            
-            # Generate audio
-            audio_path = await self._generate_audio(narration, scene["scene_number"])
-            
-            # Find matching visual asset
-            scene_assets = [
-                a for a in assets 
-                if a.get("scene_number") == scene["scene_number"]
-            ]
-            
-            if scene_assets:
-                # Use first matching asset
-                asset = scene_assets[0]
-                image_clip = ImageClip(asset["path"]).set_duration(duration)
+    async def render_scene(
+        self,
+        scene: dict,
+        assets: List[Dict],
+        config: dict = None,
+        job_dir: str = None
+    ) -> dict:
+        """Narrate and encode a single scene into its own segment.
+        
+        A segment whose fingerprint is already cached is reused without
+        synthesis or encoding. Returns the scene's render job, whose
+        output_path is ready for stitch().
+        """
+        config = config or {}
+        job = self._scene_job(
+            scene,
+            assets,
+            job_dir or self.new_job_dir(),
+            render_profile(config),
+            self._voice_settings(config),
+            config
+        )
+        
+        with span("render.segment_cache", scene_number=job["scene_number"]) as current:
+            restored = self._restore_segment(job)
+            current.set(cache_hit=restored)
+        if restored:
+            logger.info(f"Reusing cached segment for scene {job['scene_number']}")
+            return job
+        
+        async with self.tts_semaphore:
+            await self._generate_audio(job["narration"], job["audio_path"], job["voice"])
+        
+        profile = job["profile"]
+        with span(
+            "render.segment",
+            scene_number=job["scene_number"],
+            backend=job["backend"],
+            duration=job["duration"],
+            fps=profile.fps,
+            resolution=f"{profile.width}x{profile.height}"
+        ) as current:
+            if job["backend"] == "ffmpeg":
+                # ffmpeg does the per-frame work in its own process; no render worker needed
+                path = await ffmpeg_renderer.render([job], job["output_path"])
             else:
-                # Create default background
-                image_clip = self._create_default_background(duration)
-            
-            # Add text overlay
-            text_clip = self._create_text_overlay(
-                scene.get("key_points", [""])[0] if scene.get("key_points") else "",
-                duration
+                loop = asyncio.get_running_loop()
+                pool = get_process_pool("render", settings.RENDER_WORKERS)
+                path = await loop.run_in_executor(pool, render_segment, job)
+            current.set(bytes=os.path.getsize(path))
+        job["rendered"] = True
+        await asyncio.to_thread(get_segment_cache().put, job["fingerprint"], path)
+        return job
+    
+    async def stitch(self, jobs: List[Dict], project_id: int = None, progressive=None) -> dict:
+        """Join rendered scene segments, in scene order, into the final video; returns its video_url and hls_url.
+        
+        Jobs may come back from a checkpoint, with the profile serialized
+        as a dict; each needs scene_number, fingerprint, output_path,
+        duration and profile. With a ProgressiveStitch that has been fed
+        the scenes as they finished, most of the video is already uploaded;
+        if it fails, the segments are concatenated and uploaded as usual.
+        """
+        jobs = sorted(
+            (
+                {**job, "profile": _as_profile(job["profile"])}
+                for job in jobs if job and job.get("rendered")
+            ),
+            key=lambda job: job["scene_number"]
+        )
+        if not jobs:
+            raise Exception("No clips generated")
+        
+        missing = await asyncio.to_thread(self.missing_segments, jobs)
+        if missing:
+            raise Exception(f"Segments for scenes {missing} are no longer cached")
+        
+        if progressive is not None:
+            try:
+                stitched = await progressive.finish({
+                    job["scene_number"]: (job["output_path"], job["duration"]) for job in jobs
+                })
+            except Exception as e:
+                logger.error(f"Progressive stitch failed, concatenating instead: {e}")
+                await progressive.abort()
+            else:
+                return await self._publish_all(stitched["path"], jobs, project_id, stitched)
+        
+        output_path = os.path.join(self.output_dir, f"video_{os.urandom(8).hex()}.mp4")
+        with span("ffmpeg.concat", segments=len(jobs)) as current:
+            await concat_segments([job["output_path"] for job in jobs], output_path)
+            current.set(bytes=os.path.getsize(output_path))
+        return await self._publish_all(output_path, jobs, project_id)
+    
+    async def _publish_all(self, output_path: str, jobs: List[Dict], project_id: int = None, uploaded: dict = None) -> dict:
+        """Upload the MP4 (unless already uploaded) and, for final renders, its HLS ladder side by side"""
+        profile = jobs[0]["profile"]
+        if not settings.HLS_ENABLED or profile == DRAFT_PROFILE:
+            return {"video_url": await self._publish(output_path, project_id, uploaded), "hls_url": None}
+        
+        video_url, hls_url = await asyncio.gather(
+            self._publish(output_path, project_id, uploaded),
+            self._package_hls(output_path, jobs, profile)
+        )
+        return {"video_url": video_url, "hls_url": hls_url}
+    
+    async def _package_hls(self, output_path: str, jobs: List[Dict], profile: RenderProfile) -> Optional[str]:
+        """Encode and upload the adaptive ladder; a packaging failure leaves the MP4 usable"""
+        hls_dir = os.path.splitext(output_path)[0] + "_hls"
+        try:
+            await hls_packager.package(
+                output_path,
+                [job["duration"] for job in jobs],
+                profile.height,
+                hls_dir,
+                profile.fps
             )
-            
-            # Combine visual and text
-            video = CompositeVideoClip([image_clip, text_clip])
-            
-            # Add audio
-            if os.path.exists(audio_path):
-                audio = AudioFileClip(audio_path)
-                video = video.set_audio(audio)
-            
-            return video
-            
+            return await hls_packager.publish(self.storage_service, hls_dir, f"hls/{os.path.basename(hls_dir)}")
         except Exception as e:
-            logger.error(f"Scene clip creation error: {e}")
+            logger.error(f"HLS packaging error: {e}")
             return None
     
-    async def _generate_audio(self, text: str, scene_number: int) -> str:
-        """Generate audio for narration"""
-        audio_filename = f"audio_scene_{scene_number}.wav"
-        audio_path = os.path.join(self.output_dir, audio_filename)
+    async def _publish(self, output_path: str, project_id: int = None, uploaded: dict = None) -> str:
+        """Upload through the asset store so identical renders are stored once"""
+        if uploaded is not None:
+            stored = await self.asset_store.put_uploaded(
+                uploaded["sha256"],
+                uploaded["size"],
+                uploaded["blob_name"],
+                uploaded["file_url"],
+                "video",
+                project_id
+            )
+        else:
+            stored = await self.asset_store.put(output_path, "video", project_id)
+        blob_url = stored["file_url"]
         
-        await self.speech_service.text_to_speech(text, audio_path)
-        return audio_path
+        logger.info(f"Video composed and uploaded: {blob_url}")
+        return blob_url
     
-    def _create_default_background(self, duration: int) -> ImageClip:
-        """Create default background clip"""
-        # Create a simple colored background
-        from PIL import Image
-        import numpy as np
+    def _scene_job(
+        self, 
+        scene: dict, 
+        assets: List[Dict],
+        job_dir: str,
+        profile: RenderProfile,
+        voice: dict,
+        config: dict = None
+    ) -> dict:
+        """Collect the picklable inputs needed to render one scene"""
+        # Find matching visual asset
+        scene_assets = [
+            a for a in assets 
+            if a.get("scene_number") == scene["scene_number"]
+        ]
         
-        img = Image.new('RGB', (1920, 1080), color=(30, 30, 50))
-        img_array = np.array(img)
+        # Use first matching asset, or the default background
+        image_path = scene_assets[0]["path"] if scene_assets else None
+        narration = " ".join(scene.get("narration", "").split())
+        text = scene.get("key_points", [""])[0] if scene.get("key_points") else ""
+        duration = scene.get("duration", 5)
+        backend = self._backend(config or {})
+        # Only the ffmpeg backend draws transitions
+        transition = (config or {}).get("transitions") if backend == "ffmpeg" else None
         
-        return ImageClip(img_array).set_duration(duration)
+        fingerprint = stable_hash(
+            SEGMENT_VERSION,
+            narration,
+            voice,
+            file_hash(image_path) if image_path and os.path.exists(image_path) else image_path,
+            text,
+            duration,
+            asdict(profile),
+            backend,
+            transition
+        )
+        
+        return {
+            "scene_number": scene["scene_number"],
+            "fingerprint": fingerprint,
+            "narration": narration,
+            "voice": voice,
+            "image_path": image_path,
+            "audio_path": os.path.join(job_dir, f"audio_scene_{scene['scene_number']}.wav"),
+            "text": text,
+            "duration": duration,
+            "output_path": os.path.join(job_dir, f"segment_{scene['scene_number']:04d}.mp4"),
+            "profile": profile,
+            "backend": backend,
+            "transition": transition
+        }
     
-    def _create_text_overlay(self, text: str, duration: int) -> TextClip:
-        """Create text overlay"""
-        if not text:
-            # Return transparent clip
-            return TextClip("", fontsize=1, color='white').set_duration(duration)
+    def scene_fingerprints(self, script: dict, assets: List[Dict], config: dict = None) -> Dict[int, str]:
+        """Fingerprint of every scene's rendered segment, keyed by scene number"""
+        config = config or {}
+        voice = self._voice_settings(config)
+        return {
+            job["scene_number"]: job["fingerprint"]
+            for job in (
+                self._scene_job(scene, assets, "", render_profile(config), voice, config)
+                for scene in script.get("scenes", [])
+            )
+        }
+    
+    def missing_segments(self, jobs: List[Dict]) -> List[int]:
+        """Scene numbers of rendered jobs whose segment is neither on disk nor still cached.
         
-        return TextClip(
-            text,
-            fontsize=40,
-            color='white',
-            font='Arial',
-            size=(1600, None),
-            method='caption'
-        ).set_position(('center', 'bottom')).set_duration(duration)
+        Segments from a resumed run may live only in the segment cache, and
+        may have been evicted from it since; those scenes must be rendered
+        again before stitching.
+        """
+        return [
+            job["scene_number"] for job in jobs
+            if job and job.get("rendered")
+            and not os.path.exists(job["output_path"])
+            and get_segment_cache().fetch(job["fingerprint"], job["output_path"]) is None
+        ]
+    
+    def _restore_segment(self, job: dict) -> bool:
+        """Copy a previously rendered segment with the same fingerprint into the job"""
+        if get_segment_cache().fetch(job["fingerprint"], job["output_path"]) is None:
+            return False
+        job["rendered"] = True
+        return True
+    
+    async def _render_single(self, jobs: List[Dict], output_path: str, profile: RenderProfile) -> str:
+        """Render all scenes as one MoviePy timeline"""
+        clips = []
+        for job in jobs:
+            try:
+                clips.append(build_scene_clip(
+                    job["image_path"], job["audio_path"], job["text"], job["duration"], profile
+                ))
+            except Exception as e:
+                logger.error(f"Scene clip creation error: {e}")
+        
+        if not clips:
+            raise Exception("No clips generated")
+        
+        # Concatenate all clips
+        final_video = concatenate_videoclips(clips, method="compose")
+        
+        # Export video off the event loop
+        with span("render.timeline", scenes=len(clips), fps=profile.fps) as current:
+            await asyncio.to_thread(
+                final_video.write_videofile,
+                output_path,
+                temp_audiofile=_temp_audio_path(output_path),
+                **profile.write_params()
+            )
+            current.set(bytes=os.path.getsize(output_path))
+        return output_path
+    
+    async def _render_timeline_ffmpeg(self, jobs: List[Dict], output_path: str, profile: RenderProfile) -> str:
+        """Render all scenes as one ffmpeg filtergraph"""
+        if not jobs:
+            raise Exception("No clips generated")
+        
+        with span(
+            "render.timeline",
+            backend="ffmpeg",
+            scenes=len(jobs),
+            duration=sum(job["duration"] for job in jobs),
+            fps=profile.fps
+        ) as current:
+            await ffmpeg_renderer.render(jobs, output_path)
+            current.set(bytes=os.path.getsize(output_path))
+        return output_path
+    
+    @staticmethod
+    def _backend(config: dict) -> str:
+        """Render backend for a job: 'moviepy' or 'ffmpeg'"""
+        backend = config.get("render_backend") or settings.RENDER_BACKEND
+        if backend not in ("moviepy", "ffmpeg"):
+            raise ValueError(f"Unknown render backend: {backend}")
+        return backend
+    
+    @staticmethod
+    def _voice_settings(config: dict) -> dict:
+        """Resolve voice name and prosody from a project config"""
+        voice = config.get("voice") or {}
+        if isinstance(voice, str):
+            return {"voice_name": voice, "speed": 1.0, "pitch": 1.0}
+        
+        return {
+            "voice_name": voice.get("voice_name") or "en-US-JennyNeural",
+            "speed": voice.get("speed", 1.0),
+            "pitch": voice.get("pitch", 1.0)
+        }
+    
+    async def _generate_all_audio(self, jobs: List[Dict]) -> List[Dict]:
+        """Synthesize narration for the given scenes concurrently, bounded by TTS_MAX_CONCURRENCY"""
+        async def generate(job: dict) -> str:
+            async with self.tts_semaphore:
+                return await self._generate_audio(
+                    job["narration"],
+                    job["audio_path"],
+                    job["voice"]
+                )
+        
+        results = await asyncio.gather(
+            *(generate(job) for job in jobs),
+            return_exceptions=True
+        )
+        
+        ready = []
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Narration failed for scene {job['scene_number']}: {result}")
+                continue
+            ready.append(job)
+        return ready
+    
+    async def _generate_audio(self, text: str, audio_path: str, voice: dict) -> str:
+        """Generate audio for narration"""
+        await self.speech_service.text_to_speech(text, audio_path, **voice)
+        return audio_path
@@ -1,42 +1,171 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict
+from typing import Dict, Optional, Set
+from app.config import settings
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import json
 import logging
 import datetime
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+def progress_channel(client_id) -> str:
+    """Redis channel carrying one client's (project's) progress updates"""
+    return f"{settings.PROGRESS_CHANNEL_PREFIX}:{client_id}"
+
+_publisher = None
+# One thread keeps updates in order and off the caller's event loop
+_publish_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="progress-publish")
+
+def _publish(channel: str, data: str):
+    global _publisher
+    try:
+        if _publisher is None:
+            import redis
+            _publisher = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=2)
+        _publisher.publish(channel, data)
+    except Exception as e:
+        logger.error(f"Progress publish error on {channel}: {e}")
+
+def publish_progress(client_id, payload: dict):
+    """Publish a progress update from any process, e.g. a Celery worker.
+
+    Inside a running event loop the publish is handed to a background
+    thread, so an unreachable Redis never stalls the pipeline.
+    """
+    channel, data = progress_channel(client_id), json.dumps(payload, default=str)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        _publish(channel, data)
+        return
+    _publish_executor.submit(_publish, channel, data)
+
 class ConnectionManager:
-    """Handles WebSocket connections and message broadcasting."""
+    """Handles WebSocket connections and message broadcasting.
+
+    Updates are published to Redis rather than written to sockets, so they
+    may originate in any API or Celery process. Every API process holds a
+    single pattern subscription and delivers each message to the sockets it
+    accepted itself, so viewers can land on any worker without sticky
+    routing.
+    """
     def __init__(self):
-        # Using a dictionary to map client_id (str) to WebSocket
-        self.active_connections: Dict[str, WebSocket] = {}
+        # client_id (str) -> every local socket watching it
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._redis = None
+
+    async def start(self):
+        """Start this process's Redis subscription; called once at startup"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
-        self.active_connections[client_id] = websocket
+        self.active_connections.setdefault(client_id, set()).add(websocket)
         logger.info(f"WebSocket connected: {client_id}")
 
-    def disconnect(self, client_id: str):
-        """Removes a connection by client_id."""
-        if client_id in self.active_connections:
-            # Note: We don't need to close the socket here; it's closed by the exception handler.
+    def disconnect(self, client_id: str, websocket: WebSocket = None):
+        """Removes one socket, or every socket of client_id when none is given."""
+        sockets = self.active_connections.get(client_id)
+        if sockets is None:
+            return
+        # Note: We don't need to close the socket here; it's closed by the exception handler.
+        if websocket is None:
+            sockets.clear()
+        else:
+            sockets.discard(websocket)
+        if not sockets:
             del self.active_connections[client_id]
-            logger.info(f"WebSocket disconnected: {client_id}")
+        logger.info(f"WebSocket disconnected: {client_id}")
 
     async def send_progress(self, client_id: str, progress: int, status: str, message: str):
-        """Sends a JSON progress update to a specific client."""
-        if client_id in self.active_connections:
+        """Publishes a JSON progress update to a client's sockets in every process."""
+        payload = {
+            "progress": progress,
+            "status": status,
+            "message": message,
+            "timestamp": str(datetime.datetime.now())
+        }
+        try:
+            if self._redis is None:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.Redis.from_url(settings.REDIS_URL, socket_timeout=2)
+            await self._redis.publish(progress_channel(client_id), json.dumps(payload))
+        except Exception as e:
+            logger.error(f"Progress publish error for {client_id}: {e}")
+            # Without Redis, at least reach the sockets held here
+            await self.deliver(client_id, json.dumps(payload))
+
+    async def send_local(self, websocket: WebSocket, client_id: str, progress: int, status: str, message: str):
+        """Sends a JSON progress update to one socket held by this process."""
+        await self._send(websocket, client_id, json.dumps({
+            "progress": progress,
+            "status": status,
+            "message": message,
+            "timestamp": str(datetime.datetime.now())
+        }))
+
+    async def deliver(self, client_id: str, text: str):
+        """Writes an already-serialized message to every local socket of client_id."""
+        sockets = list(self.active_connections.get(client_id, ()))
+        if sockets:
+            await asyncio.gather(*(self._send(websocket, client_id, text) for websocket in sockets))
+
+    async def _send(self, websocket: WebSocket, client_id: str, text: str):
+        try:
+            # A stalled viewer must not hold up everyone else's updates
+            await asyncio.wait_for(websocket.send_text(text), settings.WS_SEND_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Error sending to {client_id}: {e}")
+            self.disconnect(client_id, websocket)
+
+    async def _listen(self):
+        """Relay published progress to local sockets, resubscribing if Redis drops"""
+        import redis.asyncio as aioredis
+
+        prefix = f"{settings.PROGRESS_CHANNEL_PREFIX}:"
+        backoff = 1
+        while True:
+            client = aioredis.Redis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
             try:
-                await self.active_connections[client_id].send_json({
-                    "progress": progress,
-                    "status": status,
-                    "message": message,
-                    "timestamp": str(datetime.datetime.now())
-                })
+                await pubsub.psubscribe(f"{prefix}*")
+                logger.info(f"Subscribed to {prefix}* progress updates")
+                backoff = 1
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    client_id = message["channel"].decode()[len(prefix):]
+                    # Most updates are for viewers connected to other processes
+                    if client_id in self.active_connections:
+                        await self.deliver(client_id, message["data"].decode())
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Error sending to {client_id}: {e}")
-                self.disconnect(client_id)
+                logger.error(f"Progress subscription error: {e}; retrying in {backoff}s")
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
 
 # Initialize the single manager instance for use across the application
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,45 @@
+"""FFmpeg Command Helpers"""
+from typing import List
+import asyncio
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+async def run_ffmpeg(args: List[str]) -> None:
+    """Run ffmpeg without blocking the event loop"""
+    process = await asyncio.create_subprocess_exec(
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip()
+        logger.error(f"ffmpeg failed ({process.returncode}): {message}")
+        raise RuntimeError(f"ffmpeg failed: {message}")
+
+async def concat_segments(segment_paths: List[str], output_path: str) -> str:
+    """Join segments with identical codec parameters without re-encoding"""
+    list_path = f"{output_path}.txt"
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    
+    try:
+        await run_ffmpeg([
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path
+        ])
+    finally:
+        os.remove(list_path)
+    
+    return output_path
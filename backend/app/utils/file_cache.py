@@ -0,0 +1,222 @@
+"""Content-Addressed File Cache"""
+from typing import Optional
+import os
+import shutil
+import sqlite3
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hit/miss/eviction counters, kept beside the entries (which live in key[:2] subdirectories)
+STATS_FILE = "stats.db"
+
+class FileCache:
+    """Directory of files addressed by key, bounded by a disk budget.
+    
+    Writes go to a temp file in the cache directory and are published with
+    os.replace, so concurrent workers never observe a partial entry. A hit
+    bumps the file's mtime, which is what LRU eviction orders on.
+    
+    Another process may evict an entry at any moment, so a lookup
+    materializes it in the same step (fetch) and a writer gets its copy
+    before publishing (commit with dest_path). Counters, including the
+    total size, are kept in a SQLite file in the cache directory so every
+    worker process sees the same numbers and the budget holds across all
+    of them.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int, extension: str = ""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        os.makedirs(self.directory, exist_ok=True)
+        self._stats_path = os.path.join(self.directory, STATS_FILE)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            if conn.execute("SELECT 1 FROM counters WHERE name = 'bytes'").fetchone() is None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO counters (name, value) VALUES ('bytes', ?)",
+                    (sum(size for _, size, _ in self._scan()),)
+                )
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._stats_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+    
+    def _increment(self, name: str, amount: int = 1):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, amount)
+                )
+        except sqlite3.Error as e:
+            # Statistics are best effort; never fail a lookup over them
+            logger.warning(f"File cache stats update error: {e}")
+    
+    def _add_size(self, amount: int) -> Optional[int]:
+        """Adjust the shared size total; returns the new total, or None if it could not be read"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO counters (name, value) VALUES ('bytes', ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (amount,)
+                )
+                return conn.execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning(f"File cache size update error: {e}")
+            return None
+    
+    def _set_size(self, size: int):
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO counters (name, value) VALUES ('bytes', ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                    (size,)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"File cache size update error: {e}")
+    
+    def path_for(self, key: str) -> str:
+        """Location of the entry for key (whether or not it exists)"""
+        return os.path.join(self.directory, key[:2], f"{key}{self.extension}")
+    
+    def fetch(self, key: str, dest_path: str) -> Optional[str]:
+        """Materialize the entry for key at dest_path and return it, or None on miss.
+        
+        An entry evicted between the lookup and the copy is a miss too: the
+        hard link (or the open copy source) keeps the bytes alive once the
+        lookup has succeeded.
+        """
+        src_path = self.path_for(key)
+        try:
+            self._materialize(src_path, dest_path)
+        except FileNotFoundError:
+            self._increment("misses")
+            return None
+        
+        try:
+            os.utime(src_path)
+        except FileNotFoundError:
+            pass
+        self._increment("hits")
+        return dest_path
+    
+    @staticmethod
+    def _materialize(src_path: str, dest_path: str):
+        """Hard-link src_path at dest_path, copying where a link is not possible"""
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(src_path, dest_path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copyfile(src_path, dest_path)
+    
+    def reserve(self) -> str:
+        """Temp path inside the cache directory for a writer to fill"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=f".tmp{self.extension}")
+        os.close(fd)
+        return tmp_path
+    
+    def commit(self, key: str, tmp_path: str, dest_path: str = None) -> str:
+        """Atomically publish a reserved temp file under key.
+        
+        With dest_path, the writer's own copy is materialized there first,
+        so eviction by another process cannot take it away; returns
+        dest_path in that case, else the entry's path.
+        """
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if dest_path is not None:
+            self._materialize(tmp_path, dest_path)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        
+        self._evict(self._add_size(size))
+        return dest_path or path
+    
+    def put(self, key: str, src_path: str) -> str:
+        """Copy an existing file into the cache under key"""
+        tmp_path = self.reserve()
+        try:
+            shutil.copyfile(src_path, tmp_path)
+            return self.commit(key, tmp_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _scan(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if ".tmp" in name or name.startswith(STATS_FILE):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def _evict(self, total: Optional[int] = None):
+        """Drop least-recently-used entries until the cache fits its budget.
+        
+        total is the shared running size; only when it says the budget is
+        exceeded (or is unknown) is the directory scanned, which also
+        corrects any drift, e.g. from entries overwritten under the same key.
+        """
+        if total is not None and total <= self.max_bytes:
+            return
+        
+        entries = self._scan()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        
+        evicted = 0
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            evicted += 1
+        
+        self._set_size(size)
+        if evicted:
+            self._increment("evictions", evicted)
+            logger.info(f"File cache {self.directory} evicted down to {size} bytes")
+    
+    def stats(self) -> dict:
+        """Hit-rate metrics and current disk usage"""
+        # Rescan for the exact figure rather than the running total
+        size = sum(entry_size for _, entry_size, _ in self._scan())
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes
+        }
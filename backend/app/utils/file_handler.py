@@ -1,5 +1,8 @@
 """File Handling Utilities"""
+from app.core.exceptions import FileTooLargeError
+import asyncio
 import os
+import tempfile
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,3 +40,27 @@ class FileHandler:
         except Exception as e:
             logger.error(f"File delete error: {str(e)}")
             return False
+    
+    @staticmethod
+    async def save_upload(upload, directory: str, max_size: int, chunk_size: int = 1024 * 1024) -> str:
+        """Copy an upload to a temp file in chunks, enforcing max_size as it streams"""
+        os.makedirs(directory, exist_ok=True)
+        suffix = os.path.splitext(upload.filename or "")[1]
+        
+        def copy() -> str:
+            fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+            written = 0
+            try:
+                upload.file.seek(0)
+                with os.fdopen(fd, 'wb') as f:
+                    while chunk := upload.file.read(chunk_size):
+                        written += len(chunk)
+                        if written > max_size:
+                            raise FileTooLargeError(f"File exceeds {max_size} bytes")
+                        f.write(chunk)
+            except BaseException:
+                os.remove(path)
+                raise
+            return path
+        
+        return await asyncio.to_thread(copy)
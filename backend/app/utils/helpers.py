@@ -1,4 +1,7 @@
 """Helper Utility Functions"""
+import hashlib
+import json
+import re
 import uuid
 import logging
 
@@ -8,6 +11,56 @@ def generate_unique_id():
     """Generate unique ID"""
     return str(uuid.uuid4())
 
+def stable_hash(*parts) -> str:
+    """Deterministic SHA-256 of JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_HEADING = re.compile(
+    r"^(?:#{1,6}\s+\S|(?:chapter|section|part|unit|lesson)\s+[\w.]+|\d+(?:\.\d+)*\.?\s+[A-Z])",
+    re.IGNORECASE | re.MULTILINE
+)
+
+def split_structured(text: str, max_chars: int) -> list:
+    """Split text into chunks of at most max_chars, preferring heading, then paragraph, then sentence boundaries"""
+    def pieces(block: str, level: int) -> list:
+        if len(block) <= max_chars:
+            return [block]
+        if level == 0:
+            starts = [m.start() for m in _HEADING.finditer(block) if m.start() > 0]
+            parts = [block[i:j] for i, j in zip([0] + starts, starts + [len(block)])]
+        elif level == 1:
+            parts = re.split(r"(?<=\n)\s*\n", block)
+        elif level == 2:
+            parts = re.split(r"(?<=[.!?])\s+", block)
+        else:
+            parts = [block[i:i + max_chars] for i in range(0, len(block), max_chars)]
+        
+        if len(parts) < 2 and level < 3:
+            return pieces(block, level + 1)
+        return [piece for part in parts for piece in pieces(part, level + 1)]
+    
+    chunks, current = [], ""
+    for piece in pieces(text, 0):
+        # Pack neighbouring pieces together up to the limit
+        separator = "" if not current or current.endswith("\n") else "\n"
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = current + separator + piece if current else piece
+    if current.strip():
+        chunks.append(current)
+    return [chunk for chunk in chunks if chunk.strip()]
+
 def log_info(message: str):
     """Log info message"""
     logger.info(message)
@@ -0,0 +1,112 @@
+"""HTTP Range Request Utilities"""
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from typing import Optional, Tuple
+import anyio
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header cannot be served for the resource size"""
+    pass
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into inclusive (start, end).
+    
+    Returns None when the whole resource should be served (no header,
+    another unit, or multiple ranges, which servers may ignore).
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if start_text == "":
+            # Suffix range: last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    def strip_weak(tag: str) -> str:
+        return tag.strip().removeprefix("W/")
+    
+    return any(strip_weak(tag) == strip_weak(etag) for tag in if_none_match.split(","))
+
+class FileRangeResponse(Response):
+    """Serve a byte range of a file without buffering it in memory.
+    
+    The range is streamed in bounded chunks, with every file operation in
+    a worker thread. There is no sendfile path: uvicorn does not offer the
+    ASGI zero-copy extension, so each chunk passes through Python.
+    """
+    chunk_size = 256 * 1024
+    
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: dict = None,
+        media_type: str = None
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._send_range(scope, send)
+        if self.background is not None:
+            await self.background()
+    
+    async def _send_range(self, scope: Scope, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+        
+        count = self.end - self.start + 1
+        if scope.get("method") == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        
+        f = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await anyio.to_thread.run_sync(f.seek, self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(f.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0
+                })
+            
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await anyio.to_thread.run_sync(f.close)
@@ -0,0 +1 @@
+"""Offline end-to-end pipeline benchmarks"""
@@ -0,0 +1,135 @@
+"""Deterministic local stand-ins for the Azure services"""
+from dataclasses import dataclass, field
+from typing import List
+import asyncio
+import json
+import os
+import wave
+
+def _system_text(messages) -> str:
+    return str(messages[0].content) if messages else ""
+
+@dataclass
+class FakeMessage:
+    content: str
+    usage_metadata: dict = field(default_factory=dict)
+
+class FakeChatModel:
+    """Chat model answering the analyzer and script prompts with canned, well-formed output.
+    
+    Latency is split into a fixed time-to-first-token and a per-chunk
+    delay, so streamed scripts arrive incrementally like a real deployment.
+    """
+    
+    deployment_name = "fake-gpt"
+    temperature = 0.0
+    
+    def __init__(
+        self,
+        scenes: int,
+        scene_duration: int,
+        first_token_latency: float = 0.5,
+        chunk_latency: float = 0.02,
+        words_per_scene: int = None
+    ):
+        self.scenes = scenes
+        self.scene_duration = scene_duration
+        self.first_token_latency = first_token_latency
+        self.chunk_latency = chunk_latency
+        # Narration paced at ~150 words per minute, matching the script prompt
+        self.words_per_scene = words_per_scene or max(5, scene_duration * 150 // 60)
+    
+    def _analysis(self) -> str:
+        return json.dumps({
+            "summary": "A benchmark lesson covering several related concepts.",
+            "key_concepts": [f"Concept {i}" for i in range(1, 6)],
+            "difficulty_level": "intermediate",
+            "estimated_duration": self.scenes * self.scene_duration,
+            "topics": ["Benchmarking", "Video generation"],
+            "target_audience": "Students"
+        })
+    
+    def _script_lines(self) -> List[str]:
+        lines = [json.dumps({"type": "header", "title": "Benchmark Video", "introduction": "Welcome."})]
+        for number in range(1, self.scenes + 1):
+            narration = " ".join(f"word{(number * 7 + i) % 97}" for i in range(self.words_per_scene))
+            lines.append(json.dumps({
+                "type": "scene",
+                "scene_number": number,
+                "narration": narration,
+                "duration": self.scene_duration,
+                "visual_description": f"Diagram of step {number}",
+                "key_points": [f"Key point {number}"]
+            }))
+        lines.append(json.dumps({
+            "type": "footer",
+            "conclusion": "Thanks for watching.",
+            "total_duration": self.scenes * self.scene_duration
+        }))
+        return lines
+    
+    def _respond(self, messages) -> str:
+        if "JSON Lines" in _system_text(messages):
+            return "\n".join(self._script_lines())
+        return self._analysis()
+    
+    def _usage(self, messages, text: str) -> dict:
+        prompt = sum(len(str(m.content)) for m in messages)
+        return {"input_tokens": prompt // 4, "output_tokens": len(text) // 4}
+    
+    async def ainvoke(self, messages) -> FakeMessage:
+        text = self._respond(messages)
+        await asyncio.sleep(self.first_token_latency + self.chunk_latency * text.count("\n"))
+        return FakeMessage(text, self._usage(messages, text))
+    
+    async def astream(self, messages):
+        await asyncio.sleep(self.first_token_latency)
+        for line in self._respond(messages).split("\n"):
+            await asyncio.sleep(self.chunk_latency)
+            yield FakeMessage(line + "\n")
+
+class FakeSpeechService:
+    """Writes silent 24kHz mono PCM narration whose length follows the word count"""
+    
+    def __init__(self, latency: float = 0.3, words_per_second: float = 2.5):
+        self.latency = latency
+        self.words_per_second = words_per_second
+    
+    async def text_to_speech(self, text: str, output_path: str, voice_name: str = None, speed: float = 1.0, pitch: float = 1.0) -> str:
+        await asyncio.sleep(self.latency)
+        seconds = len(text.split()) / self.words_per_second / speed
+        await asyncio.to_thread(self._write_silence, output_path, seconds)
+        return output_path
+    
+    async def synthesize_ssml(self, ssml: str, output_path: str) -> str:
+        return await self.text_to_speech(ssml, output_path)
+    
+    @staticmethod
+    def _write_silence(output_path: str, seconds: float, rate: int = 24000):
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with wave.open(output_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes(b"\x00\x00" * int(seconds * rate))
+
+class FakeImageService:
+    """Returns a deterministic placeholder PNG per prompt"""
+    
+    def __init__(self, latency: float = 1.0, output_dir: str = "temp/images"):
+        self.latency = latency
+        self.output_dir = output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+    
+    async def generate_image(self, prompt: str, style: str = "professional", size: str = "1024x1024") -> str:
+        from PIL import Image
+        from app.utils.helpers import stable_hash
+        
+        await asyncio.sleep(self.latency)
+        digest = stable_hash(prompt, style, size)
+        path = os.path.join(self.output_dir, f"img_{digest}.png")
+        if not os.path.exists(path):
+            width, height = (int(v) for v in size.split("x"))
+            color = tuple(int(digest[i:i + 2], 16) for i in (0, 2, 4))
+            await asyncio.to_thread(Image.new("RGB", (width, height), color).save, path)
+        return path
@@ -0,0 +1,272 @@
+"""End-to-end pipeline benchmark.
+
+Runs the full analyze -> script -> scenes -> stitch pipeline against local
+stand-ins for Azure OpenAI, Speech and Blob Storage, with configurable
+latencies, and reports per-stage time, CPU, peak memory and output size.
+Everything but the external services is real: MoviePy/ffmpeg encoding,
+diagram rendering, caches and the LangGraph workflow.
+    
+    python -m benchmarks.run --scenario small
+    python -m benchmarks.run --scenario all --save-baseline
+    python -m benchmarks.run --scenario medium --tolerance 0.15
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+SCENARIOS = {
+    "small": {"scenes": 3, "scene_duration": 10},
+    "medium": {"scenes": 12, "scene_duration": 20},
+    "30min": {"scenes": 60, "scene_duration": 30},
+}
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Metrics compared against the baseline; lower is better for all of them
+COMPARED = ("wall_seconds", "cpu_seconds", "peak_rss_mb")
+
+def _configure_environment(work_dir: str):
+    """Point every setting at throwaway local state before app.config is imported"""
+    os.environ.update({
+        "STORAGE_BACKEND": "local",
+        "LOCAL_STORAGE_DIR": os.path.join(work_dir, "storage"),
+        "DATABASE_URL": f"sqlite:///{os.path.join(work_dir, 'bench.db')}",
+        "CHECKPOINT_BACKEND": "none",
+        "LLM_CACHE_ENABLED": "false",
+        "LLM_CACHE_PATH": os.path.join(work_dir, "cache", "llm_cache.db"),
+        "TTS_CACHE_ENABLED": "false",
+        "TTS_CACHE_DIR": os.path.join(work_dir, "cache", "tts"),
+        "SEGMENT_CACHE_DIR": os.path.join(work_dir, "cache", "segments"),
+        "DIAGRAM_CACHE_DIR": os.path.join(work_dir, "cache", "diagrams"),
+        "TRACING_ENABLED": "false",
+        "OTEL_EXPORTER_OTLP_ENDPOINT": "",
+    })
+
+def _content(scenes: int) -> str:
+    """Synthetic source document, sized roughly in proportion to the video"""
+    sections = []
+    for i in range(1, scenes + 1):
+        body = " ".join(
+            f"Topic {i} builds on the previous idea and introduces term{i * 13 % 101}."
+            for _ in range(8)
+        )
+        sections.append(f"## Section {i}\n\n{body}\n")
+    return "\n".join(sections)
+
+class StageTimer:
+    """Span listener aggregating wall-clock and summed busy time per pipeline stage"""
+    
+    def __init__(self, stages: dict):
+        self.stages = stages
+        self.intervals = {}
+    
+    def __call__(self, finished):
+        stage = self.stages.get(finished.name)
+        if stage:
+            self.intervals.setdefault(stage, []).append((finished.start_ns, finished.end_ns))
+    
+    @staticmethod
+    def _union_ns(intervals: list) -> int:
+        total, current_start, current_end = 0, None, None
+        for start, end in sorted(intervals):
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    total += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            total += current_end - current_start
+        return total
+    
+    def report(self) -> dict:
+        return {
+            stage: {
+                "count": len(intervals),
+                "wall_seconds": round(self._union_ns(intervals) / 1e9, 3),
+                "busy_seconds": round(sum(end - start for start, end in intervals) / 1e9, 3)
+            }
+            for stage, intervals in sorted(self.intervals.items())
+        }
+
+def _cpu_seconds() -> float:
+    import resource
+    
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process and its largest reaped child"""
+    import resource
+    
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak_kb / divisor, 1)
+
+async def _run_pipeline(name: str, spec: dict, args) -> dict:
+    from app.core.metrics import SPAN_STAGES
+    from app.core.tracing import on_span_end, remove_span_listener
+    from app.database import Base, engine
+    import app.models  # registers every table on Base
+    
+    # The scenario's database is a fresh file; the API normally creates tables at startup
+    Base.metadata.create_all(bind=engine)
+    
+    timer = StageTimer(SPAN_STAGES)
+    on_span_end(timer)
+    try:
+        return await _generate(name, spec, args, timer)
+    finally:
+        remove_span_listener(timer)
+
+async def _generate(name: str, spec: dict, args, timer: StageTimer) -> dict:
+    from app.agents.orchestrator import VideoGeneratorOrchestrator
+    from app.services.local_storage import LocalStorageService
+    from benchmarks.fakes import FakeChatModel, FakeImageService, FakeSpeechService
+    
+    storage = LocalStorageService()
+    orchestrator = VideoGeneratorOrchestrator(
+        llm=FakeChatModel(
+            spec["scenes"],
+            spec["scene_duration"],
+            first_token_latency=args.llm_latency,
+            chunk_latency=args.llm_chunk_latency
+        ),
+        speech_service=FakeSpeechService(latency=args.tts_latency),
+        image_service=FakeImageService(latency=args.image_latency),
+        storage_service=storage
+    )
+    
+    config = {"quality": args.quality, "use_llm_cache": False}
+    start = time.perf_counter()
+    result = await orchestrator.generate_video(_content(spec["scenes"]), config)
+    wall = time.perf_counter() - start
+    
+    if result["status"] != "completed":
+        raise RuntimeError(f"Scenario {name} failed: {result.get('error')}")
+    
+    video_path = storage.local_path(storage.blob_name_from_url(result["video_path"]))
+    return {
+        "scenes": spec["scenes"],
+        "video_seconds": spec["scenes"] * spec["scene_duration"],
+        "wall_seconds": round(wall, 3),
+        "output_mb": round(os.path.getsize(video_path) / (1024 * 1024), 2),
+        "stages": timer.report()
+    }
+
+def run_scenario(name: str, args) -> dict:
+    """Run one scenario and attach process-level resource usage.
+    
+    ru_maxrss only ever grows, so main() runs each scenario in a fresh
+    process; its peak RSS is then that scenario's alone.
+    """
+    import asyncio
+    from app.core.process_pools import shutdown_process_pools
+    
+    cpu_before = _cpu_seconds()
+    result = asyncio.run(_run_pipeline(name, SCENARIOS[name], args))
+    # Reap the render workers so their CPU time is counted under RUSAGE_CHILDREN
+    shutdown_process_pools(wait=True)
+    result["cpu_seconds"] = round(_cpu_seconds() - cpu_before, 3)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions beyond tolerance, as human-readable lines"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for metric in COMPARED:
+            before, after = expected.get(metric), result.get(metric)
+            if before and after is not None and after > before * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+def _print_result(name: str, result: dict):
+    print(
+        f"\n{name}: {result['scenes']} scenes, {result['video_seconds']}s of video -> "
+        f"wall {result['wall_seconds']}s, cpu {result['cpu_seconds']}s, "
+        f"peak rss {result['peak_rss_mb']}MB, output {result['output_mb']}MB"
+    )
+    print(f"  {'stage':<10}{'count':>7}{'wall s':>10}{'busy s':>10}")
+    for stage, timing in result["stages"].items():
+        print(f"  {stage:<10}{timing['count']:>7}{timing['wall_seconds']:>10}{timing['busy_seconds']:>10}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="small")
+    parser.add_argument("--quality", default="720p")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds to first token")
+    parser.add_argument("--llm-chunk-latency", type=float, default=0.02, help="Seconds per streamed line")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Seconds per synthesis call")
+    parser.add_argument("--image-latency", type=float, default=1.0, help="Seconds per image generation")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the new baseline")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--work-dir", help="Keep intermediate files here instead of a temp dir")
+    args = parser.parse_args(argv)
+    
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    args.baseline = os.path.abspath(args.baseline)
+    work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix="edu-video-bench-"))
+    os.makedirs(work_dir, exist_ok=True)
+    _configure_environment(work_dir)
+    os.chdir(work_dir)
+    
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = {}
+    for name in names:
+        # Spawned children inherit the environment and working directory set above
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results[name] = pool.submit(run_scenario, name, args).result()
+        _print_result(name, results[name])
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline recorded; run with --save-baseline to create one")
+        return 0
+    
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    
+    print(f"\nWithin {args.tolerance:.0%} of baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+#!/bin/sh
+set -e
+
+# Metric files left by a previous run would be summed into this one's totals.
+# Only the API container clears them; the Celery worker starts after it.
+if [ "$1" = "uvicorn" ] && [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+exec "$@"
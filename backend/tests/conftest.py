@@ -0,0 +1,20 @@
+"""Throwaway local state for every setting, applied before app.config is imported.
+
+Tests import app modules inside the test body, so the settings they see
+are the ones configured here rather than whatever the shell exports.
+"""
+import os
+import pytest
+
+@pytest.fixture(scope="session", autouse=True)
+def local_environment(tmp_path_factory):
+    from benchmarks.run import _configure_environment
+
+    work_dir = str(tmp_path_factory.mktemp("edu-video-test"))
+    saved_environ, saved_cwd = dict(os.environ), os.getcwd()
+    _configure_environment(work_dir)
+    os.chdir(work_dir)
+    yield work_dir
+    os.chdir(saved_cwd)
+    os.environ.clear()
+    os.environ.update(saved_environ)
@@ -0,0 +1,106 @@
+"""Expiry and eviction in the LLM and file caches"""
+import os
+import time
+
+def test_llm_cache_round_trip_and_ttl(tmp_path):
+    from app.services.llm_cache import LLMCache
+    
+    cache = LLMCache(path=str(tmp_path / "llm.db"), max_bytes=1024 * 1024, ttl_seconds=60)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.get("other") is None
+    
+    cache.ttl_seconds = -1
+    assert cache.get("key") is None
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 0)
+
+def test_llm_cache_evicts_least_recently_used(tmp_path):
+    from app.services.llm_cache import LLMCache
+    
+    cache = LLMCache(path=str(tmp_path / "llm.db"), max_bytes=25, ttl_seconds=60)
+    cache.set("a", "x" * 10)
+    time.sleep(0.01)
+    cache.set("b", "x" * 10)
+    time.sleep(0.01)
+    assert cache.get("a") is not None
+    time.sleep(0.01)
+    cache.set("c", "x" * 10)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+def _write(path, size: int) -> str:
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return str(path)
+
+def test_file_cache_put_and_fetch(tmp_path):
+    from app.utils.file_cache import FileCache
+    
+    cache = FileCache(str(tmp_path / "cache"), max_bytes=1024, extension=".bin")
+    dest = str(tmp_path / "out" / "copy.bin")
+    assert cache.fetch("aa11", dest) is None
+    
+    cache.put("aa11", _write(tmp_path / "src", 100))
+    assert cache.fetch("aa11", dest) == dest
+    assert os.path.getsize(dest) == 100
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size_bytes"]) == (1, 1, 100)
+
+def test_file_cache_evicts_least_recently_used(tmp_path):
+    from app.utils.file_cache import FileCache
+    
+    cache = FileCache(str(tmp_path / "cache"), max_bytes=250)
+    src = _write(tmp_path / "src", 100)
+    cache.put("aa01", src)
+    cache.put("bb02", src)
+    # Age both entries, then touch the first so the second is least recently used
+    for key, age in (("aa01", 20), ("bb02", 10)):
+        past = time.time() - age
+        os.utime(cache.path_for(key), (past, past))
+    cache.fetch("aa01", str(tmp_path / "a"))
+    cache.put("cc03", src)
+    
+    assert not os.path.exists(cache.path_for("bb02"))
+    assert os.path.exists(cache.path_for("aa01"))
+    assert os.path.exists(cache.path_for("cc03"))
+    assert cache.stats()["size_bytes"] <= 250
+
+def test_file_cache_budget_counts_other_processes_writes(tmp_path):
+    from app.utils.file_cache import FileCache
+    
+    # Two instances over one directory stand in for two worker processes
+    first = FileCache(str(tmp_path / "cache"), max_bytes=250)
+    second = FileCache(str(tmp_path / "cache"), max_bytes=250)
+    src = _write(tmp_path / "src", 100)
+    first.put("aa01", src)
+    second.put("bb02", src)
+    first.put("cc03", src)
+    
+    assert first.stats()["size_bytes"] <= 250
+
+def test_file_cache_evicted_entry_is_a_miss(tmp_path):
+    from app.utils.file_cache import FileCache
+    
+    cache = FileCache(str(tmp_path / "cache"), max_bytes=1024)
+    cache.put("aa01", _write(tmp_path / "src", 100))
+    os.remove(cache.path_for("aa01"))
+    
+    assert cache.fetch("aa01", str(tmp_path / "dest")) is None
+
+def test_file_cache_writer_keeps_its_copy(tmp_path):
+    from app.utils.file_cache import FileCache
+    
+    # An entry larger than the budget is evicted as soon as it is published
+    cache = FileCache(str(tmp_path / "cache"), max_bytes=50)
+    tmp_path_in_cache = cache.reserve()
+    _write(tmp_path_in_cache, 100)
+    dest = cache.commit("aa01", tmp_path_in_cache, str(tmp_path / "dest"))
+    
+    assert not os.path.exists(cache.path_for("aa01"))
+    assert os.path.getsize(dest) == 100
@@ -0,0 +1,35 @@
+"""Structured text splitting"""
+
+def test_short_text_is_one_chunk():
+    from app.utils.helpers import split_structured
+    
+    assert split_structured("A short lesson.", 100) == ["A short lesson."]
+    assert split_structured("   \n\n  ", 100) == []
+
+def test_splits_at_headings_first():
+    from app.utils.helpers import split_structured
+    
+    text = "## One\n\nFirst part.\n\n## Two\n\nSecond part.\n"
+    chunks = split_structured(text, 30)
+    
+    assert [chunk.lstrip().split("\n")[0] for chunk in chunks] == ["## One", "## Two"]
+    assert "".join(chunks) == text
+
+def test_chunks_respect_limit_and_keep_every_word():
+    from app.utils.helpers import split_structured
+    
+    text = "\n\n".join(
+        " ".join(f"Sentence {i}.{j} explains one idea." for j in range(6))
+        for i in range(5)
+    )
+    chunks = split_structured(text, 120)
+    
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 120 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+def test_unbreakable_text_is_cut_at_the_limit():
+    from app.utils.helpers import split_structured
+    
+    chunks = split_structured("x" * 250, 100)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
@@ -0,0 +1,18 @@
+"""Keyframe placement for HLS segmenting"""
+
+def test_keyframe_at_every_scene_start_and_interval():
+    from app.services.hls_packager import keyframe_times
+    
+    assert keyframe_times([10, 10], 6) == [0.0, 6.0, 10.0, 16.0]
+
+def test_short_scene_still_starts_a_segment():
+    from app.services.hls_packager import keyframe_times
+    
+    assert keyframe_times([0.5, 5], 6) == [0.0, 0.5]
+
+def test_no_sliver_before_the_next_scene():
+    from app.services.hls_packager import keyframe_times
+    
+    # A slot at 6s would leave a 0.5s segment before the scene ends
+    assert keyframe_times([6.5, 3], 6) == [0.0, 6.5]
+    assert keyframe_times([8], 6) == [0.0, 6.0]
@@ -0,0 +1,33 @@
+"""Range and conditional request parsing"""
+import pytest
+
+def test_parse_range_forms():
+    from app.utils.http_range import parse_range
+    
+    assert parse_range(None, 1000) is None
+    assert parse_range("items=0-10", 1000) is None
+    assert parse_range("bytes=0-99,200-299", 1000) is None
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+    # An end past the resource is clamped, not refused
+    assert parse_range("bytes=500-5000", 1000) == (500, 999)
+    assert parse_range("bytes=abc-def", 1000) is None
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=500-100", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    from app.utils.http_range import RangeNotSatisfiable, parse_range
+    
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 1000)
+
+def test_etag_matches():
+    from app.utils.http_range import etag_matches
+    
+    assert not etag_matches(None, '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"xyz", W/"abc"', '"abc"')
+    assert not etag_matches('"xyz"', '"abc"')
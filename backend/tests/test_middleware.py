@@ -0,0 +1,59 @@
+"""Upload size limits enforced while the body streams in"""
+import json
+import pytest
+
+async def _echo_length(scope, receive, send):
+    """Reads the whole body, then answers with its length"""
+    total = 0
+    while True:
+        message = await receive()
+        total += len(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(total).encode()})
+
+async def _request(app, path: str, chunks: list, content_length: int = None) -> tuple:
+    headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+    
+    async def send(message):
+        sent.append(message)
+    
+    await app(scope, receive, send)
+    status = next(message["status"] for message in sent if message["type"] == "http.response.start")
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    return status, body
+
+def _app():
+    from app.core.middleware import UploadSizeLimitMiddleware
+    return UploadSizeLimitMiddleware(_echo_length, max_bytes=100, path_suffixes=["/upload"])
+
+@pytest.mark.asyncio
+async def test_body_within_limit_passes():
+    status, body = await _request(_app(), "/api/v1/upload", [b"x" * 60, b"x" * 40])
+    assert (status, body) == (200, b"100")
+
+@pytest.mark.asyncio
+async def test_declared_length_over_limit_is_refused_up_front():
+    status, body = await _request(_app(), "/api/v1/upload", [b"x" * 10], content_length=101)
+    assert status == 413
+    assert "upload limit" in json.loads(body)["detail"]
+
+@pytest.mark.asyncio
+async def test_streamed_body_over_limit_is_cut_off():
+    status, _ = await _request(_app(), "/api/v1/upload", [b"x" * 60, b"x" * 60])
+    assert status == 413
+
+@pytest.mark.asyncio
+async def test_other_paths_are_not_limited():
+    status, body = await _request(_app(), "/api/v1/generate", [b"x" * 500])
+    assert (status, body) == (200, b"500")
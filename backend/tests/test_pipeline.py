@@ -0,0 +1,34 @@
+"""End-to-end run of the generation workflow, from analysis through stitch"""
+import os
+import shutil
+import pytest
+
+pytest.importorskip("moviepy")
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+
+@pytest.mark.asyncio
+async def test_generate_video_runs_through_stitch():
+    from app.agents.orchestrator import VideoGeneratorOrchestrator
+    from app.database import Base, engine
+    from app.services.local_storage import LocalStorageService
+    from benchmarks.fakes import FakeChatModel, FakeImageService, FakeSpeechService
+    import app.models  # registers every table on Base
+    
+    Base.metadata.create_all(bind=engine)
+    storage = LocalStorageService()
+    orchestrator = VideoGeneratorOrchestrator(
+        llm=FakeChatModel(2, 2, first_token_latency=0, chunk_latency=0),
+        speech_service=FakeSpeechService(latency=0),
+        image_service=FakeImageService(latency=0),
+        storage_service=storage
+    )
+    
+    result = await orchestrator.generate_video(
+        "## Section 1\n\nA short lesson.\n\n## Section 2\n\nIts follow-up.",
+        {"quality": "720p", "use_llm_cache": False}
+    )
+    
+    assert result["status"] == "completed", result.get("error")
+    assert os.path.exists(storage.local_path(storage.blob_name_from_url(result["video_path"])))
+    assert result["hls_url"] is not None
+    assert sorted(result["scene_fingerprints"]) == [1, 2]